@@ -1,8 +1,8 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-from django.core.mail import send_mail
 from django.conf import settings
+from jobs.tasks import enqueue_email
 
 @api_view(['POST'])
 def contact_us(request):
@@ -35,16 +35,12 @@ def contact_us(request):
     {message}
     """
 
-    try:
-        send_mail(
-            subject="New Contact Form Submission",
-            message=full_message,
-            from_email=settings.EMAIL_HOST_USER,
-            recipient_list=[settings.EMAIL_HOST_USER],
-            fail_silently=False,
-        )
-        return Response({'message': 'Your active message has been sent!'},status=status.HTTP_200_OK)
-
-    except Exception as e:
-        return Response({'error': f'An error occurred while sending the message: {str(e)}'},
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    # delivered by the job workers, so an SMTP hiccup never fails the submission
+    enqueue_email(
+        subject="New Contact Form Submission",
+        message=full_message,
+        from_email=settings.EMAIL_HOST_USER,
+        recipient_list=[settings.EMAIL_HOST_USER],
+        reply_to=[email],
+    )
+    return Response({'message': 'Your active message has been sent!'},status=status.HTTP_200_OK)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Student, Instructor, Course, Enrollment, Review, Payment, CourseVideo
+from .models import Student, Instructor, Course, Enrollment, Review, Payment, CourseVideo, CourseStats
 
 admin.site.register(Student)
 admin.site.register(Instructor)
@@ -8,3 +8,4 @@ admin.site.register(Enrollment)
 admin.site.register(Review)
 admin.site.register(Payment)
 admin.site.register(CourseVideo)
+admin.site.register(CourseStats)
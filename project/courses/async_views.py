@@ -0,0 +1,87 @@
+"""Async (ASGI) versions of the catalog, course detail and enrolled-courses endpoints.
+
+Each mirrors its DRF view in ``views.py`` (payload, cache keys, pagination cursors and errors) but
+queries through the async ORM, so a request waiting on the database doesn't hold a worker thread.
+"""
+from django.urls import reverse
+from django.views.decorators.http import require_GET
+from rest_framework import exceptions
+from rest_framework.request import Request
+
+from users.async_views import api_error, api_response, authenticated_user, optional_user
+from .cache import acached_catalog_data
+from .models import Course, Enrollment
+from .pagination import CourseCursorPagination, EnrollmentCursorPagination, apaginate
+from .serializers import CourseSerializer, EnrolledCourseSerializer
+
+
+@require_GET
+async def all_courses(request):
+    # anonymous access is allowed, but like AllCoursesView a bad Authorization header is a 401
+    try:
+        await optional_user(request)
+    except exceptions.APIException as exc:
+        return api_error(exc)
+    request = Request(request)
+    paginator = CourseCursorPagination()
+
+    async def load_page():
+        queryset = Course.objects.select_related('stats').prefetch_related('videos')
+        courses, links = await apaginate(paginator, queryset, request)
+        results = CourseSerializer(courses, many=True, context={'request': request}).data
+        return {**links, 'results': results}
+
+    # same key as AllCoursesView, so both share cached pages
+    data, hit = await acached_catalog_data('all_courses', [paginator.canonical_url(request)], load_page)
+    return api_response(data, headers={'X-Cache': 'HIT' if hit else 'MISS'})
+
+
+@require_GET
+async def course_detail(request, slug):
+    try:
+        user = await authenticated_user(request)
+    except exceptions.APIException as exc:
+        return api_error(exc)
+
+    async def load_course():
+        course = await Course.objects.select_related('stats').prefetch_related('videos').aget(slug=slug)
+        return CourseSerializer(course).data
+
+    try:
+        course_data, hit = await acached_catalog_data('course_detail', [slug], load_course)
+    except Course.DoesNotExist:
+        return api_response({'error': 'Course not found'}, status=404)
+
+    headers = {'X-Cache': 'HIT' if hit else 'MISS'}
+    if user.is_student:
+        return api_response(course_data, headers=headers)
+    if user.is_instructor:
+        if course_data['instructor'] == user.id:
+            students_url = request.build_absolute_uri(reverse('course_students', args=[course_data['id']]))
+            course_data = dict(course_data, enrolled_students_url=students_url)
+        return api_response(course_data, headers=headers)
+    return api_response({'error': 'Invalid user type.'}, status=403)
+
+
+@require_GET
+async def enrolled_courses(request):
+    request = Request(request)
+    try:
+        user = await authenticated_user(request)
+        if not user.is_student:
+            raise exceptions.PermissionDenied()
+        status_filter = request.query_params.get('status')
+        valid = dict(Enrollment._meta.get_field('status').choices)
+        if status_filter and status_filter not in valid:
+            raise exceptions.ValidationError({'status': f'Must be one of: {", ".join(valid)}.'})
+    except exceptions.APIException as exc:
+        return api_error(exc)
+
+    enrollments = Enrollment.objects.filter(student=user.student_profile).select_related(
+        'course', 'course__stats'
+    ).prefetch_related('course__videos').defer('completed_videos')
+    if status_filter:
+        enrollments = enrollments.filter(status=status_filter)
+    enrollments, links = await apaginate(EnrollmentCursorPagination(), enrollments, request)
+    results = EnrolledCourseSerializer(enrollments, many=True, context={'request': request}).data
+    return api_response({**links, 'results': results})
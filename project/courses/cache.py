@@ -0,0 +1,107 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+CATALOG_VERSION_KEY = 'catalog:version'
+CATALOG_HITS_KEY = 'catalog:hits'
+CATALOG_MISSES_KEY = 'catalog:misses'
+
+
+def get_catalog_cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def get_catalog_version():
+    cache = get_catalog_cache()
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # seed from the clock so a lost version key never resurrects stale entries
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+async def aget_catalog_version():
+    cache = get_catalog_cache()
+    version = await cache.aget(CATALOG_VERSION_KEY)
+    if version is None:
+        await cache.aadd(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+        version = await cache.aget(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    cache = get_catalog_cache()
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def _count(key):
+    cache = get_catalog_cache()
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+async def _acount(key):
+    cache = get_catalog_cache()
+    if not await cache.aadd(key, 1, timeout=None):
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            await cache.aset(key, 1, timeout=None)
+
+
+def catalog_cache_key(name, *parts, version=None):
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'catalog:{version if version is not None else get_catalog_version()}:{name}:{digest}'
+
+
+def cached_catalog_data(name, parts, compute):
+    """Return ``(data, hit)`` for a catalog payload, computing and storing it on a miss."""
+    cache = get_catalog_cache()
+    key = catalog_cache_key(name, *parts)
+    data = cache.get(key)
+    if data is not None:
+        _count(CATALOG_HITS_KEY)
+        return data, True
+    data = compute()
+    cache.set(key, data, getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300))
+    _count(CATALOG_MISSES_KEY)
+    return data, False
+
+
+async def acached_catalog_data(name, parts, compute):
+    """``cached_catalog_data`` for async views; ``compute`` is a coroutine function.
+
+    Uses the same keys, so sync and async views share cached payloads.
+    """
+    cache = get_catalog_cache()
+    key = catalog_cache_key(name, *parts, version=await aget_catalog_version())
+    data = await cache.aget(key)
+    if data is not None:
+        await _acount(CATALOG_HITS_KEY)
+        return data, True
+    data = await compute()
+    await cache.aset(key, data, getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300))
+    await _acount(CATALOG_MISSES_KEY)
+    return data, False
+
+
+def catalog_cache_stats():
+    cache = get_catalog_cache()
+    hits = cache.get(CATALOG_HITS_KEY, 0)
+    misses = cache.get(CATALOG_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else 0.0,
+        'version': get_catalog_version(),
+    }
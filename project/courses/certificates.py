@@ -0,0 +1,128 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+PAGE_WIDTH, PAGE_HEIGHT = 842, 595  # A4 landscape, in points
+
+
+def certificate_digest(enrollment_id, name, course_title, completion_date):
+    """Content address of a certificate: changes whenever anything printed on it changes."""
+    key = '\x1f'.join([str(enrollment_id), name, course_title, str(completion_date)])
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def certificate_path(digest):
+    root = Path(getattr(settings, 'CERTIFICATE_ROOT', Path(settings.BASE_DIR) / 'certificates'))
+    return root / digest[:2] / f'{digest}.pdf'
+
+
+def _pdf_text(value):
+    # standard Type1 fonts only cover WinAnsi; characters outside it are printed as '?'
+    data = value.encode('cp1252', errors='replace')
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def _centered(text, font, size, y):
+    # Helvetica averages ~0.5em per glyph, close enough to centre a line without a metrics table
+    x = max((PAGE_WIDTH - len(text) * size * 0.5) / 2, 40)
+    return b'BT /%s %d Tf %.1f %d Td (%s) Tj ET\n' % (font.encode(), size, x, y, _pdf_text(text))
+
+
+def render_certificate_pdf(name, course_title, completion_date, digest):
+    """Build a one-page certificate as PDF bytes, without any third-party PDF library.
+
+    Output is deterministic for the same input, which keeps the content-addressed cache stable.
+    """
+    content = b''.join([
+        b'0.2 0.3 0.5 RG 4 w 30 30 782 535 re S 1 w 42 42 758 511 re S\n',
+        _centered('Certificate of Completion', 'F2', 34, 450),
+        _centered('This certifies that', 'F1', 16, 395),
+        _centered(name, 'F2', 28, 345),
+        _centered('has successfully completed the course', 'F1', 16, 295),
+        _centered(course_title, 'F2', 22, 250),
+        _centered(f'Completed on {completion_date}', 'F1', 14, 190),
+        _centered(f'Certificate ID: {digest}', 'F1', 9, 80),
+    ])
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+        b'/Resources << /Font << /F1 4 0 R /F2 5 0 R >> >> /Contents 6 0 R >>' % (PAGE_WIDTH, PAGE_HEIGHT),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+        b'<< /Length %d >>\nstream\n%sendstream' % (len(content), content),
+    ]
+    pdf = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(pdf)
+    pdf += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    pdf += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    pdf += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+
+def write_certificate(payload):
+    """Render ``payload`` to its content-addressed path unless it is already cached.
+
+    Takes and returns plain data so it can run inside a ``ProcessPoolExecutor`` worker.
+    """
+    path = Path(payload['path'])
+    if path.exists():
+        return payload['digest'], False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = render_certificate_pdf(payload['name'], payload['course_title'], payload['completion_date'], payload['digest'])
+    # write to a temp file and rename so concurrent readers never see a partial PDF
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as output:
+        output.write(data)
+    os.replace(tmp, path)
+    return payload['digest'], True
+
+
+def certificate_payload(enrollment_id, first_name, last_name, course_title, completion_date):
+    name = f"{first_name} {last_name}"
+    completion_date = completion_date.strftime("%Y-%m-%d")
+    digest = certificate_digest(enrollment_id, name, course_title, completion_date)
+    return {
+        'enrollment_id': enrollment_id,
+        'name': name,
+        'course_title': course_title,
+        'completion_date': completion_date,
+        'digest': digest,
+        'path': str(certificate_path(digest)),
+    }
+
+
+def store_certificates(payloads):
+    """Record the current digest of each enrollment's certificate so it can be verified."""
+    # imported here so process-pool workers can load this module without the app registry
+    from .models import Certificate
+
+    Certificate.objects.bulk_create(
+        [Certificate(enrollment_id=p['enrollment_id'], digest=p['digest']) for p in payloads],
+        update_conflicts=True, unique_fields=['enrollment'], update_fields=['digest', 'issued_at'],
+    )
+
+
+def enrollment_certificate_payload(enrollment):
+    user = enrollment.student.user
+    return certificate_payload(enrollment.id, user.first_name, user.last_name, enrollment.course.title, enrollment.date)
+
+
+def issue_certificate(enrollment, payload):
+    """Make sure the PDF for a completed enrollment is on disk and its digest is registered."""
+    from .models import Certificate
+
+    write_certificate(payload)
+    try:
+        current = enrollment.certificate.digest
+    except Certificate.DoesNotExist:
+        current = None
+    if current != payload['digest']:
+        store_certificates([payload])
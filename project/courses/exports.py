@@ -0,0 +1,117 @@
+import csv
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from .models import Enrollment, Payment
+
+EXPORT_CHUNK_SIZE = 2000
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+class Echo:
+    """File-like object whose ``write`` hands the line back, so ``csv.writer`` can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(header, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': (csv_lines, 'text/csv'),
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+}
+
+
+def buffered(lines, size=STREAM_BUFFER_SIZE):
+    """Group small text lines into ~``size`` byte chunks to keep per-chunk overhead low."""
+    chunk, length = [], 0
+    for line in lines:
+        chunk.append(line)
+        length += len(line)
+        if length >= size:
+            yield ''.join(chunk).encode()
+            chunk, length = [], 0
+    if chunk:
+        yield ''.join(chunk).encode()
+
+
+def gzipped(chunks):
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(header, rows, fmt, compress=False):
+    render, _ = EXPORT_FORMATS[fmt]
+    chunks = buffered(render(header, rows))
+    return gzipped(chunks) if compress else chunks
+
+
+def streaming_export(header, rows, fmt, filename, compress=False):
+    """Stream ``rows`` (an iterable of tuples matching ``header``) as a CSV or NDJSON download.
+
+    Pass a lazy iterable such as ``queryset.values_list(...).iterator(chunk_size=EXPORT_CHUNK_SIZE)``
+    so memory stays flat regardless of the row count.
+    """
+    _, content_type = EXPORT_FORMATS[fmt]
+    filename = f'{filename}.{fmt}'
+    if compress:
+        content_type, filename = 'application/gzip', f'{filename}.gz'
+    response = StreamingHttpResponse(export_chunks(header, rows, fmt, compress), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+PAYMENT_EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('date', 'date'),
+    ('price', 'price'),
+    ('currency', 'currency'),
+    ('enrollment_id', 'enrollment_id'),
+    ('course_id', 'enrollment__course_id'),
+    ('course_title', 'enrollment__course__title'),
+    ('student_email', 'enrollment__student__user__email'),
+    ('student_first_name', 'enrollment__student__user__first_name'),
+    ('student_last_name', 'enrollment__student__user__last_name'),
+)
+
+ENROLLMENT_EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('date', 'date'),
+    ('status', 'status'),
+    ('progress', 'progress'),
+    ('course_id', 'course_id'),
+    ('course_title', 'course__title'),
+    ('student_email', 'student__user__email'),
+    ('student_first_name', 'student__user__first_name'),
+    ('student_last_name', 'student__user__last_name'),
+)
+
+EXPORTS = {
+    'payments': (Payment, PAYMENT_EXPORT_COLUMNS),
+    'enrollments': (Enrollment, ENROLLMENT_EXPORT_COLUMNS),
+}
+
+
+def export_rows(queryset, columns):
+    """Return ``(header, rows)`` for ``queryset``, reading it through a chunked server-side cursor."""
+    header = tuple(name for name, _ in columns)
+    rows = queryset.order_by('id').values_list(*(lookup for _, lookup in columns)).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return header, rows
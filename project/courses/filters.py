@@ -0,0 +1,83 @@
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+
+def _date_param(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: 'Use the YYYY-MM-DD format.'})
+    return parsed
+
+
+def _int_param(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: 'Must be an integer.'})
+
+
+def filter_by_date_range(queryset, params, field='date'):
+    """Apply the inclusive ``date_from``/``date_to`` query parameters to ``field``."""
+    date_from = _date_param(params, 'date_from')
+    date_to = _date_param(params, 'date_to')
+    if date_from:
+        queryset = queryset.filter(**{f'{field}__gte': date_from})
+    if date_to:
+        queryset = queryset.filter(**{f'{field}__lte': date_to})
+    return queryset
+
+
+def filter_payments(queryset, params):
+    queryset = filter_by_date_range(queryset, params)
+    currency = params.get('currency')
+    if currency:
+        queryset = queryset.filter(currency=currency.upper())
+    course_id = _int_param(params, 'course')
+    if course_id is not None:
+        queryset = queryset.filter(enrollment__course_id=course_id)
+    return queryset
+
+
+def filter_reviews(queryset, params):
+    queryset = filter_by_date_range(queryset, params)
+    course_id = _int_param(params, 'course')
+    if course_id is not None:
+        queryset = queryset.filter(course_id=course_id)
+    rating = _int_param(params, 'rating')
+    if rating is not None:
+        queryset = queryset.filter(rating=rating)
+    return queryset
+
+
+def filter_enrollments(queryset, params):
+    queryset = filter_by_date_range(queryset, params)
+    course_id = _int_param(params, 'course')
+    if course_id is not None:
+        queryset = queryset.filter(course_id=course_id)
+    status = params.get('status')
+    if status:
+        queryset = queryset.filter(status=status)
+    return queryset
+
+
+def filter_rollups(queryset, params):
+    queryset = filter_by_date_range(queryset, params, field='day')
+    course_id = _int_param(params, 'course')
+    if course_id is not None:
+        queryset = queryset.filter(course_id=course_id)
+    return queryset
+
+
+DATASET_FILTERS = {
+    'payments': filter_payments,
+    'enrollments': filter_enrollments,
+}
@@ -0,0 +1,108 @@
+import threading
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, Max, Sum
+
+from .models import ExchangeRate
+
+PERIOD_START = {
+    'day': lambda day: day,
+    'week': lambda day: day - timedelta(days=day.weekday()),
+    'month': lambda day: day.replace(day=1),
+}
+
+
+def base_currency():
+    return getattr(settings, 'FX_BASE_CURRENCY', 'USD')
+
+
+class RateTable:
+    """Sorted per-currency rate history; lookups are a bisect, never a query."""
+
+    def __init__(self, rows):
+        self.dates = defaultdict(list)
+        self.rates = defaultdict(list)
+        for currency, effective_date, rate in rows:
+            self.dates[currency].append(effective_date)
+            self.rates[currency].append(rate)
+
+    def rate(self, currency, day):
+        """Rate in force on ``day``; days before the first known rate use the earliest one."""
+        currency = currency.upper()
+        if currency == base_currency():
+            return Decimal(1)
+        dates = self.dates.get(currency)
+        if not dates:
+            return None
+        return self.rates[currency][max(bisect_right(dates, day) - 1, 0)]
+
+
+_table = None
+_table_version = None
+_checked_at = float('-inf')
+_table_lock = threading.Lock()
+
+
+def rate_table_version():
+    # upserts keep ids but touch updated_at; the count catches deletions
+    found = ExchangeRate.objects.aggregate(count=Count('id'), updated_at=Max('updated_at'))
+    return found['count'], found['updated_at']
+
+
+def get_rate_table():
+    """Per-process rate table, rebuilt when the rate rows change.
+
+    The version comes from the database itself, so rates loaded by any process are picked up by
+    all of them, at most ``FX_RATE_CHECK_INTERVAL`` seconds later.
+    """
+    global _table, _table_version, _checked_at
+    current = time.monotonic()
+    interval = getattr(settings, 'FX_RATE_CHECK_INTERVAL', 60)
+    if _table is not None and current - _checked_at < interval:
+        return _table
+    with _table_lock:
+        if _table is None or (current - _checked_at >= interval and rate_table_version() != _table_version):
+            rows = list(
+                ExchangeRate.objects.order_by('currency', 'effective_date')
+                .values_list('currency', 'effective_date', 'rate', 'updated_at')
+            )
+            _table = RateTable(row[:3] for row in rows)
+            _table_version = len(rows), max((row[3] for row in rows), default=None)
+        _checked_at = current
+    return _table
+
+
+def invalidate_rate_table():
+    """Make this process check the rate rows on its next lookup; other processes notice on their own."""
+    global _checked_at
+    with _table_lock:
+        _checked_at = float('-inf')
+
+
+def convert_daily_totals(rows, interval='day'):
+    """Convert ``(day, currency, amount)`` groups into base-currency totals per ``interval`` bucket.
+
+    Callers pass rows already grouped by day and currency, so the work is proportional to
+    days x currencies rather than to payments. Returns ``(totals, unconverted_currencies)``.
+    """
+    table = get_rate_table()
+    bucket = PERIOD_START[interval]
+    totals = defaultdict(Decimal)
+    unconverted = set()
+    for day, currency, amount in rows:
+        rate = table.rate(currency, day)
+        if rate is None:
+            unconverted.add(currency)
+            continue
+        totals[bucket(day)] += Decimal(amount) * rate
+    quantum = Decimal('0.01')
+    return {period: total.quantize(quantum) for period, total in sorted(totals.items())}, sorted(unconverted)
+
+
+def daily_revenue_groups(rollups):
+    return rollups.values('day', 'currency').annotate(amount=Sum('revenue')).order_by().values_list('day', 'currency', 'amount')
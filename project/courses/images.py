@@ -0,0 +1,149 @@
+import atexit
+import io
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# name: (width, height, crop). Cropped variants are filled to the exact aspect ratio; the others only shrink to fit.
+VARIANTS = {
+    'thumbnail': (160, 160, True),
+    'card': (480, 270, True),
+    'hero': (1600, 900, False),
+}
+# extension: (Pillow format, save options)
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+DERIVATIVE_ROOT = 'derivatives'
+
+# model label -> name of its image field; each of these models stores the result in `image_variants`
+IMAGE_FIELDS = {
+    'courses.Course': 'courseImage',
+    'courses.Student': 'profile_pic',
+    'courses.Instructor': 'profile_pic',
+    'users.User': 'profile_picture',
+}
+
+
+def variant_name(source_name, variant, extension):
+    # uploads never overwrite an existing name, so names derived from the source name never go stale
+    stem = posixpath.splitext(source_name)[0]
+    return f'{DERIVATIVE_ROOT}/{stem}.{variant}.{extension}'
+
+
+def _resize(image, width, height, crop):
+    if crop:
+        # never upscale: shrink the target box to fit inside the source while keeping its aspect ratio
+        scale = min(1, image.width / width, image.height / height)
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        return ImageOps.fit(image, size, Image.LANCZOS)
+    resized = image.copy()
+    resized.thumbnail((width, height), Image.LANCZOS)
+    return resized
+
+
+def _flatten(image):
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image.convert('RGBA'), mask=image.convert('RGBA').getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def render_variants(source_name, storage=None):
+    """Write every variant of ``source_name`` to storage and return the ``image_variants`` mapping.
+
+    Only touches storage, so it is safe to call from thread or process pool workers.
+    """
+    storage = storage or default_storage
+    with storage.open(source_name, 'rb') as source:
+        image = _flatten(Image.open(source))
+    variants = {'source': source_name}
+    for variant, (width, height, crop) in VARIANTS.items():
+        resized = _resize(image, width, height, crop)
+        entry = {'width': resized.width, 'height': resized.height}
+        for extension, (image_format, options) in FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, image_format, **options)
+            name = variant_name(source_name, variant, extension)
+            if storage.exists(name):
+                storage.delete(name)
+            entry[extension] = storage.save(name, ContentFile(buffer.getvalue()))
+        variants[variant] = entry
+    return variants
+
+
+def save_variants(model, pk, source_name, variants):
+    """Store the variants unless the image was replaced while they were being rendered."""
+    field = IMAGE_FIELDS[model._meta.label]
+    updated = model.objects.filter(pk=pk, **{field: source_name}).update(image_variants=variants)
+    if updated and model._meta.label == 'courses.Course':
+        # queryset updates skip the post_save receiver that normally invalidates catalog payloads
+        from .cache import bump_catalog_version
+        bump_catalog_version()
+    return updated
+
+
+def needs_variants(instance):
+    name = getattr(instance, IMAGE_FIELDS[instance._meta.concrete_model._meta.label]).name
+    return bool(name) and (instance.image_variants or {}).get('source') != name
+
+
+def process_image(model, pk, source_name):
+    try:
+        save_variants(model, pk, source_name, render_variants(source_name))
+    except Exception:
+        logger.exception('Could not build image variants for %s %s (%s)', model._meta.label, pk, source_name)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_image_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', 2), thread_name_prefix='image-variants',
+                )
+                atexit.register(_executor.shutdown)
+    return _executor
+
+
+def schedule_variants(instance):
+    """Queue derivative rendering for a freshly saved instance once its transaction commits."""
+    if not needs_variants(instance):
+        return
+    # proxies such as users.ClaimsUser share the table, field map and update path of their concrete model
+    model, pk = instance._meta.concrete_model, instance.pk
+    source_name = getattr(instance, IMAGE_FIELDS[model._meta.label]).name
+    if getattr(settings, 'IMAGE_DERIVATIVES_ASYNC', True):
+        transaction.on_commit(lambda: get_image_executor().submit(process_image, model, pk, source_name))
+    else:
+        transaction.on_commit(lambda: process_image(model, pk, source_name))
+
+
+def variant_urls(variants, source_name, build_url):
+    """Public shape of ``image_variants``: ``{variant: {'webp': url, 'jpg': url, 'width': .., 'height': ..}}``."""
+    if not variants or not source_name or variants.get('source') != source_name:
+        return None
+    return {
+        variant: {
+            key: build_url(default_storage.url(value)) if key in FORMATS else value
+            for key, value in variants[variant].items()
+        }
+        for variant in VARIANTS if variant in variants
+    }
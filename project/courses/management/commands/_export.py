@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from courses.exports import EXPORT_FORMATS, EXPORTS, export_chunks, export_rows
+from courses.filters import DATASET_FILTERS
+
+
+class BaseExportCommand(BaseCommand):
+    """Shared implementation of the ``export_<dataset>`` commands."""
+
+    dataset = None
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--date-from', help='Inclusive start date (YYYY-MM-DD).')
+        parser.add_argument('--date-to', help='Inclusive end date (YYYY-MM-DD).')
+        parser.add_argument('--course', help='Only rows for this course id.')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output on the fly.')
+        parser.add_argument('--output', '-o', help='File to write to (default: stdout).')
+
+    def handle(self, *args, **options):
+        model, columns = EXPORTS[self.dataset]
+        params = {
+            'date_from': options['date_from'],
+            'date_to': options['date_to'],
+            'course': options['course'],
+        }
+        try:
+            queryset = DATASET_FILTERS[self.dataset](model.objects.all(), params)
+        except ValidationError as e:
+            raise CommandError(e.detail)
+
+        header, rows = export_rows(queryset, columns)
+        chunks = export_chunks(header, rows, options['format'], compress=options['gzip'])
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
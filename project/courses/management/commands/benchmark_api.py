@@ -0,0 +1,220 @@
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from courses.models import Course, CourseVideo, Enrollment, Student
+from users.models import User
+
+BENCH_DOMAIN = 'benchmark.invalid'
+BENCH_PASSWORD = 'benchmark-password'
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test the catalog, course detail, enrolled-courses and profile endpoints under gunicorn '
+        '(WSGI, DRF views) and uvicorn (ASGI, async views) on the same seeded dataset, and report '
+        'throughput and latency percentiles. The token endpoint is left out: its login throttle '
+        'would dominate the numbers. The seeded rows are deleted again when the run ends, even on failure.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servers', default='wsgi,asgi', help='Comma-separated: wsgi, asgi.')
+        parser.add_argument('--workers', type=int, default=1, help='Server worker processes.')
+        parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker (WSGI only).')
+        parser.add_argument('--concurrency', type=int, default=32, help='Simultaneous keep-alive connections.')
+        parser.add_argument('--duration', type=float, default=15.0, help='Seconds measured per server.')
+        parser.add_argument('--warmup', type=float, default=3.0, help='Seconds of unmeasured load first.')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--courses', type=int, default=200)
+        parser.add_argument('--enrollments', type=int, default=40, help='Courses the benchmark student is enrolled in.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        servers = [name.strip() for name in options['servers'].split(',') if name.strip()]
+        commands = {name: self.server_command(name, options) for name in servers}
+        slugs = self.seed(options)
+
+        try:
+            results = []
+            for name in servers:
+                env = dict(os.environ, DJANGO_ASYNC_API_VIEWS='1' if name == 'asgi' else '0')
+                # a file rather than a pipe, so a chatty server can never block on a full pipe buffer
+                log = tempfile.TemporaryFile()
+                process = subprocess.Popen(commands[name], env=env, stdout=subprocess.DEVNULL, stderr=log)
+                try:
+                    self.wait_for_port(options['port'], process, log)
+                    token = self.login(options['port'])
+                    paths = self.paths(slugs, options['seed'])
+                    asyncio.run(self.load(options['port'], token, paths, options['concurrency'], options['warmup']))
+                    timings, errors, elapsed = asyncio.run(
+                        self.load(options['port'], token, paths, options['concurrency'], options['duration'])
+                    )
+                finally:
+                    process.terminate()
+                    process.wait(timeout=30)
+                    log.close()
+                results.append((name, timings, errors, elapsed))
+        finally:
+            self.unseed()
+
+        self.stdout.write(f'{"server":<6} {"requests":>9} {"req/s":>9} {"p50 ms":>8} {"p99 ms":>8} {"errors":>7}')
+        for name, timings, errors, elapsed in results:
+            timings.sort()
+            p50 = timings[len(timings) // 2] if timings else 0
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))] if timings else 0
+            self.stdout.write(
+                f'{name:<6} {len(timings):>9} {len(timings) / elapsed:>9.1f} {p50:>8.2f} {p99:>8.2f} {errors:>7}'
+            )
+
+    def server_command(self, name, options):
+        bind = f'127.0.0.1:{options["port"]}'
+        if name == 'wsgi':
+            if not shutil.which('gunicorn'):
+                raise CommandError('gunicorn is not installed.')
+            return [
+                'gunicorn', 'lewagon_project.wsgi:application', '--bind', bind, '--workers', str(options['workers']),
+                '--threads', str(options['threads']), '--log-level', 'warning',
+            ]
+        if name == 'asgi':
+            if not shutil.which('uvicorn'):
+                raise CommandError('uvicorn is not installed.')
+            return [
+                'uvicorn', 'lewagon_project.asgi:application', '--host', '127.0.0.1', '--port', str(options['port']),
+                '--workers', str(options['workers']), '--log-level', 'warning', '--no-access-log',
+            ]
+        raise CommandError(f'Unknown server {name!r}; use wsgi or asgi.')
+
+    @transaction.atomic
+    def seed(self, options):
+        """(Re)create the benchmark dataset; the same seed always produces the same rows."""
+        rng = random.Random(options['seed'])
+        self.unseed()
+        instructor = User.objects.create_user(
+            f'instructor@{BENCH_DOMAIN}', BENCH_PASSWORD, first_name='Bench', last_name='Instructor', is_instructor=True,
+        )
+        courses = []
+        for number in range(options['courses']):
+            lessons = rng.randint(1, 12)
+            course = Course.objects.create(
+                title=f'Benchmark course {number}', description='Benchmark course. ' * rng.randint(5, 40),
+                duration=rng.randint(1, 80), price=rng.randint(0, 500), instructor=instructor,
+                courseType=rng.choice(['Free', 'Paid']), what_you_will_learn='Benchmarking.',
+                next_video_position=lessons,
+            )
+            CourseVideo.objects.bulk_create(
+                CourseVideo(course=course, position=lesson, title=f'Lesson {lesson}', video_url=f'https://{BENCH_DOMAIN}/{number}/{lesson}.mp4')
+                for lesson in range(lessons)
+            )
+            courses.append(course)
+
+        user = User.objects.create_user(
+            f'student@{BENCH_DOMAIN}', BENCH_PASSWORD, first_name='Bench', last_name='Student', is_student=True,
+        )
+        student = Student.objects.create(user=user, phone='0')
+        enrollments = Enrollment.objects.bulk_create(
+            Enrollment(student=student, course=course, date=date(2025, 1, 1), progress=rng.randint(0, 100))
+            for course in rng.sample(courses, min(options['enrollments'], len(courses)))
+        )
+        self.stdout.write(f'Seeded {len(courses)} courses and {len(enrollments)} enrollments.')
+        return [course.slug for course in courses]
+
+    def unseed(self):
+        """Delete the benchmark users; their courses, videos, student row and enrollments cascade with them."""
+        User.objects.filter(email__endswith=f'@{BENCH_DOMAIN}').delete()
+
+    def paths(self, slugs, seed):
+        rng = random.Random(seed)
+        paths = ['/courses/all/', '/courses/student/enrolled-courses/', '/users/api/profile/']
+        paths += [f'/courses/course/{slug}/' for slug in rng.sample(slugs, min(len(slugs), 20))]
+        rng.shuffle(paths)
+        return paths
+
+    def wait_for_port(self, port, process, log, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                log.seek(0)
+                raise CommandError(f'Server exited: {log.read().decode(errors="replace")}')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f'Server did not start listening on port {port}.')
+
+    def login(self, port):
+        body = json.dumps({'email': f'student@{BENCH_DOMAIN}', 'password': BENCH_PASSWORD}).encode()
+        status, payload, _ = asyncio.run(self.request_once(port, 'POST', '/users/api/token/', body))
+        if status != 200:
+            raise CommandError(f'Could not log in ({status}): {payload[:200]!r}')
+        return json.loads(payload)['access']
+
+    async def request_once(self, port, method, path, body=b''):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            writer.write(
+                f'{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n'
+                f'Content-Length: {len(body)}\r\n\r\n'.encode() + body
+            )
+            return await read_response(reader)
+        finally:
+            writer.close()
+
+    async def load(self, port, token, paths, concurrency, duration):
+        """Keep ``concurrency`` keep-alive connections busy for ``duration`` seconds; returns (ms timings, errors, elapsed)."""
+        timings = []
+        errors = 0
+        deadline = time.perf_counter() + duration
+
+        async def client(offset):
+            nonlocal errors
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            index = offset
+            try:
+                while time.perf_counter() < deadline:
+                    path = paths[index % len(paths)]
+                    index += 1
+                    started = time.perf_counter()
+                    writer.write(
+                        f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Bearer {token}\r\n\r\n'.encode()
+                    )
+                    try:
+                        status, _, keep_alive = await read_response(reader)
+                    except (asyncio.IncompleteReadError, ConnectionError):
+                        status, keep_alive = None, False
+                    else:
+                        timings.append((time.perf_counter() - started) * 1000)
+                    if status != 200:
+                        errors += 1
+                    if not keep_alive:
+                        writer.close()
+                        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            finally:
+                writer.close()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(offset) for offset in range(concurrency)))
+        return timings, errors, time.perf_counter() - started
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response with a Content-Length body; returns (status, body, keep_alive)."""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, body, headers.get('connection', '').lower() != 'close'
@@ -0,0 +1,69 @@
+import itertools
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.search import InvertedIndex, search_course_ids
+
+VOCABULARY = (
+    'python javascript sql docker git github data science machine learning deep neural network '
+    'design ux ui product analytics marketing seo ads cloud aws devops linux web scraping api '
+    'react django flask testing security startup business finance excel dashboard visualization '
+    'genai llm prompt automation nocode mobile ios android kotlin swift rust go java spark kafka'
+).split()
+
+
+class Command(BaseCommand):
+    help = 'Time course search queries and report latency percentiles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=100_000, help='Synthetic courses to index.')
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--vocabulary', type=int, default=5000, help='Distinct words in the synthetic corpus.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--use-db', action='store_true',
+            help='Query the configured database instead of a synthetic in-memory index.',
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        # Zipf-distributed words so term frequencies look like real course copy
+        words = list(VOCABULARY) + [f'term{n}' for n in range(max(options['vocabulary'] - len(VOCABULARY), 0))]
+        cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+
+        def phrase(length):
+            return ' '.join(rng.choices(words, cum_weights=cum_weights, k=length))
+
+        if options['use_db']:
+            search = search_course_ids
+        else:
+            index = InvertedIndex()
+            started = time.perf_counter()
+            for doc_id in range(1, options['courses'] + 1):
+                index.add(doc_id, {
+                    'title': phrase(4),
+                    'description': phrase(40),
+                    'what_you_will_learn': phrase(15),
+                })
+            self.stdout.write(f'Indexed {len(index)} courses in {time.perf_counter() - started:.2f}s')
+            search = index.search
+
+        queries = [phrase(rng.randint(1, 3)) for _ in range(options['queries'])]
+        # the first pass pays for building per-term impact lists, the second is steady state
+        for label in ('cold', 'warm'):
+            timings = []
+            for query in queries:
+                started = time.perf_counter()
+                search(query, options['limit'])
+                timings.append((time.perf_counter() - started) * 1000)
+
+            timings.sort()
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            self.stdout.write(
+                f'{label}: {len(timings)} queries, mean {statistics.mean(timings):.2f} ms, '
+                f'p50 {statistics.median(timings):.2f} ms, p99 {p99:.2f} ms, max {timings[-1]:.2f} ms'
+            )
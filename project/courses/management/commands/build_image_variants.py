@@ -0,0 +1,54 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from courses.images import IMAGE_FIELDS, render_variants, save_variants
+
+
+def _render(source_name):
+    # runs in a worker process: never let one broken upload take the whole batch down
+    try:
+        return source_name, render_variants(source_name), None
+    except Exception as exc:
+        return source_name, None, f'{type(exc).__name__}: {exc}'
+
+
+class Command(BaseCommand):
+    help = 'Render thumbnail/card/hero variants for existing course images and profile pictures.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Number of rendering processes.')
+        parser.add_argument('--model', action='append', choices=sorted(IMAGE_FIELDS), help='Limit to these models.')
+        parser.add_argument('--force', action='store_true', help='Re-render images that already have variants.')
+
+    def handle(self, *args, **options):
+        pending = []
+        for label in options['model'] or IMAGE_FIELDS:
+            model = apps.get_model(label)
+            field = IMAGE_FIELDS[label]
+            rows = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            for pk, name, variants in rows.values_list('pk', field, 'image_variants').iterator():
+                if options['force'] or (variants or {}).get('source') != name:
+                    pending.append((model, pk, name))
+        if not pending:
+            self.stdout.write('All images already have variants.')
+            return
+
+        # forked workers must not inherit open database connections
+        connections.close_all()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            results = pool.map(_render, [name for _, _, name in pending], chunksize=8)
+            for (model, pk, _), (name, variants, error) in zip(pending, results):
+                if error:
+                    failed += 1
+                    self.stderr.write(f'{model._meta.label} {pk} ({name}): {error}')
+                    continue
+                save_variants(model, pk, name, variants)
+                done += 1
+        self.stdout.write(self.style.SUCCESS(f'Rendered variants for {done} images, {failed} failed.'))
+        if failed and not done:
+            raise CommandError('No image could be processed.')
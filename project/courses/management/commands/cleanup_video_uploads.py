@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from courses.uploads import default_expiry, expire_uploads
+
+
+class Command(BaseCommand):
+    help = 'Delete chunked video uploads that have not received data recently, along with their partial files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, help='Age after which an idle upload is abandoned (default: VIDEO_UPLOAD_EXPIRY).')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted.')
+
+    def handle(self, *args, **options):
+        older_than = now() - timedelta(hours=options['hours']) if options['hours'] is not None else default_expiry()
+        sessions, files = expire_uploads(older_than, dry_run=options['dry_run'])
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {sessions} abandoned uploads and {files} stray partial files.'))
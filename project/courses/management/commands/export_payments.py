@@ -0,0 +1,6 @@
+from ._export import BaseExportCommand
+
+
+class Command(BaseExportCommand):
+    help = 'Stream all payments as CSV or NDJSON in constant memory.'
+    dataset = 'payments'
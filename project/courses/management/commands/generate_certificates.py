@@ -0,0 +1,51 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+
+from courses.certificates import certificate_payload, store_certificates, write_certificate
+from courses.models import Enrollment
+
+
+class Command(BaseCommand):
+    help = 'Pre-render the PDF certificate of every completed enrollment, in parallel worker processes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Number of rendering processes.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Enrollments handed to the pool at a time.')
+
+    def handle(self, *args, **options):
+        rows = (
+            Enrollment.objects.filter(Q(status='Completed') | Q(progress__gte=100))
+            .values_list('id', 'student__user__first_name', 'student__user__last_name', 'course__title', 'date')
+            .order_by('id')
+            .iterator(chunk_size=options['batch_size'])
+        )
+        batch_size = options['batch_size']
+        rendered = total = 0
+        # workers only get plain dicts and touch the filesystem; all database work stays in this process.
+        # They must not inherit open database connections either, and the pool forks lazily on the
+        # first submit, so start it before iterating ``rows`` opens a cursor.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            pool.submit(int).result()
+            batch = []
+            for row in rows:
+                batch.append(certificate_payload(*row))
+                if len(batch) == batch_size:
+                    rendered += self.render(pool, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                rendered += self.render(pool, batch)
+                total += len(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {total} completed enrollments, rendered {rendered} new certificates.'
+        ))
+
+    def render(self, pool, payloads):
+        created = sum(new for _, new in pool.map(write_certificate, payloads, chunksize=16))
+        store_certificates(payloads)
+        return created
@@ -0,0 +1,47 @@
+import csv
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from courses.fx import invalidate_rate_table
+from courses.models import ExchangeRate
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Load exchange rates from a CSV with "date,currency,rate" columns, where rate is the amount of '
+        'FX_BASE_CURRENCY for one unit of currency. Existing (currency, date) rows are overwritten.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+
+    def handle(self, *args, **options):
+        loaded = 0
+        batch = []
+        with open(options['path'], newline='') as source:
+            for line, row in enumerate(csv.DictReader(source), start=2):
+                try:
+                    effective_date = parse_date(row['date'].strip())
+                    rate = Decimal(row['rate'].strip())
+                    currency = row['currency'].strip().upper()
+                except (KeyError, AttributeError, ValueError, InvalidOperation):
+                    effective_date = None
+                if effective_date is None or len(currency) != 3 or rate <= 0:
+                    raise CommandError(f'Line {line}: expected "date,currency,rate" with a YYYY-MM-DD date and positive rate.')
+                batch.append(ExchangeRate(currency=currency, effective_date=effective_date, rate=rate))
+                if len(batch) >= BATCH_SIZE:
+                    loaded += self.save(batch)
+                    batch = []
+        loaded += self.save(batch)
+        invalidate_rate_table()
+        self.stdout.write(self.style.SUCCESS(f'Loaded {loaded} exchange rates.'))
+
+    def save(self, batch):
+        ExchangeRate.objects.bulk_create(
+            batch, update_conflicts=True, unique_fields=['currency', 'effective_date'], update_fields=['rate', 'updated_at'],
+        )
+        return len(batch)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from courses.stats import rebuild_course_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized CourseStats table and reconcile any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing.')
+
+    def handle(self, *args, **options):
+        checked, created, fixed = rebuild_course_stats(options['batch_size'], options['dry_run'])
+        verb = 'would be' if options['dry_run'] else 'were'
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} courses: {created} missing stats rows {verb} created, {fixed} drifted rows {verb} fixed.'
+        ))
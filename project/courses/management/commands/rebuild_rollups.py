@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from courses.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily revenue and enrollment rollup tables from scratch (or from --since onwards).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Only rebuild days on or after this date (YYYY-MM-DD).')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_date(options['since'])
+            if since is None:
+                raise CommandError('--since must use the YYYY-MM-DD format.')
+        revenue_rows, enrollment_rows = rebuild_rollups(since)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {revenue_rows} daily revenue rows and {enrollment_rows} daily enrollment rows.'
+        ))
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+
+# PostgreSQL keeps the weighted tsvector up to date itself through a stored generated column;
+# other databases fall back to the in-process index in courses/search.py.
+CREATE_SEARCH_VECTOR = """
+    ALTER TABLE courses_course ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(what_you_will_learn, '')), 'C')
+    ) STORED;
+    CREATE INDEX courses_course_search_vector_gin ON courses_course USING GIN (search_vector);
+"""
+
+DROP_SEARCH_VECTOR = """
+    DROP INDEX IF EXISTS courses_course_search_vector_gin;
+    ALTER TABLE courses_course DROP COLUMN IF EXISTS search_vector;
+"""
+
+
+def add_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_SEARCH_VECTOR)
+
+
+def remove_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SEARCH_VECTOR)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_enrollment_progress_enrollment_status_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_vector, remove_search_vector),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_course_stats(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    CourseStats = apps.get_model('courses', 'CourseStats')
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    Review = apps.get_model('courses', 'Review')
+
+    students = dict(Enrollment.objects.values('course_id').annotate(n=Count('id')).values_list('course_id', 'n'))
+    reviews = {
+        row['course_id']: (row['n'], row['total'])
+        for row in Review.objects.values('course_id').annotate(n=Count('id'), total=Sum('rating'))
+    }
+    CourseStats.objects.bulk_create(
+        (
+            CourseStats(
+                course_id=course_id,
+                students_count=students.get(course_id, 0),
+                review_count=reviews.get(course_id, (0, 0))[0],
+                rating_sum=reviews.get(course_id, (0, 0))[1] or 0,
+            )
+            for course_id in Course.objects.values_list('id', flat=True).iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_course_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseStats',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='courses.course')),
+                ('students_count', models.PositiveIntegerField(default=0)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_course_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_coursestats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['-created_at'], name='course_created_at_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:30
+
+from django.db import migrations, models
+
+
+def number_videos(apps, schema_editor):
+    CourseVideo = apps.get_model('courses', 'CourseVideo')
+    updated, course_id, position = [], None, 0
+    for video in CourseVideo.objects.order_by('course_id', 'id').only('id', 'course_id').iterator():
+        if video.course_id != course_id:
+            course_id, position = video.course_id, 0
+        video.position = position
+        position += 1
+        updated.append(video)
+        if len(updated) >= 1000:
+            CourseVideo.objects.bulk_update(updated, ['position'])
+            updated = []
+    CourseVideo.objects.bulk_update(updated, ['position'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_course_created_at_course_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursevideo',
+            name='position',
+            field=models.PositiveIntegerField(default=0, editable=False),
+            preserve_default=False,
+        ),
+        migrations.RunPython(number_videos, migrations.RunPython.noop),
+        migrations.AlterModelOptions(
+            name='coursevideo',
+            options={'ordering': ['position']},
+        ),
+        migrations.AddConstraint(
+            model_name='coursevideo',
+            constraint=models.UniqueConstraint(fields=('course', 'position'), name='unique_video_position_per_course'),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_videos',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['student', 'course'], name='enrollment_student_course_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_video_position_enrollment_completed_videos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyEnrollments',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('enrollments_count', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_enrollments', to='courses.course')),
+                ('instructor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_enrollments', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['instructor', 'day'], name='daily_enrollments_instr_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'course'), name='unique_daily_enrollments')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('currency', models.CharField(max_length=3)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('payments_count', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_revenue', to='courses.course')),
+                ('instructor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_revenue', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['instructor', 'day'], name='daily_revenue_instructor_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'course', 'currency'), name='unique_daily_revenue')],
+            },
+        ),
+    ]
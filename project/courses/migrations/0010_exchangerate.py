@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_revenue_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=3)),
+                ('effective_date', models.DateField()),
+                ('rate', models.DecimalField(decimal_places=8, max_digits=18)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('currency', 'effective_date'), name='unique_rate_per_day')],
+            },
+        ),
+    ]
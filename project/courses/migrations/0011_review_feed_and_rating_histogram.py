@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:08
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_rating_histogram(apps, schema_editor):
+    CourseStats = apps.get_model('courses', 'CourseStats')
+    Review = apps.get_model('courses', 'Review')
+    for rating in range(1, 6):
+        counts = Review.objects.filter(rating=rating).values('course_id').annotate(n=Count('id')).values_list('course_id', 'n')
+        for course_id, n in counts.iterator():
+            CourseStats.objects.filter(course_id=course_id).update(**{f'rating_{rating}_count': n})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0010_exchangerate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursestats',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='coursestats',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='coursestats',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='coursestats',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='coursestats',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='rating',
+            field=models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)]),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['course', '-date', '-id'], name='review_course_date_idx'),
+        ),
+        migrations.RunPython(populate_rating_histogram, migrations.RunPython.noop),
+    ]
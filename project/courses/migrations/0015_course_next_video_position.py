@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:39
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def seed_next_video_position(apps, schema_editor):
+    # continue after the highest position in use; positions freed before this migration can't be told apart
+    Course = apps.get_model('courses', 'Course')
+    CourseVideo = apps.get_model('courses', 'CourseVideo')
+    Course.objects.update(next_video_position=Coalesce(models.Subquery(
+        CourseVideo.objects.filter(course_id=models.OuterRef('pk'))
+        .values('course_id').annotate(next=models.Max('position') + 1).values('next')[:1]
+    ), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0014_videoupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='next_video_position',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(seed_next_video_position, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0015_course_next_video_position'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='videoupload',
+            name='lease',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='videoupload',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
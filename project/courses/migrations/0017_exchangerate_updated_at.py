@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0016_videoupload_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exchangerate',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
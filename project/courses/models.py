@@ -1,4 +1,7 @@
-from django.db import models
+import uuid
+
+from django.db import models, transaction
+from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.text import slugify
 from users.models import User
 
@@ -6,6 +9,7 @@ class Student(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='student_profile',null=True, blank=True)
     phone = models.CharField(max_length=15)
     profile_pic = models.ImageField(upload_to='profiles/%Y/%m/%d', null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return self.user.username
@@ -15,6 +19,7 @@ class Instructor(models.Model):
     email = models.EmailField(unique=True)
     phone = models.CharField(max_length=15)
     profile_pic = models.ImageField(upload_to='instructors/%Y/%m/%d', null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     bio = models.TextField()
 
     def __str__(self):
@@ -27,9 +32,18 @@ class Course(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     instructor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='courses')
     courseImage = models.ImageField(upload_to='courses/%Y/%m/%d', null=True, blank=True)
+    # resized copies of courseImage, see courses.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     courseType = models.CharField(max_length=50, choices=[('Free', 'Free'), ('Paid', 'Paid')])
     what_you_will_learn = models.TextField()
     slug = models.SlugField(blank=True, null=True)
+    # next CourseVideo.position to hand out; only ever grows, so a deleted video's bit is never reused
+    next_video_position = models.PositiveIntegerField(default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['-created_at'], name='course_created_at_idx')]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -43,16 +57,67 @@ class CourseVideo(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='videos')
     title = models.CharField(max_length=255)
     video_url = models.URLField()
+    # stable ordinal within the course; it is the bit index in Enrollment.completed_videos
+    position = models.PositiveIntegerField(editable=False)
+
+    class Meta:
+        ordering = ['position']
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'position'], name='unique_video_position_per_course'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.position is not None:
+            return super(CourseVideo, self).save(*args, **kwargs)
+        with transaction.atomic():
+            # the row lock serializes concurrent uploads to the same course
+            self.position = (
+                Course.objects.select_for_update().values_list('next_video_position', flat=True).get(pk=self.course_id)
+            )
+            Course.objects.filter(pk=self.course_id).update(next_video_position=models.F('next_video_position') + 1)
+            super(CourseVideo, self).save(*args, **kwargs)
 
     def __str__(self):
         return f"Video: {self.title} ({self.course.title})"
 
+class VideoUpload(models.Model):
+    """A resumable chunked upload; the bytes live in a partial file until the upload completes."""
+    STATUS_CHOICES = [('Active', 'Active'), ('Completed', 'Completed')]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='video_uploads')
+    instructor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='video_uploads')
+    title = models.CharField(max_length=255)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    # bytes durably written so far, which is where the client resumes
+    offset = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Active')
+    # held by the request currently writing a chunk or completing the upload; no row lock is kept meanwhile
+    lease = models.UUIDField(null=True, blank=True, editable=False)
+    lease_expires_at = models.DateTimeField(null=True, blank=True, editable=False)
+    video = models.OneToOneField(CourseVideo, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'updated_at'], name='video_upload_status_idx')]
+
+    def __str__(self):
+        return f"Upload of {self.filename} ({self.offset}/{self.size} bytes)"
+
 class Enrollment(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     date = models.DateField()
     progress = models.FloatField(default=0.0)
     status = models.CharField(max_length=20, choices=[('Enrolled', 'Enrolled'), ('Completed', 'Completed')], default='Enrolled')
+    # bitset of watched videos, bit n set when the video with position n is complete (little-endian)
+    completed_videos = models.BinaryField(default=b'')
+
+    class Meta:
+        indexes = [models.Index(fields=['student', 'course'], name='enrollment_student_course_idx')]
 
     def __str__(self):
         return f"{self.student.user.username} enrolled in {self.course.title}"
@@ -61,11 +126,12 @@ class Review(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='reviews')
     date = models.DateField()
-    rating = models.IntegerField()
+    rating = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
     comment = models.TextField()
     
     class Meta:
         unique_together = ['student', 'course']
+        indexes = [models.Index(fields=['course', '-date', '-id'], name='review_course_date_idx')]
 
     def __str__(self):
         return f"{self.student.user.username} reviewed {self.course.title}"
@@ -77,4 +143,85 @@ class Payment(models.Model):
     currency = models.CharField(max_length=3, default='USD')
 
     def __str__(self):
-        return f"Payment of ${self.price} USD for {self.enrollment.course.title}"
+        return f"Payment of {self.price} {self.currency} for {self.enrollment.course.title}"
+
+class ExchangeRate(models.Model):
+    currency = models.CharField(max_length=3)
+    effective_date = models.DateField()
+    # units of settings.FX_BASE_CURRENCY for one unit of `currency`, valid from effective_date on
+    rate = models.DecimalField(max_digits=18, decimal_places=8)
+    # with the row count, tells every process when its cached rate table is stale (see fx.get_rate_table)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['currency', 'effective_date'], name='unique_rate_per_day'),
+        ]
+
+    def __str__(self):
+        return f"1 {self.currency} = {self.rate} on {self.effective_date}"
+
+class Certificate(models.Model):
+    enrollment = models.OneToOneField(Enrollment, on_delete=models.CASCADE, related_name='certificate')
+    # sha256 of what is printed on the PDF; doubles as the public verification code and the file name
+    digest = models.CharField(max_length=64, unique=True)
+    issued_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Certificate {self.digest[:12]} for {self.enrollment}"
+
+class CourseStats(models.Model):
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    students_count = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+
+    @property
+    def rating_histogram(self):
+        return {str(stars): getattr(self, f'rating_{stars}_count') for stars in range(1, 6)}
+
+    @property
+    def rating_average(self):
+        if not self.review_count:
+            return None
+        return round(self.rating_sum / self.review_count, 2)
+
+    def __str__(self):
+        return f"Stats for {self.course.title}"
+
+class DailyRevenue(models.Model):
+    day = models.DateField()
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_revenue')
+    instructor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_revenue')
+    currency = models.CharField(max_length=3)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    payments_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'course', 'currency'], name='unique_daily_revenue'),
+        ]
+        indexes = [models.Index(fields=['instructor', 'day'], name='daily_revenue_instructor_idx')]
+
+    def __str__(self):
+        return f"{self.day} {self.course.title}: {self.revenue} {self.currency}"
+
+class DailyEnrollments(models.Model):
+    day = models.DateField()
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_enrollments')
+    instructor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_enrollments')
+    enrollments_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'course'], name='unique_daily_enrollments'),
+        ]
+        indexes = [models.Index(fields=['instructor', 'day'], name='daily_enrollments_instr_idx')]
+
+    def __str__(self):
+        return f"{self.day} {self.course.title}: {self.enrollments_count} enrollments"
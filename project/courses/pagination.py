@@ -0,0 +1,171 @@
+import json
+from urllib.parse import urlencode
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class CourseCursorPagination(CursorPagination):
+    # keyset pagination on the primary key: stable, index-backed and cheap at any depth
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-id'
+
+    def canonical_url(self, request):
+        """This page's absolute URL with only the cursor and a clamped, non-default page size.
+
+        Catalog pages are cached by this URL and their next/previous links are built from it, so
+        other query parameters neither split the cache nor leak into pages served to other clients.
+        """
+        params = {}
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            params[self.cursor_query_param] = cursor
+        page_size = self.get_page_size(request)
+        if page_size != type(self).page_size:
+            params[self.page_size_query_param] = page_size
+        url = request.build_absolute_uri(request.path)
+        return f'{url}?{urlencode(params)}' if params else url
+
+    def paginate_queryset(self, queryset, request, view=None):
+        base_url = self.canonical_url(request)
+        page = super().paginate_queryset(queryset, request, view)
+        self.base_url = base_url
+        return page
+
+
+class RosterCursorPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = '-id'
+
+
+class EnrollmentCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-id'
+
+
+class RecordCursorPagination(CursorPagination):
+    # admin/student ledgers such as payments and reviews, newest first
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = '-id'
+
+
+class KeysetCursorPagination(CursorPagination):
+    """Cursor pagination over a composite ordering whose last field is unique, such as ``('-date', '-id')``.
+
+    DRF's ``CursorPagination`` keys on the first ordering field only and falls back to OFFSET within a
+    run of equal values. This puts every ordering field in the cursor and filters with a row
+    comparison instead, so each page is a plain range scan on a matching index however many rows tie.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        position = self.decode_position(queryset.model, self.cursor.position) if self.cursor else None
+
+        # walking backwards flips every direction; the page is flipped back below
+        ordering = [field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering] if reverse else list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def after(self, ordering, position):
+        """``(f1, f2, ...) > (v1, v2, ...)`` in the given directions, spelled out for the ORM."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def encode_position(self, instance):
+        return json.dumps([str(getattr(instance, field.lstrip('-'))) for field in self.ordering])
+
+    def decode_position(self, model, position):
+        try:
+            values = json.loads(position)
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return [model._meta.get_field(field.lstrip('-')).to_python(value) for field, value in zip(self.ordering, values)]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not (self.has_next and self.page):
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self.encode_position(self.page[-1])))
+
+    def get_previous_link(self):
+        if not (self.has_previous and self.page):
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self.encode_position(self.page[0])))
+
+
+class ReviewFeedCursorPagination(KeysetCursorPagination):
+    # a keyset over the (course, -date, -id) index on Review
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-date', '-id')
+
+
+async def apaginate(paginator, queryset, request):
+    """Async counterpart of ``CursorPagination.paginate_queryset`` + ``get_paginated_response``.
+
+    Supports the single-column orderings used above (``-id``), where every position is unique, and
+    produces the same cursors, so links from sync and async views are interchangeable. ``request``
+    is a DRF ``Request``. Returns ``(objects, {'next': ..., 'previous': ...})``.
+    """
+    ordering = paginator.ordering if isinstance(paginator.ordering, str) else paginator.ordering[0]
+    field = ordering.lstrip('-')
+    canonical_url = getattr(paginator, 'canonical_url', None)
+    paginator.base_url = canonical_url(request) if canonical_url else request.build_absolute_uri()
+    page_size = paginator.get_page_size(request)
+    cursor = paginator.decode_cursor(request)
+    reverse = bool(cursor and cursor.reverse)
+    position = cursor.position if cursor else None
+
+    # walking backwards flips the ordering; results are flipped back below
+    descending = ordering.startswith('-') != reverse
+    queryset = queryset.order_by(f'-{field}' if descending else field)
+    if position is not None:
+        queryset = queryset.filter(**{f'{field}__lt' if descending else f'{field}__gt': position})
+    objects = [obj async for obj in queryset[:page_size + 1]]
+    has_more = len(objects) > page_size
+    objects = objects[:page_size]
+    if reverse:
+        objects.reverse()
+    has_next, has_previous = (position is not None, has_more) if reverse else (has_more, position is not None)
+
+    links = {'next': None, 'previous': None}
+    if objects and has_next:
+        links['next'] = paginator.encode_cursor(Cursor(offset=0, reverse=False, position=str(getattr(objects[-1], field))))
+    if objects and has_previous:
+        links['previous'] = paginator.encode_cursor(Cursor(offset=0, reverse=True, position=str(getattr(objects[0], field))))
+    return objects, links
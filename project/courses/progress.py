@@ -0,0 +1,195 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DataError, connections, transaction
+from django.db.models import Case, Exists, F, FloatField, OuterRef, Q, Value, When
+
+from .models import CourseVideo, Enrollment
+
+logger = logging.getLogger(__name__)
+
+UPDATE_CHUNK_SIZE = 500
+# failures caused by the values themselves; anything else (connection loss...) is retried on the next flush
+DATA_ERRORS = (DataError, TypeError, ValueError)
+
+
+def apply_progress_updates(updates):
+    """Raise progress for many enrollments with one conditional UPDATE per chunk.
+
+    ``updates`` maps ``(student_id, course_id)`` to the new progress. Rows whose stored progress
+    is already greater or equal are left untouched, so stale or repeated heartbeats cost no writes.
+    Courses with videos are skipped too: their progress is computed from the completion bitset
+    (see ``_store_completion``), which is the only writer for them; the views report those as
+    ignored. Returns the number of rows changed.
+    """
+    items = list(updates.items())
+    changed = 0
+    for start in range(0, len(items), UPDATE_CHUNK_SIZE):
+        conditions = Q()
+        whens = []
+        for (student_id, course_id), progress in items[start:start + UPDATE_CHUNK_SIZE]:
+            conditions |= Q(student_id=student_id, course_id=course_id, progress__lt=progress)
+            whens.append(When(student_id=student_id, course_id=course_id, then=Value(progress)))
+        changed += Enrollment.objects.filter(conditions).exclude(tracks_videos()).update(
+            progress=Case(*whens, default=F('progress'), output_field=FloatField())
+        )
+    return changed
+
+
+class ProgressBuffer:
+    """Write-behind buffer that keeps the highest progress per enrollment and flushes periodically.
+
+    Heartbeats held in memory are lost if the process dies before the next flush, which is why
+    this is opt-in (``PROGRESS_WRITE_BEHIND``).
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def record(self, student_id, course_id, progress):
+        with self.lock:
+            key = (student_id, course_id)
+            if progress > self.pending.get(key, -1.0):
+                self.pending[key] = progress
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='progress-flush', daemon=True)
+                self.thread.start()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return 0
+        try:
+            return apply_progress_updates(pending)
+        except DATA_ERRORS:
+            # one bad row must not hold back everyone else's progress: retry row by row below
+            pass
+        except Exception:
+            self._requeue(pending)
+            raise
+        changed = 0
+        items = list(pending.items())
+        for index, (key, progress) in enumerate(items):
+            try:
+                changed += apply_progress_updates({key: progress})
+            except DATA_ERRORS:
+                logger.exception('Dropping buffered progress %r for enrollment %r', progress, key)
+            except Exception:
+                self._requeue(dict(items[index:]))
+                raise
+        return changed
+
+    def _requeue(self, updates):
+        # put rows back (keeping the max) so the next tick retries them
+        with self.lock:
+            for key, progress in updates.items():
+                if progress > self.pending.get(key, -1.0):
+                    self.pending[key] = progress
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Flushing buffered progress failed; will retry')
+            finally:
+                connections.close_all()
+
+    def stop(self):
+        self.stopped.set()
+        self.flush()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_progress_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = ProgressBuffer(getattr(settings, 'PROGRESS_FLUSH_INTERVAL', 5))
+                atexit.register(_buffer.stop)
+    return _buffer
+
+
+def tracks_videos():
+    """``Exists`` expression: the outer row's course has videos, so the completion bitset owns its progress."""
+    return Exists(CourseVideo.objects.filter(course_id=OuterRef('course_id')))
+
+
+def video_tracked_courses(course_ids):
+    return set(CourseVideo.objects.filter(course_id__in=course_ids).values_list('course_id', flat=True).distinct())
+
+
+def record_progress(student_id, updates):
+    """Store ``{course_id: progress}`` for a student, either buffered or straight to the database.
+
+    Returns the number of rows changed, or ``None`` when the write was deferred to the buffer.
+    """
+    if getattr(settings, 'PROGRESS_WRITE_BEHIND', False):
+        buffer = get_progress_buffer()
+        for course_id, progress in updates.items():
+            buffer.record(student_id, course_id, progress)
+        return None
+    return apply_progress_updates({(student_id, course_id): progress for course_id, progress in updates.items()})
+
+
+def bits_from_bytes(data):
+    return int.from_bytes(bytes(data or b''), 'little')
+
+
+def bits_to_bytes(bits):
+    return bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+
+
+def video_positions(course_id):
+    return dict(CourseVideo.objects.filter(course_id=course_id).values_list('id', 'position'))
+
+
+def completed_video_ids(enrollment, positions):
+    bits = bits_from_bytes(enrollment.completed_videos)
+    return sorted(video_id for video_id, position in positions.items() if bits >> position & 1)
+
+
+def _store_completion(enrollment, bits, positions):
+    mask = sum(1 << position for position in positions.values())
+    done = (bits & mask).bit_count()
+    enrollment.completed_videos = bits_to_bytes(bits)
+    enrollment.progress = round(done * 100 / len(positions), 2) if positions else 0.0
+    enrollment.status = 'Completed' if positions and done == len(positions) else 'Enrolled'
+    enrollment.save(update_fields=['completed_videos', 'progress', 'status'])
+    return enrollment
+
+
+@transaction.atomic
+def mark_videos_completed(student_id, course_id, video_ids):
+    """Set the completion bits for ``video_ids`` and recompute progress/status from the bitset.
+
+    Raises ``Enrollment.DoesNotExist`` when the student is not enrolled and ``ValueError`` when a
+    video does not belong to the course.
+    """
+    enrollment = Enrollment.objects.select_for_update().get(student_id=student_id, course_id=course_id)
+    positions = video_positions(course_id)
+    unknown = set(video_ids) - positions.keys()
+    if unknown:
+        raise ValueError(f"Videos {sorted(unknown)} do not belong to this course.")
+    bits = bits_from_bytes(enrollment.completed_videos)
+    for video_id in video_ids:
+        bits |= 1 << positions[video_id]
+    return _store_completion(enrollment, bits, positions), positions
+
+
+@transaction.atomic
+def recompute_progress(student_id, course_id):
+    enrollment = Enrollment.objects.select_for_update().get(student_id=student_id, course_id=course_id)
+    positions = video_positions(course_id)
+    return _store_completion(enrollment, bits_from_bytes(enrollment.completed_videos), positions), positions
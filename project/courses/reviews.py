@@ -0,0 +1,101 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models.signals import post_save
+
+from .cache import bump_catalog_version
+from .models import Enrollment, Review
+from . import stats
+
+BULK_CHUNK_SIZE = 500
+# rows accepted by one import request; larger files must be split by the client
+BULK_IMPORT_MAX_ROWS = 5000
+
+REVIEW_TABLE = Review._meta.db_table
+ENROLLMENT_TABLE = Enrollment._meta.db_table
+
+INSERT_IF_ENROLLED_SQL = f"""
+    INSERT INTO {REVIEW_TABLE} (student_id, course_id, date, rating, comment)
+    SELECT %s, %s, %s, %s, %s
+    WHERE EXISTS (SELECT 1 FROM {ENROLLMENT_TABLE} WHERE student_id = %s AND course_id = %s)
+"""
+
+BULK_INSERT_IF_ENROLLED_SQL = """
+    INSERT INTO {review} (student_id, course_id, date, rating, comment)
+    SELECT v.student_id, v.course_id, v.date, v.rating, v.comment
+    FROM ({rows}) AS v
+    WHERE EXISTS (SELECT 1 FROM {enrollment} e WHERE e.student_id = v.student_id AND e.course_id = v.course_id)
+    ON CONFLICT (student_id, course_id) DO NOTHING
+    RETURNING id, student_id, course_id, rating
+"""
+
+ROW_SQL = 'SELECT %s AS student_id, %s AS course_id, %s AS date, %s AS rating, %s AS comment'
+
+
+class NotEnrolled(Exception):
+    pass
+
+
+class AlreadyReviewed(Exception):
+    pass
+
+
+def insert_review(student_id, course_id, date, rating, comment):
+    """Create a review in one round-trip, only if the student is enrolled in the course.
+
+    The enrollment check and the insert are a single ``INSERT ... SELECT ... WHERE EXISTS``; the
+    ``(student, course)`` unique constraint rejects duplicates. Raises ``NotEnrolled`` or
+    ``AlreadyReviewed``.
+    """
+    params = [student_id, course_id, date, rating, comment, student_id, course_id]
+    returning = connection.features.can_return_columns_from_insert
+    sql = f'{INSERT_IF_ENROLLED_SQL} RETURNING id' if returning else INSERT_IF_ENROLLED_SQL
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            if returning:
+                row = cursor.fetchone()
+                review_id = row[0] if row else None
+            elif cursor.rowcount:
+                review_id = Review.objects.filter(student_id=student_id, course_id=course_id).values_list('id', flat=True).get()
+            else:
+                review_id = None
+    except IntegrityError:
+        raise AlreadyReviewed
+    if review_id is None:
+        raise NotEnrolled
+    review = Review(id=review_id, student_id=student_id, course_id=course_id, date=date, rating=rating, comment=comment)
+    review._state.adding = False
+    review._state.db = connection.alias
+    # raw SQL skips the ORM, so let the stats/cache receivers know about the new row
+    post_save.send(sender=Review, instance=review, created=True, raw=False, using=connection.alias, update_fields=None)
+    return review
+
+
+def bulk_insert_reviews(rows):
+    """Insert many ``(student_id, course_id, date, rating, comment)`` rows, one statement per chunk.
+
+    Rows for students who are not enrolled, or who already reviewed the course, are skipped.
+    Course stats are updated once per course instead of once per review, so no per-row
+    ``post_save`` is sent. Returns the ids of the reviews created.
+    """
+    created = []
+    per_course = defaultdict(list)
+    with transaction.atomic():
+        for start in range(0, len(rows), BULK_CHUNK_SIZE):
+            chunk = rows[start:start + BULK_CHUNK_SIZE]
+            sql = BULK_INSERT_IF_ENROLLED_SQL.format(
+                review=REVIEW_TABLE,
+                enrollment=ENROLLMENT_TABLE,
+                rows=' UNION ALL '.join([ROW_SQL] * len(chunk)),
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [value for row in chunk for value in row])
+                for review_id, _, course_id, rating in cursor.fetchall():
+                    per_course[course_id].append(rating)
+                    created.append(review_id)
+        for course_id, ratings in per_course.items():
+            stats.reviews_added(course_id, ratings)
+    if created:
+        bump_catalog_version()
+    return created
@@ -0,0 +1,215 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+
+from .models import Course, DailyEnrollments, DailyRevenue, Enrollment, Payment
+
+INTERVALS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def _upsert(model, lookup, deltas):
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # another request created the row between our UPDATE and INSERT
+        model.objects.filter(**lookup).update(**updates)
+
+
+def _decrement(model, lookup, deltas):
+    model.objects.filter(**lookup).update(**{field: F(field) - delta for field, delta in deltas.items()})
+
+
+# fields whose change moves a row to another rollup key or amount
+PAYMENT_ROLLUP_FIELDS = {'enrollment', 'enrollment_id', 'date', 'currency', 'price'}
+ENROLLMENT_ROLLUP_FIELDS = {'course', 'course_id', 'date'}
+
+
+def _cached(instance, field_name):
+    """The related object already loaded on ``instance``, or None; never queries."""
+    return instance._meta.get_field(field_name).get_cached_value(instance, None)
+
+
+def _payment_owner(payment):
+    enrollment = _cached(payment, 'enrollment')
+    course = _cached(enrollment, 'course') if enrollment is not None else None
+    if course is not None:
+        return course.pk, course.instructor_id
+    return Enrollment.objects.filter(pk=payment.enrollment_id).values_list('course_id', 'course__instructor_id').first()
+
+
+def _payment_key(payment, owner=None):
+    owner = owner or _payment_owner(payment)
+    if owner is None:
+        return None
+    course_id, instructor_id = owner
+    return {'day': payment.date, 'course_id': course_id, 'instructor_id': instructor_id, 'currency': payment.currency}
+
+
+def payment_added(payment):
+    key = _payment_key(payment)
+    if key:
+        _upsert(DailyRevenue, key, {'revenue': payment.price, 'payments_count': 1})
+
+
+def payment_removed(payment):
+    key = _payment_key(payment)
+    if key:
+        _decrement(DailyRevenue, key, {'revenue': payment.price, 'payments_count': 1})
+
+
+def payment_snapshot(payment):
+    """The stored row's rollup inputs, read in ``pre_save`` so ``payment_changed`` can move the totals."""
+    return Payment.objects.filter(pk=payment.pk).values(
+        'enrollment_id', 'date', 'currency', 'price',
+        course_id=F('enrollment__course_id'), instructor_id=F('enrollment__course__instructor_id'),
+    ).first()
+
+
+def payment_changed(payment, previous):
+    owner = (previous['course_id'], previous['instructor_id'])
+    old_key = {
+        'day': previous['date'], 'course_id': owner[0], 'instructor_id': owner[1], 'currency': previous['currency'],
+    }
+    new_key = _payment_key(payment, owner if payment.enrollment_id == previous['enrollment_id'] else None)
+    if new_key == old_key and payment.price == previous['price']:
+        return
+    _decrement(DailyRevenue, old_key, {'revenue': previous['price'], 'payments_count': 1})
+    if new_key:
+        _upsert(DailyRevenue, new_key, {'revenue': payment.price, 'payments_count': 1})
+
+
+def _enrollment_key(enrollment, instructor_id=None):
+    if instructor_id is None:
+        course = _cached(enrollment, 'course')
+        if course is not None:
+            instructor_id = course.instructor_id
+        else:
+            instructor_id = Course.objects.filter(pk=enrollment.course_id).values_list('instructor_id', flat=True).first()
+    if instructor_id is None:
+        return None
+    return {'day': enrollment.date, 'course_id': enrollment.course_id, 'instructor_id': instructor_id}
+
+
+def enrollment_added(enrollment):
+    key = _enrollment_key(enrollment)
+    if key:
+        _upsert(DailyEnrollments, key, {'enrollments_count': 1})
+
+
+def enrollment_removed(enrollment):
+    key = _enrollment_key(enrollment)
+    if key:
+        _decrement(DailyEnrollments, key, {'enrollments_count': 1})
+
+
+def enrollment_snapshot(enrollment):
+    return Enrollment.objects.filter(pk=enrollment.pk).values(
+        'course_id', 'date', instructor_id=F('course__instructor_id'),
+    ).first()
+
+
+def enrollment_changed(enrollment, previous):
+    old_key = {'day': previous['date'], 'course_id': previous['course_id'], 'instructor_id': previous['instructor_id']}
+    same_course = enrollment.course_id == previous['course_id']
+    new_key = _enrollment_key(enrollment, previous['instructor_id'] if same_course else None)
+    if new_key == old_key:
+        return
+    _decrement(DailyEnrollments, old_key, {'enrollments_count': 1})
+    if new_key:
+        _upsert(DailyEnrollments, new_key, {'enrollments_count': 1})
+    if not same_course:
+        _move_enrollment_revenue(enrollment, previous, new_key)
+
+
+def _move_enrollment_revenue(enrollment, previous, new_key):
+    """Revenue rollups are keyed by course, so an enrollment moved to another course takes its payments with it."""
+    totals = Payment.objects.filter(enrollment_id=enrollment.pk).values('date', 'currency').annotate(
+        total=Sum('price'), n=Count('id'),
+    ).order_by()
+    for row in totals:
+        deltas = {'revenue': row['total'], 'payments_count': row['n']}
+        _decrement(DailyRevenue, {
+            'day': row['date'], 'course_id': previous['course_id'], 'instructor_id': previous['instructor_id'],
+            'currency': row['currency'],
+        }, deltas)
+        if new_key:
+            _upsert(DailyRevenue, {
+                'day': row['date'], 'course_id': new_key['course_id'], 'instructor_id': new_key['instructor_id'],
+                'currency': row['currency'],
+            }, deltas)
+
+
+def _replace(model, rows, build, date_from=None):
+    existing = model.objects.all()
+    if date_from:
+        existing = existing.filter(day__gte=date_from)
+    existing.delete()
+    batch, created = [], 0
+    for row in rows.iterator(chunk_size=REBUILD_BATCH_SIZE):
+        batch.append(build(row))
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+    model.objects.bulk_create(batch)
+    return created + len(batch)
+
+
+@transaction.atomic
+def rebuild_rollups(date_from=None):
+    """Recompute the daily rollups from ``Payment``/``Enrollment`` with two GROUP BY scans.
+
+    With ``date_from`` only days on or after it are replaced. Returns ``(revenue_rows, enrollment_rows)``.
+    """
+    payments = Payment.objects.all()
+    enrollments = Enrollment.objects.all()
+    if date_from:
+        payments = payments.filter(date__gte=date_from)
+        enrollments = enrollments.filter(date__gte=date_from)
+
+    revenue_rows = payments.values(
+        'date', 'currency', course_id=F('enrollment__course_id'), instructor_id=F('enrollment__course__instructor_id'),
+    ).annotate(total=Sum('price'), n=Count('id')).order_by()
+    enrollment_rows = enrollments.values(
+        'date', 'course_id', instructor_id=F('course__instructor_id'),
+    ).annotate(n=Count('id')).order_by()
+
+    revenue_count = _replace(DailyRevenue, revenue_rows, lambda row: DailyRevenue(
+        day=row['date'], course_id=row['course_id'], instructor_id=row['instructor_id'],
+        currency=row['currency'], revenue=row['total'], payments_count=row['n'],
+    ), date_from)
+    enrollment_count = _replace(DailyEnrollments, enrollment_rows, lambda row: DailyEnrollments(
+        day=row['date'], course_id=row['course_id'], instructor_id=row['instructor_id'], enrollments_count=row['n'],
+    ), date_from)
+    return revenue_count, enrollment_count
+
+
+def revenue_series(rollups, interval):
+    """Group ``DailyRevenue`` rows into ``interval`` buckets per currency."""
+    return list(
+        rollups.filter(payments_count__gt=0)
+        .annotate(period=INTERVALS[interval]('day'))
+        .values('period', 'currency')
+        .annotate(revenue=Sum('revenue'), payments=Sum('payments_count'))
+        .order_by('period', 'currency')
+    )
+
+
+def enrollment_series(rollups, interval):
+    return list(
+        rollups.filter(enrollments_count__gt=0)
+        .annotate(period=INTERVALS[interval]('day'))
+        .values('period')
+        .annotate(enrollments=Sum('enrollments_count'))
+        .order_by('period')
+    )
@@ -0,0 +1,205 @@
+import heapq
+import math
+import re
+import threading
+from collections import defaultdict
+
+from django.db import connection
+
+from .models import Course
+
+# mirrors the tsvector weights used on PostgreSQL (A, B, C)
+FIELD_WEIGHTS = (
+    ('title', 1.0),
+    ('description', 0.4),
+    ('what_you_will_learn', 0.2),
+)
+
+STOP_WORDS = frozenset(
+    'a an and are as at be by for from how in into is it of on or the to with you your'.split()
+)
+
+TOKEN_RE = re.compile(r'\w+')
+
+POSTGRES_SEARCH_SQL = """
+    SELECT c.id, ts_rank_cd(c.search_vector, q.query) AS rank
+    FROM courses_course c, websearch_to_tsquery('english', %s) AS q(query)
+    WHERE c.search_vector @@ q.query
+    ORDER BY rank DESC, c.id DESC
+    LIMIT %s
+"""
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall((text or '').lower()) if token not in STOP_WORDS]
+
+
+class InvertedIndex:
+    """In-process BM25 index over course text, used when the database has no full-text search.
+
+    Per-term impact lists are computed lazily and kept sorted by score, so queries can stop early
+    (Fagin's threshold algorithm) instead of scoring every posting. A write only drops the lists of
+    the terms it touched: every list is scored against one snapshot of the collection statistics
+    (document count and average length), which is refreshed, dropping all lists, once either has
+    drifted by more than ``stats_tolerance``.
+    """
+
+    k1 = 1.2
+    b = 0.75
+    max_cached_terms = 4096
+    stats_tolerance = 0.1
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.doc_terms = {}
+        self.doc_lengths = {}
+        self.total_length = 0.0
+        self.impacts = {}
+        # (document count, average length) the cached impact lists were scored with
+        self.stats = None
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add(self, doc_id, fields):
+        """Index ``fields`` (a mapping of field name to text) under ``doc_id``, replacing any previous entry."""
+        weights = defaultdict(float)
+        for name, weight in FIELD_WEIGHTS:
+            for token in tokenize(fields.get(name)):
+                weights[token] += weight
+        with self.lock:
+            self.remove(doc_id)
+            for token, weight in weights.items():
+                self.postings[token][doc_id] = weight
+            length = sum(weights.values())
+            self.doc_terms[doc_id] = tuple(weights)
+            self.doc_lengths[doc_id] = length
+            self.total_length += length
+            self._invalidate(weights)
+
+    def remove(self, doc_id):
+        with self.lock:
+            if doc_id not in self.doc_lengths:
+                return
+            terms = self.doc_terms.pop(doc_id)
+            for token in terms:
+                posting = self.postings[token]
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[token]
+            self.total_length -= self.doc_lengths.pop(doc_id)
+            self._invalidate(terms)
+
+    def _invalidate(self, tokens):
+        for token in tokens:
+            self.impacts.pop(token, None)
+        if self.stats is None:
+            return
+        doc_count, avg_length = self.stats
+        current = len(self.doc_lengths)
+        if (abs(current - doc_count) > self.stats_tolerance * doc_count
+                or abs(self._avg_length() - avg_length) > self.stats_tolerance * avg_length):
+            self.impacts.clear()
+            self.stats = None
+
+    def _avg_length(self):
+        return self.total_length / len(self.doc_lengths) if self.doc_lengths else 0.0
+
+    def _impacts(self, token):
+        cached = self.impacts.get(token)
+        if cached is None:
+            if self.stats is None:
+                self.stats = (len(self.doc_lengths), self._avg_length())
+            doc_count, avg_length = self.stats
+            posting = self.postings[token]
+            # a term added since the snapshot may be in more documents than the snapshot counted
+            idf = math.log(1 + (max(doc_count - len(posting), 0) + 0.5) / (len(posting) + 0.5))
+            avg_length = avg_length or 1.0
+            norm = self.k1 * (1 - self.b)
+            scale = self.k1 * self.b / avg_length
+            lengths = self.doc_lengths
+            scores = {
+                doc_id: idf * tf * (self.k1 + 1) / (tf + norm + scale * lengths[doc_id])
+                for doc_id, tf in posting.items()
+            }
+            ranked = sorted(scores.items(), key=lambda item: (item[1], item[0]), reverse=True)
+            if len(self.impacts) >= self.max_cached_terms:
+                self.impacts.clear()
+            cached = self.impacts[token] = (ranked, scores)
+        return cached
+
+    def search(self, query, limit=20):
+        """Return up to ``limit`` ``(doc_id, score)`` pairs, best match first."""
+        with self.lock:
+            lists = [self._impacts(token) for token in set(tokenize(query)) if token in self.postings]
+        if not lists or limit <= 0:
+            return []
+        if len(lists) == 1:
+            return lists[0][0][:limit]
+
+        top = []
+        seen = set()
+        depth = 0
+        while True:
+            threshold = 0.0
+            exhausted = True
+            for ranked, _ in lists:
+                if depth >= len(ranked):
+                    continue
+                exhausted = False
+                doc_id, score = ranked[depth]
+                threshold += score
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                entry = (sum(scores.get(doc_id, 0.0) for _, scores in lists), doc_id)
+                if len(top) < limit:
+                    heapq.heappush(top, entry)
+                elif entry > top[0]:
+                    heapq.heapreplace(top, entry)
+            if exhausted or (len(top) == limit and top[0][0] >= threshold):
+                break
+            depth += 1
+        return [(doc_id, score) for score, doc_id in sorted(top, reverse=True)]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_search_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = InvertedIndex()
+                rows = Course.objects.values_list('id', *(name for name, _ in FIELD_WEIGHTS))
+                for row in rows.iterator(chunk_size=2000):
+                    index.add(row[0], dict(zip((name for name, _ in FIELD_WEIGHTS), row[1:])))
+                _index = index
+    return _index
+
+
+def index_course(course):
+    if _index is not None and connection.vendor != 'postgresql':
+        _index.add(course.pk, {name: getattr(course, name) for name, _ in FIELD_WEIGHTS})
+
+
+def unindex_course(course_id):
+    if _index is not None:
+        _index.remove(course_id)
+
+
+def reset_search_index():
+    global _index
+    _index = None
+
+
+def search_course_ids(query, limit=20):
+    """Return ``(course_id, rank)`` pairs for ``query`` using the best engine the database offers."""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(POSTGRES_SEARCH_SQL, [query, limit])
+            return cursor.fetchall()
+    return get_search_index().search(query, limit)
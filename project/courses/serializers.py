@@ -1,23 +1,76 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Course, CourseVideo,Instructor, Review , Student , Payment
+from .models import Course, CourseVideo,Instructor, Review , Student , Payment, Enrollment, VideoUpload
+from .images import variant_urls
+from .uploads import VIDEO_EXTENSIONS
+
+class ImageVariantsField(serializers.Field):
+    """Read-only URLs of the resized copies of ``image_field``, or None until they have been rendered."""
+
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        kwargs.update(source='*', read_only=True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        request = self.context.get('request')
+        build_url = request.build_absolute_uri if request else str
+        return variant_urls(instance.image_variants, getattr(instance, self.image_field).name, build_url)
 
 class InstructorSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField('profile_pic')
+
     class Meta:
         model = Instructor
-        fields = ['id', 'name', 'email', 'phone', 'bio', 'profile_pic']
+        fields = ['id', 'name', 'email', 'phone', 'bio', 'profile_pic', 'image_variants']
 
 class CourseVideoSerializer(serializers.ModelSerializer):
     class Meta:
         model = CourseVideo
         fields = ['id', 'title', 'video_url']
 
+class VideoUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = VideoUpload
+        fields = ['id', 'course', 'title', 'filename', 'size', 'offset', 'sha256', 'status', 'video', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+class VideoUploadStartSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=255)
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+    # optional sha256 of the whole file, checked once the last chunk is in
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$', required=False, default='')
+
+    def validate_filename(self, value):
+        extension = value[value.rfind('.'):].lower() if '.' in value else ''
+        if extension not in VIDEO_EXTENSIONS:
+            raise serializers.ValidationError(f"Unsupported video type; use one of {', '.join(sorted(VIDEO_EXTENSIONS))}.")
+        return value
+
+    def validate_size(self, value):
+        if value > settings.VIDEO_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f"Videos are limited to {settings.VIDEO_UPLOAD_MAX_SIZE} bytes.")
+        return value
+
 class ReviewCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = ['course', 'rating', 'comment']
         
+class ReviewIngestSerializer(serializers.Serializer):
+    # plain ids: the insert itself proves the course exists and the student is enrolled
+    course = serializers.IntegerField(min_value=1)
+    rating = serializers.IntegerField(min_value=1, max_value=5)
+    comment = serializers.CharField()
+
+class ReviewImportSerializer(ReviewIngestSerializer):
+    student = serializers.IntegerField(min_value=1)
+    date = serializers.DateField(required=False)
+
 class ReviewSerializer(serializers.ModelSerializer):
-    student_name = serializers.CharField(source='student.user.username', read_only=True)
+    # User has no username column; views must select_related('student__user', 'course')
+    student_name = serializers.CharField(source='student.user.get_full_name', read_only=True)
     course_title = serializers.CharField(source='course.title', read_only=True)
 
     class Meta:
@@ -27,10 +80,31 @@ class ReviewSerializer(serializers.ModelSerializer):
 
 class CourseSerializer(serializers.ModelSerializer):
     videos = CourseVideoSerializer(many=True, read_only=True)
+    # read from the denormalized CourseStats row; querysets should select_related('stats')
+    students_count = serializers.SerializerMethodField()
+    review_count = serializers.SerializerMethodField()
+    rating_average = serializers.SerializerMethodField()
+    image_variants = ImageVariantsField('courseImage')
+
     class Meta:
         model = Course
-        fields = '__all__'
+        exclude = ['next_video_position']
         read_only_fields = ['instructor','slug']
+
+    def _stats(self, obj):
+        return getattr(obj, 'stats', None)
+
+    def get_students_count(self, obj):
+        stats = self._stats(obj)
+        return stats.students_count if stats else 0
+
+    def get_review_count(self, obj):
+        stats = self._stats(obj)
+        return stats.review_count if stats else 0
+
+    def get_rating_average(self, obj):
+        stats = self._stats(obj)
+        return stats.rating_average if stats else None
     
 class EnrolledStudentSerializer(serializers.ModelSerializer):
     name = serializers.CharField(source='user.username')
@@ -40,9 +114,27 @@ class EnrolledStudentSerializer(serializers.ModelSerializer):
         model = Student
         fields = ['name', 'email']
         
+class EnrolledCourseSerializer(serializers.ModelSerializer):
+    course = CourseSerializer(read_only=True)
+
+    class Meta:
+        model = Enrollment
+        fields = ['id', 'date', 'progress', 'status', 'course']
+
+class CourseRosterSerializer(serializers.ModelSerializer):
+    student_id = serializers.IntegerField(source='student.id', read_only=True)
+    email = serializers.EmailField(source='student.user.email', read_only=True)
+    first_name = serializers.CharField(source='student.user.first_name', read_only=True)
+    last_name = serializers.CharField(source='student.user.last_name', read_only=True)
+
+    class Meta:
+        model = Enrollment
+        fields = ['id', 'student_id', 'email', 'first_name', 'last_name', 'date', 'progress', 'status']
+
 class PaymentSerializer(serializers.ModelSerializer):
+    # views must select_related('enrollment__course', 'enrollment__student__user')
     course_title = serializers.CharField(source='enrollment.course.title', read_only=True)
-    student_name = serializers.CharField(source='enrollment.student.user.username', read_only=True)
+    student_name = serializers.CharField(source='enrollment.student.user.get_full_name', read_only=True)
 
     class Meta:
         model = Payment
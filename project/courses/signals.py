@@ -0,0 +1,132 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from users.authentication import mark_user_changed
+from users.models import ClaimsUser, User
+from .models import Course, CourseStats, CourseVideo, Enrollment, Instructor, Payment, Review, Student
+from .cache import bump_catalog_version
+from .images import schedule_variants
+from .search import index_course, unindex_course
+from . import rollups, stats
+
+
+@receiver([post_save, post_delete], sender=Course)
+@receiver([post_save, post_delete], sender=CourseVideo)
+@receiver([post_save, post_delete], sender=Review)
+def invalidate_catalog_cache(sender, **kwargs):
+    bump_catalog_version()
+
+
+@receiver([post_save, post_delete], sender=Enrollment)
+def invalidate_catalog_cache_on_enrollment(sender, created=True, **kwargs):
+    # progress updates don't change catalog payloads, only new or removed enrollments do
+    if created:
+        bump_catalog_version()
+
+
+@receiver(post_save, sender=Course)
+def update_search_index(sender, instance, **kwargs):
+    index_course(instance)
+
+
+@receiver(post_delete, sender=Course)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_course(instance.pk)
+
+
+@receiver(post_save, sender=Course)
+def create_course_stats(sender, instance, created, **kwargs):
+    if created:
+        CourseStats.objects.get_or_create(course=instance)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=Instructor)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=ClaimsUser)
+def build_image_variants(sender, instance, **kwargs):
+    schedule_variants(instance)
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def invalidate_student_claims(sender, instance, created=True, **kwargs):
+    # access tokens carry the student profile id, so only creating or removing a profile matters
+    if created and instance.user_id:
+        mark_user_changed(instance.user_id)
+
+
+def _touches(update_fields, fields):
+    return update_fields is None or bool(fields & set(update_fields))
+
+
+@receiver(pre_save, sender=Enrollment)
+def remember_enrollment_rollup(sender, instance, update_fields=None, **kwargs):
+    # progress and completion saves pass update_fields and don't move rollup totals
+    if instance.pk and not instance._state.adding and _touches(update_fields, rollups.ENROLLMENT_ROLLUP_FIELDS):
+        instance._rollup_previous = rollups.enrollment_snapshot(instance)
+
+
+@receiver(post_save, sender=Enrollment)
+def count_enrollment(sender, instance, created, **kwargs):
+    if created:
+        stats.enrollment_added(instance.course_id)
+        rollups.enrollment_added(instance)
+    elif getattr(instance, '_rollup_previous', None) is not None:
+        previous = instance._rollup_previous
+        if previous['course_id'] != instance.course_id:
+            stats.enrollment_removed(previous['course_id'])
+            stats.enrollment_added(instance.course_id)
+        rollups.enrollment_changed(instance, previous)
+        instance._rollup_previous = None
+
+
+@receiver(post_delete, sender=Enrollment)
+def uncount_enrollment(sender, instance, **kwargs):
+    stats.enrollment_removed(instance.course_id)
+    rollups.enrollment_removed(instance)
+
+
+@receiver(pre_save, sender=Payment)
+def remember_payment_rollup(sender, instance, update_fields=None, **kwargs):
+    if instance.pk and not instance._state.adding and _touches(update_fields, rollups.PAYMENT_ROLLUP_FIELDS):
+        instance._rollup_previous = rollups.payment_snapshot(instance)
+
+
+@receiver(post_save, sender=Payment)
+def count_payment(sender, instance, created, **kwargs):
+    if created:
+        rollups.payment_added(instance)
+    elif getattr(instance, '_rollup_previous', None) is not None:
+        rollups.payment_changed(instance, instance._rollup_previous)
+        instance._rollup_previous = None
+
+
+@receiver(post_delete, sender=Payment)
+def uncount_payment(sender, instance, **kwargs):
+    rollups.payment_removed(instance)
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_review(sender, instance, **kwargs):
+    if instance.pk and not instance._state.adding:
+        instance._previous_review = Review.objects.filter(pk=instance.pk).values_list('course_id', 'rating').first()
+
+
+@receiver(post_save, sender=Review)
+def count_review(sender, instance, created, **kwargs):
+    if created:
+        stats.review_added(instance.course_id, instance.rating)
+    elif getattr(instance, '_previous_review', None) is not None:
+        course_id, rating = instance._previous_review
+        if course_id != instance.course_id:
+            stats.review_removed(course_id, rating)
+            stats.review_added(instance.course_id, instance.rating)
+        else:
+            stats.review_changed(instance.course_id, rating, instance.rating)
+
+
+@receiver(post_delete, sender=Review)
+def uncount_review(sender, instance, **kwargs):
+    stats.review_removed(instance.course_id, instance.rating)
@@ -0,0 +1,124 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .cache import bump_catalog_version
+from .models import Course, CourseStats, Enrollment, Review
+
+
+def _apply_deltas(course_id, create_missing=True, **deltas):
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not updates:
+        return
+    if CourseStats.objects.filter(course_id=course_id).update(**updates) or not create_missing:
+        return
+    CourseStats.objects.get_or_create(course_id=course_id)
+    CourseStats.objects.filter(course_id=course_id).update(**updates)
+
+
+def enrollment_added(course_id):
+    _apply_deltas(course_id, students_count=1)
+
+
+def enrollment_removed(course_id):
+    # the stats row may already be gone when the whole course is being deleted
+    _apply_deltas(course_id, create_missing=False, students_count=-1)
+
+
+RATINGS = range(1, 6)
+
+
+def _bucket(rating):
+    return f'rating_{rating}_count' if rating in RATINGS else None
+
+
+def review_added(course_id, rating):
+    deltas = {'review_count': 1, 'rating_sum': rating}
+    if _bucket(rating):
+        deltas[_bucket(rating)] = 1
+    _apply_deltas(course_id, **deltas)
+
+
+def reviews_added(course_id, ratings):
+    deltas = defaultdict(int, review_count=len(ratings), rating_sum=sum(ratings))
+    for rating in ratings:
+        if _bucket(rating):
+            deltas[_bucket(rating)] += 1
+    _apply_deltas(course_id, **deltas)
+
+
+def review_changed(course_id, old_rating, new_rating):
+    if old_rating == new_rating:
+        return
+    deltas = {'rating_sum': new_rating - old_rating}
+    if _bucket(old_rating):
+        deltas[_bucket(old_rating)] = -1
+    if _bucket(new_rating):
+        deltas[_bucket(new_rating)] = 1
+    _apply_deltas(course_id, **deltas)
+
+
+def review_removed(course_id, rating):
+    deltas = {'review_count': -1, 'rating_sum': -rating}
+    if _bucket(rating):
+        deltas[_bucket(rating)] = -1
+    _apply_deltas(course_id, create_missing=False, **deltas)
+
+
+STAT_FIELDS = ['students_count', 'review_count', 'rating_sum'] + [_bucket(rating) for rating in RATINGS]
+
+
+def rebuild_course_stats(batch_size=1000, dry_run=False):
+    """Recompute every course's stats from ``Enrollment``/``Review`` and fix any drift.
+
+    Works through the course table in primary-key batches, so memory stays bounded. Returns
+    ``(checked, created, fixed)`` counts.
+    """
+    checked = created = fixed = 0
+    last_id = 0
+    while True:
+        course_ids = list(
+            Course.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not course_ids:
+            break
+        last_id = course_ids[-1]
+
+        with transaction.atomic():
+            existing = CourseStats.objects.select_for_update().in_bulk(course_ids)
+            students = dict(
+                Enrollment.objects.filter(course_id__in=course_ids)
+                .values('course_id').annotate(n=Count('id')).values_list('course_id', 'n')
+            )
+            reviews = {
+                row.pop('course_id'): row
+                for row in Review.objects.filter(course_id__in=course_ids).values('course_id').annotate(
+                    review_count=Count('id'),
+                    rating_sum=Sum('rating'),
+                    **{_bucket(rating): Count('id', filter=Q(rating=rating)) for rating in RATINGS},
+                )
+            }
+
+            to_create, to_update = [], []
+            for course_id in course_ids:
+                expected = CourseStats(course_id=course_id, students_count=students.get(course_id, 0))
+                for field, value in reviews.get(course_id, {}).items():
+                    setattr(expected, field, value or 0)
+                current = existing.get(course_id)
+                if current is None:
+                    to_create.append(expected)
+                elif any(getattr(current, field) != getattr(expected, field) for field in STAT_FIELDS):
+                    to_update.append(expected)
+
+            if not dry_run:
+                CourseStats.objects.bulk_create(to_create)
+                CourseStats.objects.bulk_update(to_update, STAT_FIELDS)
+
+        checked += len(course_ids)
+        created += len(to_create)
+        fixed += len(to_update)
+    if (created or fixed) and not dry_run:
+        # bulk writes send no signals, and cached catalog pages embed these counts
+        bump_catalog_version()
+    return checked, created, fixed
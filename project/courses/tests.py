@@ -1,3 +1,740 @@
-from django.test import TestCase
+import csv
+import gzip
+import hashlib
+import io
+import json
+import logging
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+from tempfile import TemporaryDirectory
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from lewagon_project.testing import QueryBudgetMixin
+from users.models import User
+from users.tokens import blacklist_index
+from users.views import CustomTokenObtainPairSerializer
+from .fx import convert_daily_totals, get_rate_table, invalidate_rate_table
+from .models import (
+    Course, CourseStats, CourseVideo, DailyEnrollments, DailyRevenue, Enrollment, ExchangeRate, Payment, Review, Student,
+    VideoUpload,
+)
+from . import async_views
+from .exports import buffered
+from .progress import ProgressBuffer
+from .rollups import rebuild_rollups
+from .uploads import ChunkInProgress, append_chunk, partial_path
+from .search import InvertedIndex, reset_search_index
+from .stats import rebuild_course_stats
+
+
+class ListQueryCountTests(TestCase):
+    """List endpoints must cost the same number of queries whatever the page size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin@example.com', None, first_name='Ada', last_name='Min')
+        instructor = User.objects.create_user('teacher@example.com', None, first_name='Tea', last_name='Cher', is_instructor=True)
+        courses = [
+            Course.objects.create(
+                title=f'Course {n}', description='d', duration=1, price=10, instructor=instructor,
+                courseType='Paid', what_you_will_learn='w',
+            )
+            for n in range(3)
+        ]
+        for n in range(30):
+            user = User.objects.create_user(f'student{n}@example.com', None, first_name='Stu', last_name=str(n), is_student=True)
+            student = Student.objects.create(user=user, phone='0')
+            course = courses[n % len(courses)]
+            enrollment = Enrollment.objects.create(student=student, course=course, date=date(2025, 1, 1 + n % 28))
+            Payment.objects.create(enrollment=enrollment, date=enrollment.date, price=10, currency='EUR' if n % 2 else 'USD')
+            Review.objects.create(student=student, course=course, date=enrollment.date, rating=1 + n % 5, comment='ok')
+        cls.course = courses[0]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def assertConstantQueries(self, url, expected):
+        for page_size in (1, 10, 30):
+            with self.assertNumQueries(expected):
+                response = self.client.get(url, {'page_size': page_size})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), page_size)
+
+    def test_admin_payments(self):
+        self.assertConstantQueries('/courses/admin/payments/', 1)
+
+    def test_student_payments_as_admin(self):
+        self.assertConstantQueries('/courses/student/payments/', 1)
+
+    def test_admin_reviews(self):
+        self.assertConstantQueries('/courses/admin/reviews/', 1)
+
+    def test_payment_filters(self):
+        response = self.client.get('/courses/admin/payments/', {
+            'currency': 'eur', 'course': self.course.id, 'date_from': '2025-01-02', 'date_to': '2025-01-20',
+        })
+        self.assertEqual(response.status_code, 200)
+        rows = response.data['results']
+        self.assertTrue(rows)
+        self.assertTrue(all(row['currency'] == 'EUR' and row['course_title'] == self.course.title for row in rows))
+        self.assertTrue(all('2025-01-02' <= row['date'] <= '2025-01-20' for row in rows))
+
+    def test_invalid_filter_is_rejected(self):
+        response = self.client.get('/courses/admin/payments/', {'date_from': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+
+# one test process shares its LocMem auth cache, so the claims fast path is the one measured here
+@override_settings(AUTH_CACHE_SHARED=True)
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Pins the number of queries of each endpoint; raise a budget only together with the reason."""
+
+    query_budgets = {
+        'all_courses': 2,
+        'course_search': 3,
+        'course_detail': 2,
+        'course_reviews': 2,
+        'course_students': 2,
+        'instructor_courses': 2,
+        'enrolled_courses': 2,
+        'video_completion': 2,
+        'get_certificate': 2,
+        'verify_certificate': 1,
+        'revenue_analytics': 4,
+        'catalog_cache_stats': 0,
+        'admin-courses-list': 2,
+        'admin-payments-list': 1,
+        'admin-reviews-list': 1,
+        'student-payments-list': 1,
+        'user_profile': 1,
+        'admin_dashboard': 14,
+        'admin-users-list': 1,
+        'throttle_stats': 0,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin@example.com', None, first_name='Ada', last_name='Min')
+        cls.instructor = User.objects.create_user('teacher@example.com', None, first_name='Tea', last_name='Cher', is_instructor=True)
+        cls.courses = []
+        for n in range(5):
+            course = Course.objects.create(
+                title=f'Python course {n}', description='Learn python', duration=1, price=10, instructor=cls.instructor,
+                courseType='Paid', what_you_will_learn='w',
+            )
+            for lesson in range(3):
+                CourseVideo.objects.create(course=course, title=f'Lesson {lesson}', video_url=f'https://example.com/{n}/{lesson}.mp4')
+            cls.courses.append(course)
+        cls.course = cls.courses[0]
+        for n in range(10):
+            user = User.objects.create_user(f'student{n}@example.com', None, first_name='Stu', last_name=str(n), is_student=True)
+            student = Student.objects.create(user=user, phone='0')
+            for course in cls.courses:
+                enrollment = Enrollment.objects.create(
+                    student=student, course=course, date=date(2025, 1, 1 + n), progress=100, status='Completed',
+                )
+                Payment.objects.create(enrollment=enrollment, date=enrollment.date, price=10, currency='EUR')
+                Review.objects.create(student=student, course=course, date=enrollment.date, rating=5, comment='ok')
+        cls.student = user
+
+    def setUp(self):
+        # caches, the search index and the blacklist index outlive each test's rollback
+        for alias in ('default', 'auth'):
+            caches[alias].clear()
+        reset_search_index()
+        blacklist_index.reset()
+        self.client = APIClient()
+
+    def login(self, user):
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_public_endpoints(self):
+        self.assertQueryBudget('get', reverse('all_courses'))
+        self.assertQueryBudget('get', reverse('course_search'), data={'q': 'python'})
+        self.assertQueryBudget('get', reverse('course_reviews', args=[self.course.slug]))
+
+    def test_catalog_does_not_join_users(self):
+        # CourseSerializer only outputs the instructor id, which is on the course row already
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('all_courses'))
+        self.assertFalse(any('users_user' in query['sql'] for query in queries.captured_queries))
+
+    def test_student_endpoints(self):
+        self.login(self.student)
+        self.assertQueryBudget('get', reverse('course_detail', args=[self.course.slug]))
+        self.assertQueryBudget('get', reverse('enrolled_courses'))
+        self.assertQueryBudget('get', reverse('video_completion', args=[self.course.id]))
+        self.assertQueryBudget('get', reverse('student-payments-list'))
+        self.assertQueryBudget('get', reverse('user_profile'))
+        with TemporaryDirectory() as root, self.settings(CERTIFICATE_ROOT=root):
+            response = self.assertQueryBudget('get', reverse('get_certificate', args=[self.course.id]))
+        self.client.credentials()
+        self.assertQueryBudget('get', response.data['verify_url'])
+
+    def test_instructor_endpoints(self):
+        self.login(self.instructor)
+        self.assertQueryBudget('get', reverse('instructor_courses'))
+        self.assertQueryBudget('get', reverse('course_students', args=[self.course.id]))
+
+    def test_admin_endpoints(self):
+        self.login(self.admin)
+        for name in ('admin-courses-list', 'admin-payments-list', 'admin-reviews-list', 'admin-users-list'):
+            self.assertQueryBudget('get', reverse(name))
+        self.assertQueryBudget('get', reverse('revenue_analytics'))
+        self.assertQueryBudget('get', reverse('catalog_cache_stats'))
+        self.assertQueryBudget('get', reverse('admin_dashboard'))
+        self.assertQueryBudget('get', reverse('throttle_stats'))
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('all_courses'))
+        queries = response.wsgi_request.query_stats.count
+        self.assertGreater(queries, 0)
+        self.assertIn(f'db;desc="{queries} queries"', response['Server-Timing'])
+        # the JSON lines are opt-in (DJANGO_SQL_LOG=1) but always routed to a handler
+        self.assertTrue(logging.getLogger('lewagon_project.sql').handlers)
+        with self.assertLogs('lewagon_project.sql', 'INFO') as logs:
+            self.client.get(reverse('all_courses'))
+        self.assertIn('"url_name": "all_courses"', logs.output[0])
+
+
+class CatalogCacheKeyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user('teacher@example.com', None, first_name='Tea', last_name='Cher', is_instructor=True)
+        for n in range(3):
+            Course.objects.create(
+                title=f'Course {n}', description='d', duration=1, price=10, instructor=instructor,
+                courseType='Paid', what_you_will_learn='w',
+            )
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_unrelated_parameters_share_a_page(self):
+        first = self.client.get(reverse('all_courses'), {'page_size': 1, 'utm_source': 'mail'})
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertNotIn('utm_source', first.json()['next'])
+        second = self.client.get(reverse('all_courses'), {'page_size': 1, 'ref': 'x'})
+        self.assertEqual(second['X-Cache'], 'HIT')
+
+    def test_stats_rebuild_invalidates_pages(self):
+        self.client.get(reverse('all_courses'))
+        self.assertEqual(self.client.get(reverse('all_courses'))['X-Cache'], 'HIT')
+        CourseStats.objects.update(students_count=7)
+        rebuild_course_stats()
+        response = self.client.get(reverse('all_courses'))
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual({course['students_count'] for course in response.json()['results']}, {0})
+
+    def test_page_size_is_clamped(self):
+        self.client.get(reverse('all_courses'), {'page_size': 100})
+        response = self.client.get(reverse('all_courses'), {'page_size': 5000})
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+
+class ProgressHeartbeatTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user('teacher@example.com', None, first_name='Tea', last_name='Cher', is_instructor=True)
+        cls.course = Course.objects.create(
+            title='Reading course', description='d', duration=1, price=10, instructor=instructor,
+            courseType='Paid', what_you_will_learn='w',
+        )
+        cls.user = User.objects.create_user('student@example.com', None, first_name='Stu', last_name='Dent', is_student=True)
+        cls.student = Student.objects.create(user=cls.user, phone='0')
+        cls.enrollment = Enrollment.objects.create(student=cls.student, course=cls.course, date=date(2025, 1, 1))
+        cls.video_course = Course.objects.create(
+            title='Video course', description='d', duration=1, price=10, instructor=instructor,
+            courseType='Paid', what_you_will_learn='w',
+        )
+        cls.videos = [
+            CourseVideo.objects.create(course=cls.video_course, title=f'Lesson {n}', video_url=f'https://example.com/{n}.mp4')
+            for n in range(4)
+        ]
+        cls.video_enrollment = Enrollment.objects.create(student=cls.student, course=cls.video_course, date=date(2025, 1, 1))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_video_course_heartbeat_is_refused(self):
+        response = self.client.post(reverse('update_progress'), {'course_id': self.video_course.id, 'progress': 80}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('completion_url', response.data)
+        response = self.client.post(reverse('update_progress_batch'), {'updates': [
+            {'course_id': self.video_course.id, 'progress': 80}, {'course_id': self.course.id, 'progress': 30},
+        ]}, format='json')
+        self.assertEqual((response.data['updated'], response.data['ignored']), (1, 1))
+        self.video_enrollment.refresh_from_db()
+        self.assertEqual(self.video_enrollment.progress, 0)
+
+    def test_video_completion_bitset(self):
+        url = reverse('video_completion', args=[self.video_course.id])
+        response = self.client.post(url, {'video_ids': [self.videos[0].id, self.videos[2].id]}, format='json')
+        self.assertEqual(response.data['completed_videos'], [self.videos[0].id, self.videos[2].id])
+        self.assertEqual(response.data['progress'], 50)
+        # a deleted video's position is never handed to a new one, so completions can't shift onto it
+        self.videos[3].delete()
+        added = CourseVideo.objects.create(course=self.video_course, title='Extra', video_url='https://example.com/x.mp4')
+        self.assertGreater(added.position, max(video.position for video in self.videos))
+        response = self.client.get(url)
+        self.assertEqual((response.data['completed_videos'], response.data['total_videos']), ([self.videos[0].id, self.videos[2].id], 4))
+        response = self.client.post(url, {'video_ids': [self.videos[1].id, added.id]}, format='json')
+        self.assertEqual((response.data['progress'], response.data['status']), (100, 'Completed'))
+
+    def test_non_integer_course_id_is_rejected(self):
+        response = self.client.post(reverse('update_progress'), {'course_id': 'abc', 'progress': 10}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_heartbeat_only_raises_progress(self):
+        self.client.post(reverse('update_progress'), {'course_id': self.course.id, 'progress': 40}, format='json')
+        self.client.post(reverse('update_progress'), {'course_id': self.course.id, 'progress': 20}, format='json')
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.progress, 40)
+
+    def test_flush_drops_bad_rows_and_keeps_the_rest(self):
+        buffer = ProgressBuffer(interval=60)
+        buffer.pending = {(self.student.id, 'abc'): 10.0, (self.student.id, self.course.id): 55.0}
+        with self.assertLogs('courses.progress', 'ERROR'):
+            self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(buffer.pending, {})
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.progress, 55)
+
+
+class ExchangeRateReloadTests(TestCase):
+    def upsert(self, rate):
+        # what load_fx_rates does in its own process: nothing here is told about it
+        ExchangeRate.objects.bulk_create(
+            [ExchangeRate(currency='EUR', effective_date=date(2025, 1, 1), rate=rate)],
+            update_conflicts=True, unique_fields=['currency', 'effective_date'], update_fields=['rate', 'updated_at'],
+        )
+
+    @override_settings(FX_RATE_CHECK_INTERVAL=0)
+    def test_rates_loaded_elsewhere_are_picked_up(self):
+        rows = [(date(2025, 1, 2), 'EUR', Decimal('10'))]
+        self.assertEqual(convert_daily_totals(rows), ({}, ['EUR']))
+        self.upsert(Decimal('1.1'))
+        self.assertEqual(convert_daily_totals(rows), ({date(2025, 1, 2): Decimal('11.00')}, []))
+        self.upsert(Decimal('1.2'))
+        self.assertEqual(convert_daily_totals(rows), ({date(2025, 1, 2): Decimal('12.00')}, []))
+
+    @override_settings(FX_RATE_CHECK_INTERVAL=3600)
+    def test_table_is_not_rechecked_within_the_interval(self):
+        get_rate_table()
+        invalidate_rate_table()
+        get_rate_table()
+        with self.assertNumQueries(0):
+            get_rate_table()
+
+
+class UploadLeaseTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user('teacher@example.com', None, first_name='Tea', last_name='Cher', is_instructor=True)
+        cls.course = Course.objects.create(
+            title='Course', description='d', duration=1, price=10, instructor=cls.instructor,
+            courseType='Paid', what_you_will_learn='w',
+        )
+
+    def setUp(self):
+        media, temp = TemporaryDirectory(), TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.addCleanup(temp.cleanup)
+        settings = self.settings(MEDIA_ROOT=media.name, VIDEO_UPLOAD_TEMP_DIR=temp.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.instructor)
+        self.data = b'video' * 200
+        response = self.client.post(reverse('video_upload_start', args=[self.course.id]), {
+            'title': 'Lesson', 'filename': 'lesson.mp4', 'size': len(self.data), 'sha256': hashlib.sha256(self.data).hexdigest(),
+        }, format='json')
+        self.upload = VideoUpload.objects.get(pk=response.data['id'])
+
+    def put(self, offset, chunk):
+        return self.client.generic(
+            'PUT', reverse('video_upload', args=[self.upload.pk]), chunk,
+            content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_chunk_is_refused_while_another_request_holds_the_lease(self):
+        VideoUpload.objects.filter(pk=self.upload.pk).update(lease=uuid.uuid4(), lease_expires_at=now() + timedelta(minutes=5))
+        self.assertEqual(self.put(0, self.data).status_code, 409)
+        VideoUpload.objects.filter(pk=self.upload.pk).update(lease_expires_at=now() - timedelta(seconds=1))
+        self.assertEqual(self.put(0, self.data).data['offset'], len(self.data))
+
+    @override_settings(VIDEO_UPLOAD_LEASE=timedelta(0))
+    def test_writer_stops_once_its_lease_is_taken(self):
+        upload = self.upload
+        other = uuid.uuid4()
+
+        class Stolen(io.BytesIO):
+            def read(self, size=-1):
+                # a second request claims the upload while this one waits on the client
+                VideoUpload.objects.filter(pk=upload.pk).update(lease=other, lease_expires_at=now() + timedelta(minutes=5))
+                return super().read(size)
+
+        with self.assertRaises(ChunkInProgress):
+            append_chunk(upload.pk, self.instructor, 0, Stolen(self.data), len(self.data))
+        upload.refresh_from_db()
+        self.assertEqual((upload.offset, upload.lease), (0, other))
+        self.assertEqual(partial_path(upload).stat().st_size, 0)
+
+    def test_complete_checks_the_file_on_disk(self):
+        self.put(0, self.data)
+        with open(partial_path(self.upload), 'r+b') as f:
+            f.write(b'X')
+        response = self.client.post(reverse('video_upload_complete', args=[self.upload.pk]))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(CourseVideo.objects.exists())
+        # the file goes back where a resumed upload expects it
+        self.assertEqual(partial_path(self.upload).stat().st_size, len(self.data))
+
+
+class SearchRankingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user('teacher@example.com', None, first_name='Tea', last_name='Cher', is_instructor=True)
+        cls.title_match, cls.body_match, cls.other = [
+            Course.objects.create(
+                title=title, description=description, duration=1, price=10, instructor=instructor,
+                courseType='Paid', what_you_will_learn='w',
+            )
+            for title, description in [
+                ('Python basics', 'Learn to program.'),
+                ('Programming', 'A long course that mentions python once among many other words.'),
+                ('Cooking', 'Pasta and bread.'),
+            ]
+        ]
+
+    def setUp(self):
+        reset_search_index()
+        self.addCleanup(reset_search_index)
+
+    def search(self, q):
+        response = self.client.get(reverse('course_search'), {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return [course['id'] for course in response.json()['results']]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.search('python'), [self.title_match.id, self.body_match.id])
+
+    def test_writes_reach_a_built_index(self):
+        self.search('python')
+        self.other.title = 'Python for cooks'
+        self.other.save()
+        self.title_match.delete()
+        self.assertEqual(self.search('python'), [self.other.id, self.body_match.id])
+
+    def test_early_termination_matches_exhaustive_scoring(self):
+        index = InvertedIndex()
+        words = ['alpha', 'beta', 'gamma', 'delta']
+        for doc_id in range(200):
+            index.add(doc_id, {'title': ' '.join(words[(doc_id + n) % 4] for n in range(doc_id % 5)), 'description': words[doc_id % 4]})
+        query = 'alpha gamma'
+        lists = [index._impacts(token)[1] for token in ('alpha', 'gamma')]
+        everything = sorted(
+            ((sum(scores.get(doc_id, 0.0) for scores in lists), doc_id) for doc_id in set().union(*lists)), reverse=True,
+        )
+        self.assertEqual(index.search(query, 10), [(doc_id, score) for score, doc_id in everything[:10]])
+
+
+class IncrementalStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user('teacher@example.com', None, first_name='Tea', last_name='Cher', is_instructor=True)
+        cls.course = Course.objects.create(
+            title='Course', description='d', duration=1, price=10, instructor=instructor,
+            courseType='Paid', what_you_will_learn='w',
+        )
+        cls.students = [
+            Student.objects.create(
+                user=User.objects.create_user(f'student{n}@example.com', None, first_name='Stu', last_name=str(n), is_student=True),
+                phone='0',
+            )
+            for n in range(2)
+        ]
+
+    def stats(self):
+        stats = CourseStats.objects.get(course=self.course)
+        return stats.students_count, stats.review_count, stats.rating_sum, stats.rating_histogram
+
+    def test_counters_follow_writes_and_deletes(self):
+        enrollments = [Enrollment.objects.create(student=student, course=self.course, date=date(2025, 1, 1)) for student in self.students]
+        five = Review.objects.create(student=self.students[0], course=self.course, date=date(2025, 1, 2), rating=5, comment='great')
+        three = Review.objects.create(student=self.students[1], course=self.course, date=date(2025, 1, 2), rating=3, comment='ok')
+        self.assertEqual(self.stats(), (2, 2, 8, {'1': 0, '2': 0, '3': 1, '4': 0, '5': 1}))
+
+        three.rating = 4
+        three.save()
+        five.delete()
+        enrollments[0].delete()
+        self.assertEqual(self.stats(), (1, 1, 4, {'1': 0, '2': 0, '3': 0, '4': 1, '5': 0}))
+        self.assertEqual(rebuild_course_stats(), (1, 0, 0))
+
+    def test_moving_between_courses_moves_the_counts(self):
+        other = Course.objects.create(
+            title='Other', description='d', duration=1, price=10, instructor=self.course.instructor,
+            courseType='Paid', what_you_will_learn='w',
+        )
+        enrollment = Enrollment.objects.create(student=self.students[0], course=self.course, date=date(2025, 1, 1))
+        review = Review.objects.create(student=self.students[0], course=self.course, date=date(2025, 1, 2), rating=4, comment='ok')
+        enrollment.course = review.course = other
+        enrollment.save()
+        review.save()
+        self.assertEqual(self.stats(), (0, 0, 0, {'1': 0, '2': 0, '3': 0, '4': 0, '5': 0}))
+        self.assertEqual(rebuild_course_stats(), (2, 0, 0))
+
+    def test_rebuild_fixes_drift(self):
+        Review.objects.create(student=self.students[0], course=self.course, date=date(2025, 1, 2), rating=2, comment='meh')
+        CourseStats.objects.filter(course=self.course).update(review_count=9, rating_2_count=0)
+        self.assertEqual(rebuild_course_stats(), (1, 0, 1))
+        self.assertEqual(self.stats(), (0, 1, 2, {'1': 0, '2': 1, '3': 0, '4': 0, '5': 0}))
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin@example.com', None, first_name='Ada', last_name='Min')
+        cls.instructor = User.objects.create_user('teacher@example.com', None, first_name='Tea', last_name='Cher', is_instructor=True)
+        cls.course = Course.objects.create(
+            title='Course, with a comma', description='d', duration=1, price=10, instructor=cls.instructor,
+            courseType='Paid', what_you_will_learn='w',
+        )
+        for n in range(5):
+            user = User.objects.create_user(f'student{n}@example.com', None, first_name='Stu', last_name=str(n), is_student=True)
+            enrollment = Enrollment.objects.create(
+                student=Student.objects.create(user=user, phone='0'), course=cls.course, date=date(2025, 1, 1 + n),
+            )
+            Payment.objects.create(enrollment=enrollment, date=enrollment.date, price=Decimal('9.50'), currency='EUR')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def download(self, url, params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_quotes_and_filters(self):
+        response, body = self.download(reverse('admin_export', args=['payments']), {'date_from': '2025-01-02', 'date_to': '2025-01-04'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="payments.csv"')
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        self.assertEqual([row['date'] for row in rows], ['2025-01-02', '2025-01-03', '2025-01-04'])
+        self.assertEqual((rows[0]['course_title'], rows[0]['price']), ('Course, with a comma', '9.50'))
+
+    def test_ndjson_gzip(self):
+        response, body = self.download(reverse('admin_export', args=['enrollments']), {'export': 'ndjson', 'gzip': '1'})
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="enrollments.ndjson.gz"')
+        rows = [json.loads(line) for line in gzip.decompress(body).decode().splitlines()]
+        self.assertEqual([row['student_email'] for row in rows], [f'student{n}@example.com' for n in range(5)])
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.get(reverse('admin_export', args=['payments']), {'export': 'xlsx'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('admin_export', args=['users'])).status_code, 404)
+
+    def test_roster_export_is_scoped_to_the_instructor(self):
+        self.client.force_authenticate(self.instructor)
+        _, body = self.download(reverse('course_students', args=[self.course.id]), {'export': 'csv', 'search': 'student3'})
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        self.assertEqual([row['email'] for row in rows], ['student3@example.com'])
+
+    def test_lines_are_grouped_into_chunks(self):
+        chunks = list(buffered(('x' * 10 for _ in range(25)), size=100))
+        self.assertEqual([len(chunk) for chunk in chunks], [100, 100, 50])
+
+
+class RollupDeltaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user('teacher@example.com', None, first_name='Tea', last_name='Cher', is_instructor=True)
+        cls.courses = [
+            Course.objects.create(
+                title=f'Course {n}', description='d', duration=1, price=10, instructor=instructor,
+                courseType='Paid', what_you_will_learn='w',
+            )
+            for n in range(2)
+        ]
+        user = User.objects.create_user('student@example.com', None, first_name='Stu', last_name='Dent', is_student=True)
+        cls.student = Student.objects.create(user=user, phone='0')
+
+    def revenue(self):
+        return set(
+            DailyRevenue.objects.filter(payments_count__gt=0)
+            .values_list('day', 'course_id', 'currency', 'revenue', 'payments_count')
+        )
+
+    def enrollments(self):
+        return set(DailyEnrollments.objects.filter(enrollments_count__gt=0).values_list('day', 'course_id', 'enrollments_count'))
+
+    def assertMatchesRebuild(self):
+        incremental = self.revenue(), self.enrollments()
+        rebuild_rollups()
+        self.assertEqual(incremental, (self.revenue(), self.enrollments()))
+
+    def test_payment_update_moves_its_totals(self):
+        enrollment = Enrollment.objects.create(student=self.student, course=self.courses[0], date=date(2025, 1, 1))
+        payment = Payment.objects.create(enrollment=enrollment, date=date(2025, 1, 1), price=Decimal('10'), currency='EUR')
+        Payment.objects.create(enrollment=enrollment, date=date(2025, 1, 1), price=Decimal('5'), currency='EUR')
+        payment.price, payment.currency, payment.date = Decimal('12'), 'USD', date(2025, 1, 2)
+        payment.save()
+        self.assertEqual(self.revenue(), {
+            (date(2025, 1, 1), self.courses[0].id, 'EUR', Decimal('5'), 1),
+            (date(2025, 1, 2), self.courses[0].id, 'USD', Decimal('12'), 1),
+        })
+        self.assertMatchesRebuild()
+
+    def test_enrollment_move_and_delete(self):
+        enrollment = Enrollment.objects.create(student=self.student, course=self.courses[0], date=date(2025, 1, 1))
+        Payment.objects.create(enrollment=enrollment, date=date(2025, 1, 1), price=Decimal('10'), currency='EUR')
+        enrollment.course = self.courses[1]
+        enrollment.save()
+        self.assertEqual(self.enrollments(), {(date(2025, 1, 1), self.courses[1].id, 1)})
+        self.assertMatchesRebuild()
+        enrollment.delete()
+        self.assertEqual((self.revenue(), self.enrollments()), (set(), set()))
+
+    def test_progress_saves_do_not_touch_rollups(self):
+        enrollment = Enrollment.objects.create(student=self.student, course=self.courses[0], date=date(2025, 1, 1))
+        enrollment.progress = 50
+        with self.assertNumQueries(1):
+            enrollment.save(update_fields=['progress'])
+
+
+class ReviewImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin@example.com', None, first_name='Ada', last_name='Min')
+        instructor = User.objects.create_user('teacher@example.com', None, first_name='Tea', last_name='Cher', is_instructor=True)
+        cls.course = Course.objects.create(
+            title='Course', description='d', duration=1, price=10, instructor=instructor,
+            courseType='Paid', what_you_will_learn='w',
+        )
+        cls.students = []
+        for n in range(3):
+            user = User.objects.create_user(f'student{n}@example.com', None, first_name='Stu', last_name=str(n), is_student=True)
+            cls.students.append(Student.objects.create(user=user, phone='0'))
+        for student in cls.students[:2]:
+            Enrollment.objects.create(student=student, course=cls.course, date=date(2025, 1, 1))
+        Review.objects.create(student=cls.students[1], course=cls.course, date=date(2025, 1, 2), rating=1, comment='old')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def row(self, student, rating=4):
+        return {'student': student.id, 'course': self.course.id, 'rating': rating, 'comment': 'imported', 'date': '2025-02-01'}
+
+    def test_unenrolled_and_duplicate_rows_are_skipped(self):
+        rows = [self.row(self.students[0], 5), self.row(self.students[0], 2), self.row(self.students[1]), self.row(self.students[2])]
+        response = self.client.post(reverse('admin-reviews-bulk-import'), rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['received'], response.data['created'], response.data['skipped']), (4, 1, 3))
+        review = Review.objects.get(student=self.students[0])
+        self.assertEqual((response.data['ids'], review.rating), ([review.id], 5))
+        stats = CourseStats.objects.get(course=self.course)
+        self.assertEqual((stats.review_count, stats.rating_sum), (2, 6))
+
+    def test_row_limit_is_enforced(self):
+        with mock.patch('courses.views.BULK_IMPORT_MAX_ROWS', 2):
+            response = self.client.post(reverse('admin-reviews-bulk-import'), [self.row(student) for student in self.students], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Review.objects.filter(comment='imported').exists())
+
+    def test_import_is_admin_only(self):
+        self.client.force_authenticate(self.students[0].user)
+        self.assertEqual(self.client.post(reverse('admin-reviews-bulk-import'), [self.row(self.students[0])], format='json').status_code, 403)
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        media = TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = self.settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.body = bytes(range(256)) * 4
+        for name in ('clip.0123456789ab.mp4', 'photo.202505171234.jpg', 'notes.deadbeef.txt', 'lesson.0123456789abcdef0123456789abcdef.mp4'):
+            with open(f'{media.name}/{name}', 'wb') as f:
+                f.write(self.body)
+
+    def get(self, name, **headers):
+        return self.client.get(f'/media/{name}', headers=headers)
+
+    def test_byte_ranges(self):
+        response = self.get('clip.0123456789ab.mp4', Range='bytes=100-199')
+        self.assertEqual((response.status_code, response['Content-Range']), (206, 'bytes 100-199/1024'))
+        self.assertEqual(b''.join(response.streaming_content), self.body[100:200])
+        response = self.get('clip.0123456789ab.mp4', Range='bytes=-24')
+        self.assertEqual(b''.join(response.streaming_content), self.body[-24:])
+        self.assertEqual(self.get('clip.0123456789ab.mp4', Range='bytes=5000-').status_code, 416)
+        # a stale If-Range gets the whole, current file
+        self.assertEqual(self.get('clip.0123456789ab.mp4', Range='bytes=0-9', If_Range='"old"').status_code, 200)
+
+    def test_validators_give_304(self):
+        first = self.get('clip.0123456789ab.mp4')
+        self.assertEqual(self.get('clip.0123456789ab.mp4', If_None_Match=first['ETag']).status_code, 304)
+        self.assertEqual(self.get('clip.0123456789ab.mp4', If_None_Match=f"W/{first['ETag']}").status_code, 304)
+        self.assertEqual(self.get('clip.0123456789ab.mp4', If_Modified_Since=first['Last-Modified']).status_code, 304)
+        self.assertEqual(self.get('clip.0123456789ab.mp4', If_Modified_Since=http_date(0)).status_code, 200)
+
+    def test_only_hashed_names_are_immutable(self):
+        immutable = 'public, max-age=31536000, immutable'
+        self.assertEqual(self.get('clip.0123456789ab.mp4')['Cache-Control'], immutable)
+        self.assertEqual(self.get('lesson.0123456789abcdef0123456789abcdef.mp4')['Cache-Control'], immutable)
+        # a 12-digit timestamp and a short hex word are not hashes
+        self.assertEqual(self.get('photo.202505171234.jpg')['Cache-Control'], 'public, max-age=3600')
+        self.assertEqual(self.get('notes.deadbeef.txt')['Cache-Control'], 'public, max-age=3600')
+        self.assertEqual(self.get('../settings.py').status_code, 404)
+
+
+class AsyncCatalogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user('teacher@example.com', None, first_name='Tea', last_name='Cher', is_instructor=True)
+        cls.course = Course.objects.create(
+            title='Course', description='d', duration=1, price=10, instructor=instructor,
+            courseType='Paid', what_you_will_learn='w',
+        )
+        cls.student = User.objects.create_user('student@example.com', None, first_name='Stu', last_name='Dent', is_student=True)
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def call(self, view, *args, token=None):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        return async_to_sync(view)(RequestFactory().get('/', **headers), *args)
+
+    def test_catalog_matches_the_sync_view(self):
+        response = self.call(async_views.all_courses)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['results'], self.client.get(reverse('all_courses')).json()['results'])
+
+    def test_invalid_tokens_are_rejected(self):
+        for view, args in ((async_views.all_courses, ()), (async_views.course_detail, (self.course.slug,))):
+            response = self.call(view, *args, token='not-a-jwt')
+            self.assertEqual(response.status_code, 401)
+            self.assertIn('WWW-Authenticate', response)
+        self.assertEqual(self.call(async_views.course_detail, self.course.slug).status_code, 401)
+
+    def test_course_detail_with_a_valid_token(self):
+        token = CustomTokenObtainPairSerializer.get_token(self.student).access_token
+        response = self.call(async_views.course_detail, self.course.slug, token=str(token))
+        self.assertEqual((response.status_code, json.loads(response.content)['id']), (200, self.course.id))
@@ -0,0 +1,258 @@
+import hashlib
+import os
+import posixpath
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils.text import get_valid_filename
+from django.utils.timezone import now
+
+from .models import CourseVideo, VideoUpload
+
+VIDEO_EXTENSIONS = {'.mp4', '.m4v', '.mov', '.webm', '.mkv'}
+READ_SIZE = 1024 * 1024
+
+
+class UploadError(Exception):
+    status = 400
+
+
+class InsufficientStorage(UploadError):
+    status = 507
+
+
+class ChunkInProgress(UploadError):
+    status = 409
+
+
+class OffsetMismatch(UploadError):
+    status = 409
+
+    def __init__(self, offset):
+        super().__init__(f'Upload is at offset {offset}.')
+        self.offset = offset
+
+
+class ChecksumMismatch(UploadError):
+    status = 400
+
+
+class UploadIncomplete(UploadError):
+    status = 400
+
+
+def partial_path(upload):
+    return Path(settings.VIDEO_UPLOAD_TEMP_DIR) / f'{upload.pk.hex}.part'
+
+
+def start_upload(course, instructor, title, filename, size, sha256=''):
+    temp_dir = Path(settings.VIDEO_UPLOAD_TEMP_DIR)
+    temp_dir.mkdir(parents=True, exist_ok=True)
+    if shutil.disk_usage(temp_dir).free < size:
+        raise InsufficientStorage('Not enough disk space for this upload.')
+    upload = VideoUpload.objects.create(
+        course=course, instructor=instructor, title=title, filename=filename, size=size, sha256=sha256.lower(),
+    )
+    partial_path(upload).touch()
+    return upload
+
+
+def _copy_stream(stream, f, length, digest, keep_lease):
+    remaining = length
+    while remaining:
+        data = stream.read(min(READ_SIZE, remaining))
+        if not data:
+            break
+        keep_lease()
+        f.write(data)
+        digest.update(data)
+        remaining -= len(data)
+    return length - remaining
+
+
+def _claim(upload_id, instructor):
+    """Lease an active upload to the caller and return it with ``lease`` set to the caller's token.
+
+    The lease is a single conditional UPDATE, so no transaction or row lock is held while the
+    caller streams or hashes the file. Raises ``VideoUpload.DoesNotExist`` for unknown or
+    completed uploads and ``ChunkInProgress`` while another request holds an unexpired lease.
+    """
+    token = uuid.uuid4()
+    current = now()
+    claimed = VideoUpload.objects.filter(pk=upload_id, instructor=instructor, status='Active').filter(
+        Q(lease__isnull=True) | Q(lease_expires_at__lt=current)
+    ).update(lease=token, lease_expires_at=current + settings.VIDEO_UPLOAD_LEASE)
+    upload = VideoUpload.objects.get(pk=upload_id, instructor=instructor, status='Active')
+    if not claimed:
+        raise ChunkInProgress('Another chunk is being written to this upload.')
+    return upload
+
+
+def _lease_keeper(upload):
+    """Return a callable to run before touching the file: it renews ``upload``'s lease once half of it
+    has passed and raises ``ChunkInProgress`` if the lease was lost, so a slow chunk or a long hash can
+    never keep writing after another request has claimed the upload.
+    """
+    interval = settings.VIDEO_UPLOAD_LEASE.total_seconds() / 2
+    renewed = time.monotonic()
+
+    def keep_lease():
+        nonlocal renewed
+        if time.monotonic() - renewed < interval:
+            return
+        renewed = time.monotonic()
+        kept = VideoUpload.objects.filter(pk=upload.pk, lease=upload.lease).update(
+            lease_expires_at=now() + settings.VIDEO_UPLOAD_LEASE,
+        )
+        if not kept:
+            raise ChunkInProgress('The upload lease was lost to another request; resume from the current offset.')
+
+    return keep_lease
+
+
+def _release(upload):
+    VideoUpload.objects.filter(pk=upload.pk, lease=upload.lease).update(lease=None, lease_expires_at=None)
+
+
+def append_chunk(upload_id, instructor, offset, stream, length, checksum=None):
+    """Write ``length`` bytes from ``stream`` at ``offset`` and return the new offset.
+
+    The chunk is streamed to disk in 1 MB pieces and only counted once it has fully arrived, matched
+    ``checksum`` (hex sha256, optional) and been fsynced, so the stored offset is always safe to resume from.
+    """
+    upload = _claim(upload_id, instructor)
+    try:
+        if offset != upload.offset:
+            raise OffsetMismatch(upload.offset)
+        if length <= 0 or offset + length > upload.size:
+            raise UploadError('Chunk is empty or goes past the declared upload size.')
+
+        digest = hashlib.sha256()
+        keep_lease = _lease_keeper(upload)
+        with open(partial_path(upload), 'r+b') as f:
+            # anything past the committed offset is left over from an interrupted chunk
+            f.truncate(offset)
+            f.seek(offset)
+            received = _copy_stream(stream, f, length, digest, keep_lease)
+            if received != length or (checksum and digest.hexdigest() != checksum.lower()):
+                keep_lease()
+                f.truncate(offset)
+                if received != length:
+                    raise UploadIncomplete(f'Chunk ended after {received} of {length} bytes.')
+                raise ChecksumMismatch('Chunk checksum does not match.')
+            f.flush()
+            os.fsync(f.fileno())
+
+        committed = VideoUpload.objects.filter(pk=upload.pk, lease=upload.lease, offset=offset).update(
+            offset=offset + length, lease=None, lease_expires_at=None, updated_at=now(),
+        )
+        if not committed:
+            raise ChunkInProgress('The upload lease expired while this chunk was written; resume from the current offset.')
+        return offset + length
+    finally:
+        _release(upload)
+
+
+def _file_sha256(path, keep_lease):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while data := f.read(READ_SIZE):
+            keep_lease()
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def video_name(upload):
+    stem, extension = posixpath.splitext(get_valid_filename(posixpath.basename(upload.filename)))
+    # the upload id makes the name unique and never reused, so media serving can cache it as immutable
+    return f'videos/{upload.course_id}/{stem}.{upload.pk.hex}{extension.lower()}'
+
+
+def _move(source, destination):
+    # a rename on one filesystem; shutil falls back to copy-and-delete where os.replace raises EXDEV
+    shutil.move(os.fspath(source), os.fspath(destination))
+
+
+def complete_upload(upload_id, instructor, build_url):
+    """Move a fully received upload into MEDIA_ROOT and create its ``CourseVideo``.
+
+    Copying and hashing the file happen under the upload's lease, outside any transaction. The file
+    is first staged next to its destination and the staged bytes are what get size- and digest-checked,
+    so the last step, done in one short transaction with the row changes, is a same-directory rename
+    of exactly the verified file.
+    """
+    upload = VideoUpload.objects.select_related('video').get(pk=upload_id, instructor=instructor)
+    if upload.status == 'Completed':
+        return upload.video
+    upload = _claim(upload_id, instructor)
+    source = partial_path(upload)
+    staged = None
+    try:
+        if upload.offset != upload.size:
+            raise UploadIncomplete(f'Only {upload.offset} of {upload.size} bytes have been received.')
+
+        name = video_name(upload)
+        destination = Path(default_storage.path(name))
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        staged = destination.with_name(f'{destination.name}.part')
+        _move(source, staged)
+        if staged.stat().st_size != upload.size:
+            raise UploadIncomplete(f'The stored file is {staged.stat().st_size} bytes, not {upload.size}.')
+        if upload.sha256 and _file_sha256(staged, _lease_keeper(upload)) != upload.sha256:
+            raise ChecksumMismatch('File checksum does not match.')
+
+        with transaction.atomic():
+            video = CourseVideo.objects.create(
+                course_id=upload.course_id, title=upload.title, video_url=build_url(default_storage.url(name)),
+            )
+            completed = VideoUpload.objects.filter(pk=upload.pk, lease=upload.lease).update(
+                status='Completed', video=video, lease=None, lease_expires_at=None, updated_at=now(),
+            )
+            if not completed:
+                raise ChunkInProgress('The upload lease expired while the file was being verified.')
+            # done last so a failure rolls the rows back with the staged file still in place
+            os.replace(staged, destination)
+        staged = None
+        return video
+    finally:
+        if staged is not None and staged.exists():
+            _move(staged, source)
+        _release(upload)
+
+
+def abort_upload(upload):
+    partial_path(upload).unlink(missing_ok=True)
+    upload.delete()
+
+
+def expire_uploads(older_than, dry_run=False):
+    """Delete active uploads untouched since ``older_than`` and stray partial files; returns (sessions, files)."""
+    # a live lease means a chunk is being written right now
+    stale = VideoUpload.objects.filter(status='Active', updated_at__lt=older_than).exclude(lease_expires_at__gt=now())
+    sessions = 0
+    for upload in stale.iterator():
+        sessions += 1
+        if not dry_run:
+            abort_upload(upload)
+
+    files = 0
+    temp_dir = Path(settings.VIDEO_UPLOAD_TEMP_DIR)
+    if temp_dir.is_dir():
+        active = {upload_id.hex for upload_id in VideoUpload.objects.filter(status='Active').values_list('pk', flat=True)}
+        cutoff = older_than.timestamp()
+        for path in temp_dir.glob('*.part'):
+            if path.stem not in active and path.stat().st_mtime < cutoff:
+                files += 1
+                if not dry_run:
+                    path.unlink(missing_ok=True)
+    return sessions, files
+
+
+def default_expiry():
+    return now() - settings.VIDEO_UPLOAD_EXPIRY
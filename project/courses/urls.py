@@ -1,18 +1,33 @@
+from django.conf import settings
 from django.urls import path
 from rest_framework.routers import DefaultRouter
-from . import views
-from .views import CourseDetailView,InstructorCourseListView, CourseCreateView, AllCoursesView, CourseUpdateView, CourseDeleteView, StudentEnrolledCoursesView, SubmitReviewView, CourseAdminViewSet, PaymentAdminViewSet, UpdateProgressView, CertificateView, PaymentViewSet, ReviewViewSet
+from . import async_views, views
+from .views import CourseDetailView,InstructorCourseListView, CourseCreateView, AllCoursesView, CourseUpdateView, CourseDeleteView, StudentEnrolledCoursesView, SubmitReviewView, CourseAdminViewSet, PaymentAdminViewSet, UpdateProgressView, CertificateView, CertificatePDFView, CertificateVerifyView, PaymentViewSet, ReviewViewSet, CatalogCacheStatsView, CourseSearchView, CourseStudentsView, BatchUpdateProgressView, VideoCompletionView, RecomputeProgressView, AdminExportView, RevenueAnalyticsView, CourseReviewsView, VideoUploadStartView, VideoUploadView, VideoUploadCompleteView
 urlpatterns = [
-    path('all/', AllCoursesView.as_view(), name='all_courses'),
-    path('course/<slug:slug>/', CourseDetailView.as_view(), name='course_detail'),
+    path('all/', async_views.all_courses if settings.ASYNC_API_VIEWS else AllCoursesView.as_view(), name='all_courses'),
+    path('search/', CourseSearchView.as_view(), name='course_search'),
+    path('course/<slug:slug>/', async_views.course_detail if settings.ASYNC_API_VIEWS else CourseDetailView.as_view(), name='course_detail'),
+    path('course/<slug:slug>/reviews/', CourseReviewsView.as_view(), name='course_reviews'),
     path('instructor/courses/', InstructorCourseListView.as_view(), name='instructor_courses'),
+    path('instructor/courses/<int:pk>/students/', CourseStudentsView.as_view(), name='course_students'),
+    path('instructor/courses/<int:pk>/videos/uploads/', VideoUploadStartView.as_view(), name='video_upload_start'),
+    path('instructor/video-uploads/<uuid:upload_id>/', VideoUploadView.as_view(), name='video_upload'),
+    path('instructor/video-uploads/<uuid:upload_id>/complete/', VideoUploadCompleteView.as_view(), name='video_upload_complete'),
     path('instructor/add-course/', CourseCreateView.as_view(), name='add_course'),
     path('instructor/edit-course/<int:pk>/', CourseUpdateView.as_view(), name='edit_course'),
     path('instructor/delete-course/<int:pk>/', CourseDeleteView.as_view(), name='delete_course'),
-    path('student/enrolled-courses/', StudentEnrolledCoursesView.as_view(), name='enrolled_courses'),
+    path('student/enrolled-courses/', async_views.enrolled_courses if settings.ASYNC_API_VIEWS else StudentEnrolledCoursesView.as_view(), name='enrolled_courses'),
     path('student/review/', SubmitReviewView.as_view(), name='submit-review'),
     path('student/update-progress/', UpdateProgressView.as_view(), name='update_progress'),
+    path('student/update-progress/batch/', BatchUpdateProgressView.as_view(), name='update_progress_batch'),
+    path('student/courses/<int:course_id>/videos/completed/', VideoCompletionView.as_view(), name='video_completion'),
+    path('student/courses/<int:course_id>/progress/recompute/', RecomputeProgressView.as_view(), name='recompute_progress'),
     path('student/certificate/<int:course_id>/', CertificateView.as_view(), name='get_certificate'),   
+    path('student/certificate/<int:course_id>/pdf/', CertificatePDFView.as_view(), name='certificate_pdf'),
+    path('certificate/verify/<str:digest>/', CertificateVerifyView.as_view(), name='verify_certificate'),
+    path('analytics/revenue/', RevenueAnalyticsView.as_view(), name='revenue_analytics'),
+    path('admin/exports/<str:dataset>/', AdminExportView.as_view(), name='admin_export'),
+    path('admin/cache-stats/', CatalogCacheStatsView.as_view(), name='catalog_cache_stats'),
 ]
 
 router = DefaultRouter()
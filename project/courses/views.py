@@ -2,62 +2,233 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count
+from rest_framework.exceptions import ValidationError, NotFound
 from django.core.exceptions import PermissionDenied
 from rest_framework.generics import UpdateAPIView, DestroyAPIView, ListAPIView
 from django.utils.timezone import now
+from datetime import timedelta
+from django.db.models import Q
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.conf import settings
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
 
 from rest_framework import permissions
-from .models import Course, Enrollment, Student, Review, Payment
-from .serializers import CourseSerializer, ReviewCreateSerializer, PaymentSerializer, ReviewSerializer
+from .models import Certificate, VideoUpload, Course, CourseStats, Enrollment, Student, Review, Payment, DailyRevenue, DailyEnrollments
+from .serializers import CourseVideoSerializer, VideoUploadSerializer, VideoUploadStartSerializer, CourseSerializer, PaymentSerializer, ReviewSerializer, CourseRosterSerializer, EnrolledCourseSerializer, ReviewIngestSerializer, ReviewImportSerializer
+from .reviews import BULK_IMPORT_MAX_ROWS, insert_review, bulk_insert_reviews, NotEnrolled, AlreadyReviewed
+from .pagination import CourseCursorPagination, RosterCursorPagination, EnrollmentCursorPagination, RecordCursorPagination, ReviewFeedCursorPagination
+from .filters import filter_payments, filter_reviews, DATASET_FILTERS
+from .exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, EXPORTS, export_rows, streaming_export
+from .progress import record_progress, mark_videos_completed, recompute_progress, video_positions, completed_video_ids, tracks_videos, video_tracked_courses
+from .uploads import UploadError, OffsetMismatch, start_upload, append_chunk, complete_upload, abort_upload
+from .certificates import enrollment_certificate_payload, issue_certificate
+from .cache import cached_catalog_data, catalog_cache_stats
+from .search import search_course_ids
+from .rollups import INTERVALS, revenue_series, enrollment_series
+from .fx import base_currency, convert_daily_totals, daily_revenue_groups
+from .filters import filter_rollups
 from users.permissions import IsStudent, IsInstructor, IsAdmin
 
-from courses import serializers
 
-class AllCoursesView(APIView):
+class AllCoursesView(ListAPIView):
+    serializer_class = CourseSerializer
     permission_classes = []
-    def get(self, request):
-        courses = Course.objects.all()
-        serializer = CourseSerializer(courses, many=True)
-        return Response(serializer.data)
+    pagination_class = CourseCursorPagination
+
+    def get_queryset(self):
+        return Course.objects.select_related('stats').prefetch_related('videos')
+
+    def list(self, request, *args, **kwargs):
+        # the page carries absolute next/previous links, so key on the URL they are built from
+        data, hit = cached_catalog_data(
+            'all_courses',
+            [self.paginator.canonical_url(request)],
+            lambda: super(AllCoursesView, self).list(request, *args, **kwargs).data,
+        )
+        return Response(data, headers={'X-Cache': 'HIT' if hit else 'MISS'})
 
 class CourseDetailView(APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request, slug):
+        def load_course():
+            course = Course.objects.select_related('stats').prefetch_related('videos').get(slug=slug)
+            return CourseSerializer(course).data
+
         try:
-            course = Course.objects.annotate(
-                students_count=Count('enrollment')
-            ).get(slug=slug)
+            course_data, hit = cached_catalog_data('course_detail', [slug], load_course)
+        except Course.DoesNotExist:
+            return Response({'error': 'Course not found'}, status=status.HTTP_404_NOT_FOUND)
 
-            user = request.user
+        user = request.user
+        headers = {'X-Cache': 'HIT' if hit else 'MISS'}
 
-            course_data = CourseSerializer(course).data
-            course_data['students_count'] = course.students_count
+        if user.is_student:
+            return Response(course_data, headers=headers)
 
-            if user.is_student:
-                return Response(course_data)
+        elif user.is_instructor:
+            if course_data['instructor'] == user.id:
+                # the roster itself is paginated separately so this payload stays small
+                students_url = request.build_absolute_uri(reverse('course_students', args=[course_data['id']]))
+                course_data = dict(course_data, enrolled_students_url=students_url)
+            return Response(course_data, headers=headers)
 
-            elif user.is_instructor:
-                if course.instructor == user:
-                    enrolled_students = Student.objects.filter(enrollment__course=course).values('user__username', 'user__email')
-                    course_data['enrolled_students'] = list(enrolled_students)
-                return Response(course_data)
+        else:
+            return Response(
+                {"error": "Invalid user type."},
+                status=status.HTTP_403_FORBIDDEN
+            )
 
-            else:
-                return Response(
-                    {"error": "Invalid user type."},
-                    status=status.HTTP_403_FORBIDDEN
-                )
+class CourseStudentsView(ListAPIView):
+    serializer_class = CourseRosterSerializer
+    permission_classes = [IsAuthenticated, IsInstructor]
+    pagination_class = RosterCursorPagination
+    export_fields = ('id', 'student_id', 'email', 'first_name', 'last_name', 'date', 'progress', 'status')
 
-        except Course.DoesNotExist:
-            return Response({'error': 'Course not found'}, status=status.HTTP_404_NOT_FOUND)
+    def get_queryset(self):
+        course = get_object_or_404(Course.objects.only('id', 'instructor_id'), pk=self.kwargs['pk'])
+        if course.instructor_id != self.request.user.id:
+            raise PermissionDenied("You can only view students of your own courses.")
+
+        enrollments = Enrollment.objects.filter(course_id=course.id).select_related('student__user')
+        search = self.request.query_params.get('search', '').strip()
+        if search:
+            enrollments = enrollments.filter(
+                Q(student__user__email__icontains=search)
+                | Q(student__user__first_name__icontains=search)
+                | Q(student__user__last_name__icontains=search)
+            )
+        return enrollments
+
+    def list(self, request, *args, **kwargs):
+        export = request.query_params.get('export')
+        if export is None:
+            return super().list(request, *args, **kwargs)
+        if export not in EXPORT_FORMATS:
+            return Response({'error': f'Unsupported export format. Use one of: {", ".join(EXPORT_FORMATS)}.'}, status=400)
+
+        rows = self.get_queryset().order_by('id').values_list(
+            'id', 'student_id', 'student__user__email', 'student__user__first_name',
+            'student__user__last_name', 'date', 'progress', 'status',
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        return streaming_export(self.export_fields, rows, export, f"course-{self.kwargs['pk']}-students")
+
+class AdminExportView(APIView):
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request, dataset):
+        if dataset not in EXPORTS:
+            return Response({'error': f'Unknown export. Use one of: {", ".join(EXPORTS)}.'}, status=404)
+        export = request.query_params.get('export', 'csv')
+        if export not in EXPORT_FORMATS:
+            return Response({'error': f'Unsupported export format. Use one of: {", ".join(EXPORT_FORMATS)}.'}, status=400)
+
+        model, columns = EXPORTS[dataset]
+        queryset = DATASET_FILTERS[dataset](model.objects.all(), request.query_params)
+        header, rows = export_rows(queryset, columns)
+        compress = request.query_params.get('gzip') in ('1', 'true')
+        return streaming_export(header, rows, export, dataset, compress=compress)
+
+class RevenueAnalyticsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        if not (user.is_superuser or user.is_instructor):
+            return Response({'error': 'Only admins and instructors can view analytics.'}, status=status.HTTP_403_FORBIDDEN)
+
+        interval = request.query_params.get('interval', 'day')
+        if interval not in INTERVALS:
+            return Response({'error': f'"interval" must be one of: {", ".join(INTERVALS)}.'}, status=400)
+
+        params = request.query_params.copy()
+        params.setdefault('date_from', (now().date() - timedelta(days=30)).isoformat())
+        revenue = filter_rollups(DailyRevenue.objects.all(), params)
+        enrollments = filter_rollups(DailyEnrollments.objects.all(), params)
+        if not user.is_superuser:
+            revenue = revenue.filter(instructor=user)
+            enrollments = enrollments.filter(instructor=user)
+        if params.get('currency'):
+            revenue = revenue.filter(currency=params['currency'].upper())
+
+        normalized, unconverted = convert_daily_totals(daily_revenue_groups(revenue), interval)
+
+        return Response({
+            'interval': interval,
+            'date_from': params['date_from'],
+            'date_to': params.get('date_to'),
+            'revenue': revenue_series(revenue, interval),
+            'normalized_revenue': {
+                'currency': base_currency(),
+                'series': [{'period': period, 'revenue': total} for period, total in normalized.items()],
+                'unconverted_currencies': unconverted,
+            },
+            'enrollments': enrollment_series(enrollments, interval),
+        })
+
+class CourseReviewsView(ListAPIView):
+    serializer_class = ReviewSerializer
+    permission_classes = []
+    pagination_class = ReviewFeedCursorPagination
+
+    def get_course(self):
+        if not hasattr(self, '_course'):
+            course = Course.objects.filter(slug=self.kwargs['slug']).select_related('stats').first()
+            if course is None:
+                raise NotFound('Course not found')
+            self._course = course
+        return self._course
+
+    def get_queryset(self):
+        return Review.objects.filter(course=self.get_course()).select_related('student__user', 'course')
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        # the histogram comes from the maintained CourseStats row, not a GROUP BY over reviews
+        stats = getattr(self.get_course(), 'stats', None) or CourseStats()
+        response.data['summary'] = {
+            'review_count': stats.review_count,
+            'rating_average': stats.rating_average,
+            'histogram': stats.rating_histogram,
+        }
+        return response
+
+class CourseSearchView(APIView):
+    permission_classes = []
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'The "q" query parameter is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            return Response({'error': '"limit" must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        ranked = search_course_ids(query, limit)
+        courses = Course.objects.select_related('stats').prefetch_related('videos').in_bulk([course_id for course_id, _ in ranked])
+        results = []
+        for course_id, rank in ranked:
+            if course_id in courses:
+                data = CourseSerializer(courses[course_id]).data
+                data['rank'] = round(float(rank), 6)
+                results.append(data)
+        return Response({'query': query, 'count': len(results), 'results': results})
+
+class CatalogCacheStatsView(APIView):
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        return Response(catalog_cache_stats())
 
 class InstructorCourseListView(APIView):
     permission_classes = [IsAuthenticated, IsInstructor]
 
     def get(self, request):
-        courses = Course.objects.filter(instructor=request.user)
+        courses = Course.objects.filter(instructor=request.user).select_related('stats').prefetch_related('videos')
         serializer = CourseSerializer(courses, many=True)
         return Response(serializer.data)
 
@@ -91,127 +262,386 @@ class CourseDeleteView(DestroyAPIView):
             raise PermissionDenied("You can only delete your own courses.")
         instance.delete()
 
+class VideoUploadStartView(APIView):
+    permission_classes = [IsAuthenticated, IsInstructor]
+
+    def post(self, request, pk):
+        course = get_object_or_404(Course.objects.only('id', 'instructor_id'), pk=pk)
+        if course.instructor_id != request.user.id:
+            raise PermissionDenied("You can only upload videos to your own courses.")
+        serializer = VideoUploadStartSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            upload = start_upload(course, request.user, **serializer.validated_data)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=e.status)
+        data = VideoUploadSerializer(upload).data
+        data['chunk_size'] = settings.VIDEO_UPLOAD_CHUNK_SIZE
+        data['upload_url'] = request.build_absolute_uri(reverse('video_upload', args=[upload.pk]))
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class VideoUploadView(APIView):
+    """Resumable upload session.
+
+    GET returns the committed offset to resume from. PUT appends the raw request body at the
+    ``Upload-Offset`` header, optionally checked against ``Upload-Checksum: sha256 <hex>``.
+    DELETE abandons the upload.
+    """
+    permission_classes = [IsAuthenticated, IsInstructor]
+
+    def get_upload(self, upload_id):
+        return get_object_or_404(VideoUpload, pk=upload_id, instructor=self.request.user)
+
+    def get(self, request, upload_id):
+        upload = self.get_upload(upload_id)
+        return Response(VideoUploadSerializer(upload).data, headers={'Upload-Offset': str(upload.offset)})
+
+    def put(self, request, upload_id):
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            return Response({'error': 'Upload-Offset and Content-Length headers are required.'}, status=400)
+        if length > settings.VIDEO_UPLOAD_MAX_CHUNK_SIZE:
+            return Response({'error': f'Chunks are limited to {settings.VIDEO_UPLOAD_MAX_CHUNK_SIZE} bytes.'}, status=413)
+        checksum = None
+        if 'Upload-Checksum' in request.headers:
+            algorithm, _, checksum = request.headers['Upload-Checksum'].partition(' ')
+            if algorithm.lower() != 'sha256' or not checksum:
+                return Response({'error': 'Upload-Checksum must be "sha256 <hex digest>".'}, status=400)
+
+        self.get_upload(upload_id)
+        try:
+            # the body is read straight off the socket; request.data is never touched, so nothing is buffered
+            new_offset = append_chunk(upload_id, request.user, offset, request.stream, length, checksum)
+        except OffsetMismatch as e:
+            return Response({'error': str(e), 'offset': e.offset}, status=e.status, headers={'Upload-Offset': str(e.offset)})
+        except VideoUpload.DoesNotExist:
+            return Response({'error': 'Upload is already completed.'}, status=409)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=e.status)
+        return Response({'offset': new_offset}, headers={'Upload-Offset': str(new_offset)})
+
+    def delete(self, request, upload_id):
+        upload = self.get_upload(upload_id)
+        if upload.status == 'Completed':
+            return Response({'error': 'Upload is already completed.'}, status=409)
+        abort_upload(upload)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class VideoUploadCompleteView(APIView):
+    permission_classes = [IsAuthenticated, IsInstructor]
+
+    def post(self, request, upload_id):
+        get_object_or_404(VideoUpload, pk=upload_id, instructor=request.user)
+        try:
+            video = complete_upload(upload_id, request.user, request.build_absolute_uri)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=e.status)
+        return Response(CourseVideoSerializer(video).data, status=status.HTTP_201_CREATED)
+
+
 class StudentEnrolledCoursesView(ListAPIView):
-    serializer_class = CourseSerializer
+    serializer_class = EnrolledCourseSerializer
     permission_classes = [IsAuthenticated, IsStudent]
+    pagination_class = EnrollmentCursorPagination
 
     def get_queryset(self):
         student = self.request.user.student_profile 
-        enrollments = Enrollment.objects.filter(student=student)
-        return Course.objects.filter(id__in=enrollments.values_list('course_id', flat=True))
+        enrollments = Enrollment.objects.filter(student=student).select_related(
+            'course', 'course__stats'
+        ).prefetch_related('course__videos').defer('completed_videos')
+
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            valid = dict(Enrollment._meta.get_field('status').choices)
+            if status_filter not in valid:
+                raise ValidationError({'status': f'Must be one of: {", ".join(valid)}.'})
+            enrollments = enrollments.filter(status=status_filter)
+        return enrollments
 
 class SubmitReviewView(APIView):
     permission_classes = [IsAuthenticated, IsStudent]
 
     def post(self, request):
-        serializer = ReviewCreateSerializer(data=request.data)
+        serializer = ReviewIngestSerializer(data=request.data)
         if serializer.is_valid():
-            student = request.user.student_profile
-            course = serializer.validated_data['course']
-
-            is_enrolled = Enrollment.objects.filter(student=student, course=course).exists()
-            if not is_enrolled:
+            data = serializer.validated_data
+            try:
+                review = insert_review(request.user.student_profile.id, data['course'], now().date(), data['rating'], data['comment'])
+            except NotEnrolled:
                 return Response({'error': 'You are not enrolled in this course.'}, status=403)
-            
-            if Review.objects.filter(student=student, course=course).exists():
+            except AlreadyReviewed:
                 return Response({'error': 'You have already submitted a review for this course.'}, status=400)
-            
-            Review.objects.create(student=student, course=course, date=now().date(), rating=serializer.validated_data['rating'], comment=serializer.validated_data['comment'])
-            return Response({'message': 'Review submitted successfully.'}, status=201)
+            return Response({'message': 'Review submitted successfully.', 'id': review.id}, status=201)
 
         return Response(serializer.errors, status=400)
+def payments_with_relations():
+    return Payment.objects.select_related('enrollment__course', 'enrollment__student__user')
+
+def reviews_with_relations():
+    return Review.objects.select_related('student__user', 'course')
+
 class PaymentViewSet(viewsets.ModelViewSet):
-    queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
     permission_classes = [IsAuthenticated]
-        
+    pagination_class = RecordCursorPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_superuser:
+            payments = payments_with_relations()
+        elif user.is_student:
+            payments = payments_with_relations().filter(enrollment__student=user.student_profile)
+        else:
+            payments = Payment.objects.none()
+        return filter_payments(payments, self.request.query_params)
 
 
 class CourseAdminViewSet(viewsets.ModelViewSet):
-    queryset = Course.objects.all()
+    queryset = Course.objects.select_related('stats').prefetch_related('videos')
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticated, IsAdmin]
 
 class PaymentAdminViewSet(viewsets.ModelViewSet):
-    queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
     permission_classes = [IsAuthenticated, IsAdmin]
+    pagination_class = RecordCursorPagination
+
     def get_queryset(self):
-        user = self.request.user
-        if user.is_superuser or user.is_admin:
-            return Payment.objects.all()
-        elif user.is_student:
-            return Payment.objects.filter(enrollment__student=user.student_profile)
-        return Payment.objects.none()
+        return filter_payments(payments_with_relations(), self.request.query_params)
 
     
 
+def parse_progress(value):
+    progress = float(value)
+    if not (0 <= progress <= 100):
+        raise ValueError
+    return progress
+
 class UpdateProgressView(APIView):
     permission_classes = [IsAuthenticated, IsStudent]
 
     def post(self, request):
-        course_id = request.data.get("course_id")
-        progress = request.data.get("progress") 
-
-        if not (0 <= float(progress) <= 100):
+        try:
+            course_id = int(request.data.get("course_id"))
+        except (TypeError, ValueError):
+            return Response({'error': 'course_id must be an integer.'}, status=400)
+        try:
+            progress = parse_progress(request.data.get("progress"))
+        except (TypeError, ValueError):
             return Response({'error': 'Progress must be between 0 and 100'}, status=400)
 
+        student = request.user.student_profile
+        updated = record_progress(student.id, {course_id: progress})
+        if updated is None:
+            return Response({'message': 'Progress accepted.'}, status=202)
+        if not updated:
+            # nothing changed: there is no enrollment, the course tracks videos, or the stored progress is already ahead
+            video_tracked = (
+                Enrollment.objects.filter(student=student, course_id=course_id)
+                .annotate(video_tracked=tracks_videos()).values_list('video_tracked', flat=True).first()
+            )
+            if video_tracked is None:
+                return Response({'error': 'Enrollment not found'}, status=404)
+            if video_tracked:
+                return Response({
+                    'error': 'This course tracks progress per video; mark videos completed instead.',
+                    'completion_url': request.build_absolute_uri(reverse('video_completion', args=[course_id])),
+                }, status=409)
+        return Response({'message': 'Progress updated successfully.'})
+
+class BatchUpdateProgressView(APIView):
+    permission_classes = [IsAuthenticated, IsStudent]
+    max_batch_size = 100
+
+    def post(self, request):
+        items = request.data.get("updates")
+        if not isinstance(items, list) or not items:
+            return Response({'error': '"updates" must be a non-empty list of {course_id, progress} objects.'}, status=400)
+        if len(items) > self.max_batch_size:
+            return Response({'error': f'At most {self.max_batch_size} updates per request.'}, status=400)
+
+        updates = {}
+        try:
+            for item in items:
+                course_id = int(item["course_id"])
+                updates[course_id] = max(parse_progress(item["progress"]), updates.get(course_id, 0.0))
+        except (KeyError, TypeError, ValueError):
+            return Response({'error': 'Each update needs an integer course_id and a progress between 0 and 100.'}, status=400)
+
+        updated = record_progress(request.user.student_profile.id, updates)
+        if updated is None:
+            return Response({'received': len(items), 'courses': len(updates)}, status=202)
+        # courses with videos only take progress from completed videos (see VideoCompletionView)
+        ignored = len(video_tracked_courses(updates)) if updated < len(updates) else 0
+        return Response({'received': len(items), 'courses': len(updates), 'updated': updated, 'ignored': ignored})
+
+def completion_payload(enrollment, positions):
+    return {
+        'course_id': enrollment.course_id,
+        'completed_videos': completed_video_ids(enrollment, positions),
+        'total_videos': len(positions),
+        'progress': enrollment.progress,
+        'status': enrollment.status,
+    }
+
+class VideoCompletionView(APIView):
+    permission_classes = [IsAuthenticated, IsStudent]
+
+    def get(self, request, course_id):
+        try:
+            enrollment = Enrollment.objects.get(student=request.user.student_profile, course_id=course_id)
+        except Enrollment.DoesNotExist:
+            return Response({'error': 'Enrollment not found'}, status=404)
+        return Response(completion_payload(enrollment, video_positions(course_id)))
+
+    def post(self, request, course_id):
+        video_ids = request.data.get('video_ids')
+        if not isinstance(video_ids, list) or not video_ids:
+            return Response({'error': '"video_ids" must be a non-empty list.'}, status=400)
         try:
-            student = request.user.student_profile
-            enrollment = Enrollment.objects.get(student=student, course_id=course_id)
-            enrollment.progress = progress
-            enrollment.save()
-            return Response({'message': 'Progress updated successfully.'})
+            video_ids = {int(video_id) for video_id in video_ids}
+            enrollment, positions = mark_videos_completed(request.user.student_profile.id, course_id, video_ids)
         except Enrollment.DoesNotExist:
             return Response({'error': 'Enrollment not found'}, status=404)
+        except (TypeError, ValueError) as e:
+            return Response({'error': str(e)}, status=400)
+        return Response(completion_payload(enrollment, positions))
+
+class RecomputeProgressView(APIView):
+    permission_classes = [IsAuthenticated, IsStudent]
+
+    def post(self, request, course_id):
+        try:
+            enrollment, positions = recompute_progress(request.user.student_profile.id, course_id)
+        except Enrollment.DoesNotExist:
+            return Response({'error': 'Enrollment not found'}, status=404)
+        return Response(completion_payload(enrollment, positions))
+
+def completed_enrollment(request, course_id):
+    """The caller's enrollment in ``course_id`` if it is completed, else ``(None, error_response)``."""
+    student = request.user.student_profile
+    try:
+        enrollment = Enrollment.objects.select_related('course', 'certificate').get(student=student, course_id=course_id)
+    except Enrollment.DoesNotExist:
+        return None, Response({'error': 'Enrollment not found'}, status=404)
+    if enrollment.status != 'Completed' and enrollment.progress < 100:
+        return None, Response({'error': 'Course is not completed yet.'}, status=400)
+    enrollment.student = student
+    return enrollment, None
+
 
 class CertificateView(APIView):
     permission_classes = [IsAuthenticated, IsStudent]
 
     def get(self, request, course_id):
-        try:
-            student = request.user.student_profile
-            enrollment = Enrollment.objects.get(student=student, course_id=course_id)
+        enrollment, error = completed_enrollment(request, course_id)
+        if error:
+            return error
 
-            if enrollment.progress < 100:
-                return Response({'error': 'Course is not completed yet.'}, status=400)
+        payload = enrollment_certificate_payload(enrollment)
+        issue_certificate(enrollment, payload)
 
-            full_name = f"{request.user.first_name} {request.user.last_name}"
-            course_title = enrollment.course.title
-            date = enrollment.date.strftime("%Y-%m-%d")
+        return Response({
+            "message": "Certificate generated successfully.",
+            "name": payload['name'],
+            "course": payload['course_title'],
+            "completion_date": payload['completion_date'],
+            "certificate_id": payload['digest'],
+            "download_url": request.build_absolute_uri(reverse('certificate_pdf', args=[course_id])),
+            "verify_url": request.build_absolute_uri(reverse('verify_certificate', args=[payload['digest']])),
+        })
 
-            return Response({
-                "message": "Certificate generated successfully.",
-                "name": full_name,
-                "course": course_title,
-                "completion_date": date,
-            })
 
-        except Enrollment.DoesNotExist:
-            return Response({'error': 'Enrollment not found'}, status=404)
-        
+class CertificatePDFView(APIView):
+    permission_classes = [IsAuthenticated, IsStudent]
+
+    def get(self, request, course_id):
+        enrollment, error = completed_enrollment(request, course_id)
+        if error:
+            return error
+
+        # the digest covers everything printed on the PDF, so it is a strong ETag that is known before touching disk
+        payload = enrollment_certificate_payload(enrollment)
+        etag = quote_etag(payload['digest'])
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            issue_certificate(enrollment, payload)
+            response = FileResponse(
+                open(payload['path'], 'rb'), content_type='application/pdf',
+                as_attachment=True, filename=f"certificate-{enrollment.course.slug}.pdf",
+            )
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, max-age=86400'
+        return response
+
+
+class CertificateVerifyView(APIView):
+    permission_classes = []
+
+    def get(self, request, digest):
+        certificate = (
+            Certificate.objects.select_related('enrollment__course', 'enrollment__student__user')
+            .filter(digest=digest.lower()).first()
+        )
+        payload = certificate and enrollment_certificate_payload(certificate.enrollment)
+        # a certificate whose printed details no longer match the records has been superseded
+        if payload is None or payload['digest'] != certificate.digest:
+            return Response({'valid': False, 'error': 'Certificate not found'}, status=404)
+
+        return Response({
+            'valid': True,
+            'certificate_id': certificate.digest,
+            'name': payload['name'],
+            'course': payload['course_title'],
+            'completion_date': payload['completion_date'],
+            'issued_at': certificate.issued_at,
+        })
+
 class ReviewViewSet(viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = RecordCursorPagination
 
     def get_queryset(self):
         user = self.request.user
-        if user.is_superuser or user.is_admin:
-            return Review.objects.all()
+        if user.is_superuser:
+            reviews = reviews_with_relations()
         elif user.is_student:
-            return Review.objects.filter(student=user.student_profile)
-        return Review.objects.none()
-
-    def perform_create(self, serializer):
-        user = self.request.user
-        course = serializer.validated_data['course']
-        student = user.student_profile
-
-        if Review.objects.filter(course=course, student=student).exists():
-            raise serializers.ValidationError("You have already reviewed this course.")
-
-        if not Enrollment.objects.filter(course=course, student=student).exists():
-            raise serializers.ValidationError("You must be enrolled in the course to leave a review.")
-
-        serializer.save(student=student)
-
+            reviews = reviews_with_relations().filter(student=user.student_profile)
+        else:
+            reviews = Review.objects.none()
+        return filter_reviews(reviews, self.request.query_params)
+
+    def create(self, request, *args, **kwargs):
+        if not request.user.is_student:
+            raise PermissionDenied("Only students can leave reviews.")
+        serializer = ReviewIngestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            review = insert_review(request.user.student_profile.id, data['course'], now().date(), data['rating'], data['comment'])
+        except NotEnrolled:
+            raise ValidationError("You must be enrolled in the course to leave a review.")
+        except AlreadyReviewed:
+            raise ValidationError("You have already reviewed this course.")
+        return Response({'id': review.id, 'course': review.course_id, 'rating': review.rating, 'comment': review.comment, 'date': review.date}, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path='import', permission_classes=[IsAuthenticated, IsAdmin])
+    def bulk_import(self, request):
+        serializer = ReviewImportSerializer(data=request.data, many=True, max_length=BULK_IMPORT_MAX_ROWS)
+        serializer.is_valid(raise_exception=True)
+        today = now().date()
+        rows = [
+            (item['student'], item['course'], item.get('date', today), item['rating'], item['comment'])
+            for item in serializer.validated_data
+        ]
+        created = bulk_insert_reviews(rows)
+        return Response(
+            {'received': len(rows), 'created': len(created), 'skipped': len(rows) - len(created), 'ids': created},
+            status=status.HTTP_201_CREATED,
+        )
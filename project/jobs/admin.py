@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'queue', 'status', 'attempts', 'run_at', 'created_at')
+    list_filter = ('status', 'queue', 'task')
@@ -0,0 +1,62 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.queue import run_pending, work
+
+
+def _worker(queue, batch_size, poll_interval):
+    stop = multiprocessing.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    signal.signal(signal.SIGINT, lambda *args: stop.set())
+    try:
+        work(queue, batch_size, poll_interval, should_stop=stop.is_set)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Run background job workers, each in its own process, until interrupted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help='Number of worker processes.')
+        parser.add_argument('--queue', default='default', help='Queue to consume.')
+        parser.add_argument('--batch-size', type=int, default=50, help='Jobs claimed per round trip.')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Run every due job in this process and exit.')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            succeeded, failed = run_pending(options['queue'], options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Ran {succeeded + failed} jobs: {succeeded} succeeded, {failed} failed.'))
+            return
+
+        # children must open their own database connections
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(
+                target=_worker, name=f'job-worker-{n}',
+                args=(options['queue'], options['batch_size'], options['poll_interval']),
+            )
+            for n in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f"Started {len(processes)} workers on queue '{options['queue']}'.")
+
+        def stop(*args):
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+
+        signal.signal(signal.SIGTERM, stop)
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            stop()
+            for process in processes:
+                process.join()
+        self.stdout.write('Workers stopped.')
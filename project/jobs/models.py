@@ -0,0 +1,25 @@
+from django.db import models
+from django.utils.timezone import now
+
+
+class Job(models.Model):
+    """A unit of background work; rows are deleted once they succeed and kept when they fail for good."""
+    STATUS_CHOICES = [('Queued', 'Queued'), ('Running', 'Running'), ('Failed', 'Failed')]
+
+    queue = models.CharField(max_length=50, default='default')
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['queue', 'status', 'run_at'], name='job_claim_idx')]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
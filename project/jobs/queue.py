@@ -0,0 +1,145 @@
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils.timezone import now
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# task name -> (handler, batched)
+_registry = {}
+
+
+def task(name, batched=False):
+    """Register a handler for ``name``.
+
+    A plain handler is called with one payload. A ``batched`` handler is called with every claimed
+    payload of that task at once and returns a list of ``None`` (success) or exception per payload,
+    so it can share expensive setup such as an SMTP connection.
+    """
+    def register(func):
+        _registry[name] = (func, batched)
+        return func
+    return register
+
+
+def enqueue(name, payload=None, queue='default', delay=None, max_attempts=None):
+    """Queue a job; it is committed with (and only with) the caller's transaction."""
+    if name not in _registry:
+        raise ValueError(f'Unknown task {name!r}.')
+    return Job.objects.create(
+        task=name, payload=payload or {}, queue=queue,
+        run_at=now() + (delay or timedelta()),
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+
+
+def backoff(attempts):
+    """Exponential delay before retry number ``attempts``, with jitter so failed batches spread out."""
+    base = settings.JOBS_RETRY_BASE_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(base, settings.JOBS_RETRY_MAX_DELAY) * random.uniform(0.8, 1.2))
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(queue='default', limit=50, worker=None):
+    """Lock up to ``limit`` due jobs for this worker; concurrent workers skip rows already being claimed."""
+    current = now()
+    # jobs left Running by a worker that died are picked up again once their lock is stale
+    due = Q(status='Queued', run_at__lte=current) | Q(status='Running', locked_at__lt=current - settings.JOBS_LOCK_TIMEOUT)
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(due, queue=queue).order_by('run_at', 'id')[:limit]
+        )
+        if jobs:
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                status='Running', locked_at=current, locked_by=worker or worker_name(), attempts=F('attempts') + 1,
+            )
+    for job in jobs:
+        job.attempts += 1
+    return jobs
+
+
+def _finish(job, error):
+    if error is None:
+        Job.objects.filter(pk=job.pk).delete()
+        return True
+    message = ''.join(traceback.format_exception(error)) if isinstance(error, BaseException) else str(error)
+    if job.attempts >= job.max_attempts:
+        Job.objects.filter(pk=job.pk).update(status='Failed', last_error=message, locked_at=None)
+        logger.error('Job %s (%s) failed permanently after %s attempts', job.pk, job.task, job.attempts)
+    else:
+        Job.objects.filter(pk=job.pk).update(
+            status='Queued', last_error=message, locked_at=None, run_at=now() + backoff(job.attempts),
+        )
+        logger.warning('Job %s (%s) failed, attempt %s of %s', job.pk, job.task, job.attempts, job.max_attempts)
+    return False
+
+
+def run_jobs(jobs):
+    """Execute claimed jobs, grouping batched tasks into one handler call; returns (succeeded, failed)."""
+    by_task = {}
+    for job in jobs:
+        by_task.setdefault(job.task, []).append(job)
+    succeeded = failed = 0
+    for name, group in by_task.items():
+        if name not in _registry:
+            errors = [f'Unknown task {name!r}.'] * len(group)
+        else:
+            handler, batched = _registry[name]
+            if batched:
+                try:
+                    errors = handler([job.payload for job in group])
+                except Exception as exc:
+                    errors = [exc] * len(group)
+            else:
+                errors = []
+                for job in group:
+                    try:
+                        handler(job.payload)
+                        errors.append(None)
+                    except Exception as exc:
+                        errors.append(exc)
+        for job, error in zip(group, errors):
+            if _finish(job, error):
+                succeeded += 1
+            else:
+                failed += 1
+    return succeeded, failed
+
+
+def run_pending(queue='default', batch_size=50):
+    """Drain every job that is due right now, in this process. Handy in tests and cron jobs."""
+    succeeded = failed = 0
+    while jobs := claim(queue, batch_size):
+        ok, ko = run_jobs(jobs)
+        succeeded += ok
+        failed += ko
+    return succeeded, failed
+
+
+def work(queue='default', batch_size=50, poll_interval=1.0, should_stop=lambda: False):
+    """Worker loop: claim and run batches, sleeping only when the queue is empty."""
+    worker = worker_name()
+    while not should_stop():
+        try:
+            jobs = claim(queue, batch_size, worker)
+        except Exception:
+            logger.exception('Could not claim jobs')
+            jobs = []
+        if jobs:
+            run_jobs(jobs)
+        else:
+            time.sleep(poll_interval)
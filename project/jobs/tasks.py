@@ -0,0 +1,36 @@
+from django.core.mail import EmailMessage, get_connection
+
+from .queue import enqueue, task
+
+
+@task('send_email', batched=True)
+def send_emails(payloads):
+    """Send every queued email of a batch over a single SMTP connection."""
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        return [exc] * len(payloads)
+    errors = []
+    try:
+        for payload in payloads:
+            message = EmailMessage(
+                subject=payload['subject'], body=payload['body'], from_email=payload.get('from_email'),
+                to=payload['to'], reply_to=payload.get('reply_to'), connection=connection,
+            )
+            try:
+                message.send()
+                errors.append(None)
+            except Exception as exc:
+                errors.append(exc)
+    finally:
+        connection.close()
+    return errors
+
+
+def enqueue_email(subject, message, recipient_list, from_email=None, reply_to=None):
+    """Queue an email instead of talking to SMTP inside the request."""
+    return enqueue('send_email', {
+        'subject': subject, 'body': message, 'from_email': from_email, 'to': list(recipient_list),
+        'reply_to': list(reply_to) if reply_to else None,
+    })
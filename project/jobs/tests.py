@@ -0,0 +1,65 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from users.models import User
+from .models import Job
+from .queue import claim, run_pending
+from .tasks import enqueue_email
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class EmailJobTests(TestCase):
+    def test_contact_form_is_queued_then_sent(self):
+        response = APIClient().post('/contact/contact/', {
+            'firstName': 'Ada', 'lastName': 'Lovelace', 'email': 'ada@example.com', 'message': 'Hello',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Job.objects.filter(task='send_email').count(), 1)
+
+        self.assertEqual(run_pending(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].reply_to, ['ada@example.com'])
+        self.assertFalse(Job.objects.exists())
+
+    def test_password_reset_is_queued(self):
+        User.objects.create_user('reset@example.com', None, first_name='Re', last_name='Set')
+        response = APIClient().post('/users/api/reset-password/', {'email': 'reset@example.com'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        run_pending()
+        self.assertEqual(mail.outbox[0].to, ['reset@example.com'])
+        self.assertIn('uid=', mail.outbox[0].body)
+
+    def test_batch_shares_one_connection(self):
+        for n in range(3):
+            enqueue_email('Hi', 'body', [f'user{n}@example.com'])
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.open') as opened:
+            run_pending()
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_failures_are_retried_with_backoff_then_given_up(self):
+        job = enqueue_email('Hi', 'body', ['user@example.com'])
+        Job.objects.filter(pk=job.pk).update(max_attempts=2)
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('down')):
+            self.assertEqual(run_pending(), (0, 1))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), ('Queued', 1))
+            self.assertGreater(job.run_at, now())
+            self.assertEqual(claim(), [])
+
+            Job.objects.filter(pk=job.pk).update(run_at=now() - timedelta(seconds=1))
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('Failed', 2))
+        self.assertIn('down', job.last_error)
+
+    def test_stale_running_jobs_are_reclaimed(self):
+        job = enqueue_email('Hi', 'body', ['user@example.com'])
+        Job.objects.filter(pk=job.pk).update(status='Running', locked_at=now() - timedelta(hours=1))
+        self.assertEqual([claimed.pk for claimed in claim()], [job.pk])
@@ -0,0 +1,135 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+# names carrying a content hash or a never-reused id never change, so they can be cached for good. Only
+# the segments written here count, right before the extension: a hashed storage's 12 hex digits
+# ("intro.3f2a9c41d0b7.mp4") and a completed upload's id (courses.uploads.video_name, 32 hex digits).
+# An all-digit run is a timestamp or counter ("IMG_20250517123456.jpg"), not a hash.
+HASHED_NAME = re.compile(r'\.(?=[0-9]*[a-f])(?:[0-9a-f]{12}|[0-9a-f]{32})\.[A-Za-z0-9]+$')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def _cache_control(path):
+    if HASHED_NAME.search(path):
+        return 'public, max-age=31536000, immutable'
+    return f"public, max-age={getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600)}"
+
+
+def _not_modified(request, etag, mtime):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        # weak comparison, as RFC 9110 asks for If-None-Match
+        tags = {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+        return '*' in tags or etag in tags
+    since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return since is not None and int(mtime) <= since
+
+
+def _byte_range(request, size, etag, mtime):
+    """``(start, end)`` of a satisfiable single range, ``None`` to send everything, or ``False`` if unsatisfiable."""
+    header = request.headers.get('Range')
+    if not header:
+        return None
+    if_range = request.headers.get('If-Range')
+    if if_range and if_range != etag and parse_http_date_safe(if_range) != int(mtime):
+        return None
+    match = RANGE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        # multi-range and malformed requests get the whole file, which the spec allows
+        return None
+    first, last = match.groups()
+    if first:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    else:
+        start, end = max(size - int(last), 0), size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _offload(response, path, full_path):
+    """Hand the transfer to the front proxy when ``MEDIA_ACCEL`` is configured; nginx/Apache handle Range themselves."""
+    mode = getattr(settings, 'MEDIA_ACCEL', None)
+    if mode == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/') + quote(path)
+    elif mode == 'x-sendfile':
+        response['X-Sendfile'] = full_path
+    else:
+        return False
+    return True
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve a file from MEDIA_ROOT with validators, byte ranges and optional proxy offload."""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('File not found')
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404('File not found')
+    if not os.path.isfile(full_path):
+        raise Http404('File not found')
+
+    etag = quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': _cache_control(path),
+        'Accept-Ranges': 'bytes',
+    }
+    if _not_modified(request, etag, stat.st_mtime):
+        response = HttpResponseNotModified()
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    offloaded = HttpResponse(content_type=content_type, headers=headers)
+    if _offload(offloaded, path, full_path):
+        return offloaded
+
+    byte_range = _byte_range(request, stat.st_size, etag, stat.st_mtime)
+    if byte_range is False:
+        response = HttpResponse(status=416, headers=headers)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+    if byte_range is None:
+        # FileResponse goes through wsgi.file_wrapper, which lets the server use sendfile()
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type, headers=headers)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _read_range(full_path, start, length), status=206, content_type=content_type, headers=headers,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = str(length)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
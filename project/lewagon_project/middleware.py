@@ -0,0 +1,118 @@
+import heapq
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('lewagon_project.sql')
+
+
+class QueryStats:
+    """``execute_wrapper`` that counts and times every statement run while it is installed."""
+
+    def __init__(self, keep=3):
+        self.count = 0
+        self.duration = 0.0
+        self.keep = keep
+        # min-heap of (seconds, sequence, sql) so only the ``keep`` slowest statements are held
+        self.slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            entry = (elapsed, self.count, sql)
+            if len(self.slowest) < self.keep:
+                heapq.heappush(self.slowest, entry)
+            elif elapsed > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, entry)
+
+    def slowest_statements(self):
+        return [
+            {'ms': round(elapsed * 1000, 2), 'sql': sql[:500]}
+            for elapsed, _, sql in sorted(self.slowest, reverse=True)
+        ]
+
+    def install(self):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+
+class QueryInstrumentationMiddleware:
+    """Records query count, DB time and the slowest statements of every request.
+
+    They are sent back in a ``Server-Timing`` header (counts and timings only, never SQL) and
+    logged at INFO as one JSON line on the ``lewagon_project.sql`` logger (on with ``SQL_LOG``).
+    Queries run while a streaming response is being iterated happen after this middleware
+    returns and are not counted.
+
+    Under ASGI, async views run their ORM calls on the request's thread-sensitive worker thread, so
+    the wrapper is installed on that thread's connections rather than the event loop's. Code that
+    moves work to another thread pool installs it there from ``request.query_stats`` (see
+    users.async_views.token_obtain_pair).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'SQL_INSTRUMENTATION', True)
+        self.keep = getattr(settings, 'SQL_INSTRUMENTATION_SLOWEST', 3)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        stats = request.query_stats = QueryStats(self.keep)
+        started = time.perf_counter()
+        with stats.install():
+            response = self.get_response(request)
+        return self.finish(request, response, stats, started)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        stats = request.query_stats = QueryStats(self.keep)
+        started = time.perf_counter()
+        stack = await sync_to_async(stats.install)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, stats, started)
+
+    def finish(self, request, response, stats, started):
+        total = time.perf_counter() - started
+        timing = f'db;desc="{stats.count} queries";dur={stats.duration * 1000:.2f}, total;dur={total * 1000:.2f}'
+        if response.has_header('Server-Timing'):
+            timing = f'{response["Server-Timing"]}, {timing}'
+        response['Server-Timing'] = timing
+
+        if not logger.isEnabledFor(logging.INFO):
+            return response
+        match = request.resolver_match
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'url_name': match.view_name if match else None,
+            'status': response.status_code,
+            'queries': stats.count,
+            'db_ms': round(stats.duration * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+            'slowest': stats.slowest_statements(),
+        }))
+        return response
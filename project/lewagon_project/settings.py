@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
     'courses.apps.CoursesConfig',
     'users.apps.UsersConfig',
     'contact.apps.ContactConfig',
+    'jobs.apps.JobsConfig',
     'corsheaders',
     'rest_framework',
     'rest_framework_simplejwt',
@@ -48,6 +50,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so queries made by every other middleware are counted too
+    'lewagon_project.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,6 +81,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'lewagon_project.wsgi.application'
 
+# route the catalog, course detail, enrolled-courses, profile and token endpoints to the async views
+# (courses/async_views.py, users/async_views.py); asgi.py turns this on
+ASYNC_API_VIEWS = os.environ.get('DJANGO_ASYNC_API_VIEWS') == '1'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -93,6 +101,89 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    # shared by every worker process, so version bumps made by one worker (catalog invalidation) and
+    # throttle counters are seen by all of them. Without CACHE_URL it is file-based, which only spans
+    # the processes of one host; set CACHE_URL (Redis) when the app runs on several.
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['CACHE_URL'],
+    } if os.environ.get('CACHE_URL') else {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_DIR', BASE_DIR / 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10_000},
+    },
+    # revocation markers and blacklisted refresh tokens: must be shared by every worker and must never
+    # evict (Redis with maxmemory-policy noeviction); the local fallback is only correct for a single process
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['AUTH_CACHE_URL'],
+    } if os.environ.get('AUTH_CACHE_URL') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lewagon-auth',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 10_000_000},
+    },
+}
+
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = 60 * 15  # seconds; signals invalidate earlier on any catalog change
+
+# admin dashboard counters are served from a snapshot no older than this (see `manage.py refresh_dashboard`)
+DASHBOARD_SNAPSHOT_MAX_AGE = timedelta(minutes=5)
+
+# buffer progress heartbeats in memory and flush them every PROGRESS_FLUSH_INTERVAL seconds
+PROGRESS_WRITE_BEHIND = False
+PROGRESS_FLUSH_INTERVAL = 5
+
+# revenue totals are reported in this currency, using rates loaded with `manage.py load_fx_rates`
+FX_BASE_CURRENCY = 'USD'
+# seconds between checks of whether the rate rows changed since this process loaded them
+FX_RATE_CHECK_INTERVAL = 60
+
+# rendered certificate PDFs, stored by content hash; kept outside MEDIA_ROOT so they are only served through the API
+CERTIFICATE_ROOT = BASE_DIR / 'certificates'
+
+# resized course images and profile pictures are rendered in a background thread pool after upload
+IMAGE_DERIVATIVE_WORKERS = 2
+IMAGE_DERIVATIVES_ASYNC = True
+
+# chunked lecture uploads: partial files stay outside MEDIA_ROOT (any filesystem) until the upload completes
+VIDEO_UPLOAD_TEMP_DIR = BASE_DIR / 'uploads'
+VIDEO_UPLOAD_MAX_SIZE = 20 * 1024 ** 3
+VIDEO_UPLOAD_CHUNK_SIZE = 8 * 1024 ** 2
+VIDEO_UPLOAD_MAX_CHUNK_SIZE = 64 * 1024 ** 2
+VIDEO_UPLOAD_EXPIRY = timedelta(hours=24)
+# lease held by one chunk write (or the final hash and move); renewed while the request keeps writing
+VIDEO_UPLOAD_LEASE = timedelta(minutes=15)
+
+# background jobs (`manage.py run_workers`); retries wait RETRY_BASE_DELAY * 2^n seconds, capped at RETRY_MAX_DELAY
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_BASE_DELAY = 30
+JOBS_RETRY_MAX_DELAY = 60 * 60
+JOBS_LOCK_TIMEOUT = timedelta(minutes=10)
+
+# Token-bucket limits for the auth endpoints, as '<burst>/<period>' per client IP and per submitted email.
+# Buckets and the concurrency cap live in THROTTLE_CACHE_ALIAS, which must be shared by every worker (the
+# file-based default spans one host, Redis several); a per-process cache fails the users.E001 system check.
+THROTTLE_CACHE_ALIAS = 'default'
+AUTH_THROTTLE_RATES = {
+    'login.ip': '20/min',
+    'login.identity': '5/min',
+    'register.ip': '5/hour',
+    'register.identity': '3/hour',
+    'password_reset.ip': '10/hour',
+    'password_reset.identity': '3/hour',
+}
+# at most this many password-hashing requests run at once; the rest get 429 with Retry-After
+AUTH_CONCURRENCY_LIMIT = 8
+AUTH_CONCURRENCY_RETRY_AFTER = 1
+AUTH_CONCURRENCY_TIMEOUT = 60
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -138,7 +229,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # rest framework setting
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',  # use JWT for Auth
+        'users.authentication.ClaimsJWTAuthentication',  # JWT auth that trusts role claims, see users/authentication.py
     ),
     
 }
@@ -150,8 +241,18 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),  # Auth header Authorization type
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.ClaimsTokenRefreshSerializer',
 }
 
+# ClaimsJWTAuthentication: role-change markers live in AUTH_CACHE_ALIAS (see CACHES['auth']); when it can't
+# be read, claims are not trusted. Full User rows are kept per process for AUTH_USER_CACHE_TTL seconds.
+# Markers and blacklisted refresh tokens only reach every worker through a shared cache; without one
+# (AUTH_CACHE_SHARED false) every request loads the user row and every refresh checks the blacklist table.
+AUTH_CACHE_ALIAS = 'auth'
+AUTH_CACHE_SHARED = bool(os.environ.get('AUTH_CACHE_URL'))
+AUTH_USER_CACHE_TTL = 30
+AUTH_USER_CACHE_SIZE = 10000
+
 
 AUTH_USER_MODEL = 'users.User'
 CORS_ALLOW_ALL_ORIGINS = True
@@ -180,4 +281,36 @@ DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Cache lifetime for media without a content hash in its name (hashed names are cached for a year).
+MEDIA_CACHE_MAX_AGE = 60 * 60
+# Set to 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache/lighttpd) to let the front proxy send media files.
+# With nginx, MEDIA_ACCEL_PREFIX must be an `internal` location aliased to MEDIA_ROOT.
+MEDIA_ACCEL = None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# per-request query count / DB time in Server-Timing, plus a JSON log line on the lewagon_project.sql logger
+# when DJANGO_SQL_LOG=1 (one line per request, so it is off by default, tests included)
+SQL_INSTRUMENTATION = True
+SQL_INSTRUMENTATION_SLOWEST = 3
+SQL_LOG = os.environ.get('DJANGO_SQL_LOG') == '1'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        # the SQL instrumentation message is already a JSON object, so emit it as is: one per line
+        'json_line': {'format': '{message}', 'style': '{'},
+    },
+    'handlers': {
+        'sql_console': {'class': 'logging.StreamHandler', 'formatter': 'json_line'},
+    },
+    'loggers': {
+        'lewagon_project.sql': {
+            'handlers': ['sql_console'],
+            'level': 'INFO' if SQL_LOG else 'WARNING',
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,24 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Test-case mixin that fails when a request runs more queries than its URL name allows.
+
+    Budgets live in ``query_budgets``, keyed by the resolved view name (``'all_courses'``,
+    ``'admin-payments-list'``...). Seed enough rows that an N+1 would show up as extra queries.
+    """
+    query_budgets = {}
+
+    def assertQueryBudget(self, method, url, status=200, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, **kwargs)
+        name = response.resolver_match.view_name
+        self.assertEqual(response.status_code, status, f'{name}: {getattr(response, "data", response)}')
+        self.assertIn(name, self.query_budgets, f'No query budget for {name!r}.')
+        budget = self.query_budgets[name]
+        executed = len(queries)
+        if executed > budget:
+            statements = '\n'.join(f'{n}. {query["sql"]}' for n, query in enumerate(queries.captured_queries, 1))
+            self.fail(f'{name} ran {executed} queries, budget is {budget}:\n{statements}')
+        return response
@@ -1,11 +1,13 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
+
+from .media import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('courses/', include('courses.urls')),
     path('users/', include('users.urls')),
     path('contact/', include('contact.urls')),
-]+ static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media'),
+]
@@ -0,0 +1,113 @@
+"""Async (ASGI) versions of the hot user endpoints, routed instead of the DRF views when ASYNC_API_VIEWS is on."""
+import asyncio
+import math
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
+from rest_framework import exceptions
+from rest_framework.utils.encoders import JSONEncoder
+
+from .authentication import ClaimsJWTAuthentication, aget_cached_user
+from .serializers import UserSerializer
+from .throttling import acquire_admission_slot, release_admission_slot
+from .views import CustomTokenObtainPairView
+
+_authentication = ClaimsJWTAuthentication()
+
+
+def api_response(data, status=200, headers=None):
+    # DRF's encoder, so Decimal/date/ReturnDict values render exactly like the sync views
+    return JsonResponse(data, status=status, headers=headers, encoder=JSONEncoder, safe=False)
+
+
+def api_error(exc):
+    headers = None
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        headers = {'WWW-Authenticate': _authentication.authenticate_header(None)}
+    elif getattr(exc, 'wait', None):
+        headers = {'Retry-After': str(math.ceil(exc.wait))}
+    detail = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+    return api_response(detail, status=exc.status_code, headers=headers)
+
+
+async def optional_user(request):
+    """The bearer-token user or ``None`` without a token; a token that is present but invalid still raises, as in DRF."""
+    result = await _authentication.aauthenticate(request)
+    return result[0] if result is not None else None
+
+
+async def authenticated_user(request):
+    """The bearer-token user (as DRF's IsAuthenticated would require it) or raise an APIException."""
+    user = await optional_user(request)
+    if user is None:
+        raise exceptions.NotAuthenticated()
+    return user
+
+
+@require_GET
+async def user_profile(request):
+    try:
+        user = await authenticated_user(request)
+    except exceptions.APIException as exc:
+        return api_error(exc)
+    # the profile needs every column, which the per-process cache provides without a query when warm
+    user = await aget_cached_user(user.pk)
+    if user is None:
+        return api_error(exceptions.AuthenticationFailed('User not found or inactive'))
+    return api_response(UserSerializer(user).data)
+
+
+_hash_executor = None
+
+
+def get_hash_executor():
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=settings.AUTH_CONCURRENCY_LIMIT, thread_name_prefix='password-hash',
+        )
+    return _hash_executor
+
+
+_token_view = CustomTokenObtainPairView.as_view()
+
+
+def _obtain_token(request):
+    # runs in the hashing pool: honour CONN_MAX_AGE like a normal request thread would
+    close_old_connections()
+    stats = getattr(request, 'query_stats', None)
+    try:
+        # this thread's connections aren't the ones the SQL middleware instrumented
+        with stats.install() if stats is not None else nullcontext():
+            response = _token_view(request)
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+@csrf_exempt
+async def token_obtain_pair(request):
+    """The DRF token view (throttles, PBKDF2 check) run in a bounded thread pool.
+
+    Password hashing takes tens of milliseconds of CPU; keeping it off the event loop lets the loop
+    keep serving other requests, and the pool size bounds how many hashes run at once. Admission
+    control runs here, before the pool, so requests over the limit are shed with 429 instead of
+    queueing for a thread.
+    """
+    try:
+        await sync_to_async(acquire_admission_slot, thread_sensitive=False)(CustomTokenObtainPairView.__name__)
+    except exceptions.Throttled as exc:
+        return api_error(exc)
+    request.admitted = True
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_hash_executor(), _obtain_token, request)
+    finally:
+        await sync_to_async(release_admission_slot, thread_sensitive=False)()
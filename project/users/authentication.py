@@ -0,0 +1,211 @@
+import copy
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.base import DEFERRED
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from courses.models import Student
+from .models import ClaimsUser, User
+
+# claims copied onto the ClaimsUser; `claims_at` records when they were read from the database
+CLAIM_FIELDS = ('email', 'is_student', 'is_instructor', 'is_staff', 'is_superuser')
+CHANGED_KEY = 'auth:changed:{}'
+EPOCH_KEY = 'auth:epoch'
+
+logger = logging.getLogger(__name__)
+
+_users = {}
+_users_lock = threading.Lock()
+
+
+def get_auth_cache():
+    return caches[getattr(settings, 'AUTH_CACHE_ALIAS', 'default')]
+
+
+def trusts_cached_state():
+    """Claims and cached users are only safe when role-change markers reach every worker."""
+    return getattr(settings, 'AUTH_CACHE_SHARED', False)
+
+
+def user_claims(user):
+    student = getattr(user, 'student_profile', None) if user.is_student else None
+    claims = {field: getattr(user, field) for field in CLAIM_FIELDS}
+    claims['student_id'] = student.pk if student else None
+    # creates the marker epoch if needed, so these claims postdate it and are trusted right away
+    changed_at(user.pk)
+    claims['claims_at'] = time.time()
+    return claims
+
+
+def mark_user_changed(user_id):
+    """Stop trusting claims and cached copies of this user that predate now.
+
+    The marker only has to outlive the access tokens issued before the change; refreshing a token
+    re-reads the claims from the database.
+    """
+    lifetime = int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+    get_auth_cache().set(CHANGED_KEY.format(user_id), time.time(), lifetime)
+    with _users_lock:
+        _users.pop(user_id, None)
+
+
+def _changed_at(found, key):
+    # no epoch means the store is new or was flushed and may have lost markers, so nothing issued
+    # before it came back is trusted; an unreadable store trusts nothing at all
+    return max(found.get(EPOCH_KEY, float('inf')), found.get(key, 0))
+
+
+def changed_at(user_id):
+    """Time after which claims about this user can be trusted; ``inf`` if the marker store is unavailable."""
+    cache = get_auth_cache()
+    key = CHANGED_KEY.format(user_id)
+    try:
+        found = cache.get_many([EPOCH_KEY, key])
+        if EPOCH_KEY not in found:
+            cache.add(EPOCH_KEY, time.time(), timeout=None)
+            found = cache.get_many([EPOCH_KEY, key])
+    except Exception:
+        logger.exception('Auth marker cache unavailable; not trusting token claims')
+        return float('inf')
+    return _changed_at(found, key)
+
+
+async def achanged_at(user_id):
+    cache = get_auth_cache()
+    key = CHANGED_KEY.format(user_id)
+    try:
+        found = await cache.aget_many([EPOCH_KEY, key])
+        if EPOCH_KEY not in found:
+            await cache.aadd(EPOCH_KEY, time.time(), timeout=None)
+            found = await cache.aget_many([EPOCH_KEY, key])
+    except Exception:
+        logger.exception('Auth marker cache unavailable; not trusting token claims')
+        return float('inf')
+    return _changed_at(found, key)
+
+
+def _fresh_cached_user(user_id, changed, current):
+    with _users_lock:
+        entry = _users.get(user_id)
+    if entry is not None:
+        loaded_at, user = entry
+        if current - loaded_at < settings.AUTH_USER_CACHE_TTL and loaded_at >= changed:
+            # each request gets its own copy so views can modify it freely
+            return copy.copy(user)
+    return None
+
+
+def _store_user(user_id, user, loaded_at):
+    with _users_lock:
+        if user is None:
+            _users.pop(user_id, None)
+        else:
+            if len(_users) >= settings.AUTH_USER_CACHE_SIZE:
+                _users.clear()
+            _users[user_id] = (loaded_at, user)
+    return copy.copy(user) if user else None
+
+
+def active_users():
+    return User.objects.select_related('student_profile').filter(is_active=True)
+
+
+def get_cached_user(user_id):
+    """Full ``User`` (with ``student_profile``) from a short-TTL per-process cache; None if missing or inactive."""
+    if not trusts_cached_state():
+        return active_users().filter(pk=user_id).first()
+    current = time.time()
+    user = _fresh_cached_user(user_id, changed_at(user_id), current)
+    if user is not None:
+        return user
+    return _store_user(user_id, active_users().filter(pk=user_id).first(), current)
+
+
+async def aget_cached_user(user_id):
+    if not trusts_cached_state():
+        return await active_users().filter(pk=user_id).afirst()
+    current = time.time()
+    user = _fresh_cached_user(user_id, await achanged_at(user_id), current)
+    if user is not None:
+        return user
+    return _store_user(user_id, await active_users().filter(pk=user_id).afirst(), current)
+
+
+def token_user_id(token):
+    # simplejwt stores the id as a string; cache keys and model equality need the real pk type
+    return User._meta.pk.to_python(token[api_settings.USER_ID_CLAIM])
+
+
+def claims_user(token):
+    """Build a ``ClaimsUser`` with its ``student_profile`` from the token alone, without any query."""
+    fields = ['id'] + list(CLAIM_FIELDS) + ['is_active']
+    values = [token_user_id(token)] + [token[field] for field in CLAIM_FIELDS] + [True]
+    user = ClaimsUser.from_db('default', fields, [
+        values[fields.index(field.attname)] if field.attname in fields else DEFERRED
+        for field in ClaimsUser._meta.concrete_fields
+    ])
+    student = None
+    if token['student_id'] is not None:
+        student = Student.from_db('default', ['id', 'user_id'], [
+            {'id': token['student_id'], 'user_id': user.pk}.get(field.attname, DEFERRED)
+            for field in Student._meta.concrete_fields
+        ])
+        Student.user.field.set_cached_value(student, user)
+    User.student_profile.related.set_cached_value(user, student)
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT authentication that trusts role claims instead of loading the user row on every request.
+
+    Tokens without claims, or whose claims predate a change to the user (see ``mark_user_changed``),
+    fall back to the per-process user cache, which also enforces ``is_active``. Without a shared
+    marker cache (``AUTH_CACHE_SHARED``) a change made on one worker would go unseen on the others,
+    so every request loads the user row instead.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = token_user_id(validated_token)
+        except KeyError:
+            raise AuthenticationFailed('Token contained no recognizable user identification')
+
+        claims_at = validated_token.get('claims_at')
+        has_claims = claims_at is not None and 'student_id' in validated_token
+        if has_claims and trusts_cached_state() and claims_at > changed_at(user_id):
+            return claims_user(validated_token)
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed('User not found or inactive', code='user_not_found')
+        return user
+
+    async def aauthenticate(self, request):
+        """``authenticate`` for async views: the claims path never leaves the event loop."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        try:
+            user_id = token_user_id(validated_token)
+        except KeyError:
+            raise AuthenticationFailed('Token contained no recognizable user identification')
+
+        claims_at = validated_token.get('claims_at')
+        has_claims = claims_at is not None and 'student_id' in validated_token
+        if has_claims and trusts_cached_state() and claims_at > await achanged_at(user_id):
+            return claims_user(validated_token), validated_token
+
+        user = await aget_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed('User not found or inactive', code='user_not_found')
+        return user, validated_token
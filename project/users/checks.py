@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.caches)
+def check_throttle_cache(app_configs, **kwargs):
+    """Auth throttles and the hashing concurrency cap only hold globally in a cache every worker shares."""
+    alias = getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')
+    if isinstance(caches[alias], (LocMemCache, DummyCache)):
+        return [Error(
+            f"THROTTLE_CACHE_ALIAS points at {alias!r}, a per-process cache, so every worker would get its own limits.",
+            hint='Use a file-based, Redis or Memcached cache for it.',
+            id='users.E001',
+        )]
+    return []
@@ -0,0 +1,57 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from courses.fx import base_currency, convert_daily_totals, daily_revenue_groups
+from courses.models import Course, DailyRevenue, Enrollment, Payment
+from .models import DashboardSnapshot, User
+
+
+def compute_dashboard():
+    """Build the admin dashboard payload with one aggregate query per table."""
+    users = User.objects.aggregate(
+        total_users=Count('id'),
+        total_students=Count('id', filter=Q(is_student=True)),
+        total_instructors=Count('id', filter=Q(is_instructor=True)),
+    )
+    courses = Course.objects.aggregate(total_courses=Count('id'))
+    enrollments = Enrollment.objects.aggregate(
+        total_enrollments=Count('id'),
+        completed_enrollments=Count('id', filter=Q(status='Completed')),
+    )
+    payments = Payment.objects.aggregate(total_payments=Count('id'))
+
+    daily_revenue, unconverted = convert_daily_totals(daily_revenue_groups(DailyRevenue.objects.all()))
+
+    recent_users = User.objects.order_by('-date_joined')[:5].values('email', 'first_name', 'last_name')
+    recent_courses = Course.objects.order_by('-created_at')[:5].values('title', 'instructor__email')
+
+    return {
+        "stats": {**users, **courses, **enrollments, **payments},
+        "revenue": {
+            "total": str(sum(daily_revenue.values(), Decimal('0.00'))),
+            "currency": base_currency(),
+            "unconverted_currencies": unconverted,
+        },
+        "recent_users": list(recent_users),
+        "recent_courses": list(recent_courses),
+    }
+
+
+def refresh_dashboard_snapshot():
+    snapshot, _ = DashboardSnapshot.objects.update_or_create(
+        pk=1, defaults={'data': compute_dashboard(), 'generated_at': timezone.now()}
+    )
+    return snapshot
+
+
+def get_dashboard_snapshot(fresh=False):
+    """Return the stored snapshot, rebuilding it when asked to or when it is older than the max age."""
+    max_age = getattr(settings, 'DASHBOARD_SNAPSHOT_MAX_AGE', timedelta(minutes=5))
+    snapshot = None if fresh else DashboardSnapshot.objects.filter(pk=1).first()
+    if snapshot is None or snapshot.generated_at < timezone.now() - max_age:
+        snapshot = refresh_dashboard_snapshot()
+    return snapshot
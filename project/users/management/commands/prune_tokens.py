@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from users.tokens import prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding/blacklisted JWTs in small batches. Schedule it (e.g. hourly cron).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Tokens deleted per transaction.')
+        parser.add_argument('--pause', type=float, default=0.05, help='Seconds to sleep between batches.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the expired tokens.')
+
+    def handle(self, *args, **options):
+        deleted = prune_expired_tokens(options['batch_size'], options['pause'], options['dry_run'])
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {deleted} expired tokens.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from users.dashboard import refresh_dashboard_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Recompute the admin dashboard snapshot. Schedule it (e.g. cron) more often than DASHBOARD_SNAPSHOT_MAX_AGE.'
+
+    def handle(self, *args, **options):
+        snapshot = refresh_dashboard_snapshot()
+        self.stdout.write(self.style.SUCCESS(f'Dashboard snapshot generated at {snapshot.generated_at.isoformat()}'))
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0003_user_profile_picture'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.JSONField()),
+                ('generated_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-date_joined'], name='user_date_joined_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_dashboardsnapshot_user_user_date_joined_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:20
+
+import users.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClaimsUser',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('users.user',),
+            managers=[
+                ('objects', users.models.CustomUserManager()),
+            ],
+        ),
+    ]
@@ -31,6 +31,7 @@ class User(AbstractUser):
     first_name = models.CharField(max_length=30)
     last_name  = models.CharField(max_length=30)
     profile_picture = models.ImageField(upload_to='profile_pics/', null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_student    = models.BooleanField(default=False)
     is_instructor = models.BooleanField(default=False)
 
@@ -39,5 +40,39 @@ class User(AbstractUser):
 
     objects = CustomUserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [models.Index(fields=['-date_joined'], name='user_date_joined_idx')]
+
     def __str__(self):
         return self.email
+
+
+class ClaimsUser(User):
+    """A ``User`` rebuilt from JWT claims without touching the database (see users.authentication).
+
+    Only the claimed fields are loaded; reading any other field fills them all in at once from the
+    per-process user cache, so views that need the full model keep working unchanged.
+    """
+
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if not fields or from_queryset is not None or not set(fields) <= deferred:
+            return super().refresh_from_db(using, fields, from_queryset)
+        # imported here: users.authentication imports this module
+        from .authentication import get_cached_user
+        full = get_cached_user(self.pk)
+        if full is None:
+            return super().refresh_from_db(using, fields, from_queryset)
+        for name in deferred:
+            setattr(self, name, getattr(full, name))
+
+
+class DashboardSnapshot(models.Model):
+    data = models.JSONField()
+    generated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Dashboard snapshot at {self.generated_at:%Y-%m-%d %H:%M:%S}"
@@ -1,13 +1,20 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
 from .models import User
+from .authentication import get_cached_user, token_user_id, user_claims
+from .tokens import CachedBlacklistRefreshToken
+from courses.serializers import ImageVariantsField
 import re
 
 class UserSerializer(serializers.ModelSerializer):
     confirm_password = serializers.CharField(write_only=True)
+    image_variants = ImageVariantsField('profile_picture')
 
     class Meta:
         model = User
-        fields = ['id', 'email', 'first_name', 'last_name', 'password', 'confirm_password','profile_picture']
+        fields = ['id', 'email', 'first_name', 'last_name', 'password', 'confirm_password','profile_picture', 'image_variants']
         extra_kwargs = {'password': {'write_only': True}}
 
     def create(self, validated_data):
@@ -46,9 +53,11 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 class UserUpdateSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField('profile_picture')
+
     class Meta:
         model = User
-        fields = ['first_name', 'last_name', 'is_student', 'is_instructor', 'profile_picture']
+        fields = ['first_name', 'last_name', 'is_student', 'is_instructor', 'profile_picture', 'image_variants']
         read_only_fields = ['is_student', 'is_instructor']  
 
 class ChangePasswordSerializer(serializers.Serializer):
@@ -81,3 +90,17 @@ class ChangePasswordSerializer(serializers.Serializer):
         return data
 
 
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refreshes as usual, then re-reads the role claims so a new access token never carries stale ones."""
+    token_class = CachedBlacklistRefreshToken
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        access = AccessToken(data['access'])
+        user = get_cached_user(token_user_id(access))
+        if user is None:
+            raise AuthenticationFailed('User not found or inactive', code='user_not_found')
+        for claim, value in user_claims(user).items():
+            access[claim] = value
+        data['access'] = str(access)
+        return data
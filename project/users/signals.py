@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .authentication import mark_user_changed
+from .models import ClaimsUser, User
+
+
+@receiver([post_save, post_delete], sender=User)
+# request.user is a ClaimsUser on the claims path, and proxies send signals with their own class
+@receiver([post_save, post_delete], sender=ClaimsUser)
+def invalidate_user_claims(sender, instance, update_fields=None, **kwargs):
+    # logins only touch last_login, which no claim depends on
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    mark_user_changed(instance.pk)
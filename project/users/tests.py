@@ -1,3 +1,135 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import async_views
+from .authentication import mark_user_changed
+from .checks import check_throttle_cache
+from .models import User
+from .throttling import INFLIGHT_KEY, get_throttle_cache
+from .tokens import blacklist_index
+from .views import CustomTokenObtainPairSerializer
+
+
+class ClaimsAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin@example.com', None, first_name='Ada', last_name='Min')
+
+    def setUp(self):
+        caches['auth'].clear()
+        self.client = APIClient()
+        token = CustomTokenObtainPairSerializer.get_token(self.admin).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def demote(self):
+        # a queryset update sends no signals: like a change saved by another worker, no local marker is set
+        User.objects.filter(pk=self.admin.pk).update(is_superuser=False, is_staff=False)
+
+    @override_settings(AUTH_CACHE_SHARED=True)
+    def test_marked_change_rejects_stale_claims(self):
+        self.assertEqual(self.client.get(reverse('throttle_stats')).status_code, 200)
+        self.demote()
+        mark_user_changed(self.admin.pk)
+        self.assertEqual(self.client.get(reverse('throttle_stats')).status_code, 403)
+
+    @override_settings(AUTH_CACHE_SHARED=False)
+    def test_unshared_marker_cache_loads_the_user(self):
+        self.assertEqual(self.client.get(reverse('throttle_stats')).status_code, 200)
+        self.demote()
+        self.assertEqual(self.client.get(reverse('throttle_stats')).status_code, 403)
+
+    @override_settings(AUTH_CACHE_SHARED=True)
+    def test_shared_marker_cache_trusts_claims(self):
+        self.demote()
+        # no marker was written, so the claims stay trusted: the fast path this setting is for
+        self.assertEqual(self.client.get(reverse('throttle_stats')).status_code, 200)
+
+
+class RefreshBlacklistTests(TestCase):
+    def setUp(self):
+        # the login throttle's buckets live in the default cache
+        for alias in ('default', 'auth'):
+            caches[alias].clear()
+        blacklist_index.reset()
+        User.objects.create_user('student@example.com', 'Secret123!', first_name='Stu', last_name='Dent', is_student=True)
+        response = APIClient().post(reverse('token_obtain_pair'), {'email': 'student@example.com', 'password': 'Secret123!'}, format='json')
+        self.refresh = response.data['refresh']
+
+    def refresh_status(self, token):
+        return APIClient().post(reverse('token_refresh'), {'refresh': token}, format='json').status_code
+
+    @override_settings(AUTH_CACHE_SHARED=True)
+    def test_rotated_token_is_rejected(self):
+        self.assertEqual(self.refresh_status(self.refresh), 200)
+        self.assertEqual(self.refresh_status(self.refresh), 401)
+
+    @override_settings(AUTH_CACHE_SHARED=False)
+    def test_unshared_cache_checks_the_table(self):
+        self.assertEqual(self.refresh_status(self.refresh), 200)
+        self.assertEqual(self.refresh_status(self.refresh), 401)
+        response = APIClient().post(reverse('token_obtain_pair'), {'email': 'student@example.com', 'password': 'Secret123!'}, format='json')
+        fresh = response.data['refresh']
+        # simplejwt's own blacklist() writes the rows without telling this process's index, like another worker
+        RefreshToken(fresh).blacklist()
+        self.assertEqual(self.refresh_status(fresh), 401)
+
+
+class AsyncTokenAdmissionTests(TransactionTestCase):
+    # the hashing pool thread has its own connection, which must see the committed user
+    def setUp(self):
+        caches['default'].clear()
+        User.objects.create_user('student@example.com', 'Secret123!', first_name='Stu', last_name='Dent', is_student=True)
+
+    def obtain(self):
+        request = RequestFactory().post(
+            reverse('token_obtain_pair'), {'email': 'student@example.com', 'password': 'Secret123!'}, content_type='application/json',
+        )
+        return async_to_sync(async_views.token_obtain_pair)(request)
+
+    def test_login_holds_one_slot(self):
+        response = self.obtain()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get_throttle_cache().get(INFLIGHT_KEY), 0)
+
+    @override_settings(AUTH_CONCURRENCY_LIMIT=2)
+    def test_excess_logins_are_shed_before_the_pool(self):
+        get_throttle_cache().set(INFLIGHT_KEY, 2)
+        with mock.patch.object(async_views, 'get_hash_executor') as executor, self.assertLogs('users.throttling', 'WARNING'):
+            response = self.obtain()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        executor.assert_not_called()
+        self.assertEqual(get_throttle_cache().get(INFLIGHT_KEY), 2)
+
+
+@override_settings(AUTH_THROTTLE_RATES={'login.ip': '20/min', 'login.identity': '2/min'})
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.client = APIClient()
+
+    def login(self, email):
+        return self.client.post(reverse('token_obtain_pair'), {'email': email, 'password': 'wrong'}, format='json')
+
+    def test_identity_bucket_returns_429(self):
+        self.assertEqual([self.login('victim@example.com').status_code for _ in range(2)], [401, 401])
+        with self.assertLogs('users.throttling', 'WARNING'):
+            response = self.login('Victim@example.com ')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        # the per-IP bucket still has room, so other accounts are unaffected
+        self.assertEqual(self.login('other@example.com').status_code, 401)
+        admin = User.objects.create_superuser('admin@example.com', None, first_name='Ada', last_name='Min')
+        self.client.force_authenticate(admin)
+        self.assertEqual(self.client.get(reverse('throttle_stats')).data['rejected']['login'], 1)
+
+    def test_per_process_cache_fails_the_check(self):
+        self.assertEqual(check_throttle_cache(None), [])
+        with self.settings(THROTTLE_CACHE_ALIAS='auth', CACHES={'auth': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual([error.id for error in check_throttle_cache(None)], ['users.E001'])
@@ -0,0 +1,185 @@
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+REJECTED_KEY = 'throttle:rejected:{}'
+INFLIGHT_KEY = 'throttle:inflight'
+# names reported by throttle_stats(); the concurrency cap counts under 'concurrency'
+METRIC_SCOPES = ('login', 'register', 'password_reset', 'concurrency')
+
+# striped locks: a bucket's read-modify-write is serialized per key within a process, not across all keys
+_bucket_locks = [threading.Lock() for _ in range(64)]
+
+
+def _bucket_lock(key):
+    return _bucket_locks[hash(key) % len(_bucket_locks)]
+
+
+def get_throttle_cache():
+    # must be a cache shared by every worker process (Redis/Memcached) for limits to be global
+    return caches[getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+
+
+def count_rejection(scope):
+    cache = get_throttle_cache()
+    key = REJECTED_KEY.format(scope)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def throttle_stats():
+    cache = get_throttle_cache()
+    return {
+        'rejected': {scope: cache.get(REJECTED_KEY.format(scope), 0) for scope in METRIC_SCOPES},
+        'in_flight': cache.get(INFLIGHT_KEY, 0),
+        'concurrency_limit': settings.AUTH_CONCURRENCY_LIMIT,
+    }
+
+
+def parse_rate(rate):
+    """'10/min' -> (capacity 10, refilled over 60 s). The period may be s, min, hour or day."""
+    count, period = rate.split('/')
+    return int(count), {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Token bucket per client, held in the shared cache.
+
+    A bucket holds up to ``capacity`` tokens and refills continuously at ``capacity / period``, so
+    bursts up to the capacity are allowed while the sustained rate stays bounded. Rates come from
+    ``AUTH_THROTTLE_RATES['<scope>.<kind>']``. Like DRF's own throttles this reads and writes the
+    cache without compare-and-swap, so simultaneous requests from different processes can
+    occasionally both spend the same token.
+    """
+    scope = None
+    kind = None
+
+    def get_rate(self):
+        return settings.AUTH_THROTTLE_RATES.get(f'{self.scope}.{self.kind}')
+
+    def get_cache_key(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        rate = self.get_rate()
+        key = self.get_cache_key(request, view)
+        if rate is None or key is None:
+            return True
+        capacity, period = parse_rate(rate)
+        refill = capacity / period
+
+        cache = get_throttle_cache()
+        with _bucket_lock(key):
+            current = time.time()
+            tokens, updated = cache.get(key, (capacity, current))
+            tokens = min(capacity, tokens + (current - updated) * refill)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            cache.set(key, (tokens, current), period)
+        if not allowed:
+            self.retry_after = (1 - tokens) / refill
+            count_rejection(self.scope)
+            logger.warning('Throttled %s request (%s limit %s)', self.scope, self.kind, rate)
+        return allowed
+
+    def wait(self):
+        return getattr(self, 'retry_after', None)
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    kind = 'ip'
+
+    def get_cache_key(self, request, view):
+        return f'throttle:{self.scope}:ip:{self.get_ident(request)}'
+
+
+class IdentityTokenBucketThrottle(TokenBucketThrottle):
+    """Limits attempts against one account (by submitted email) whichever IPs they come from."""
+    kind = 'identity'
+
+    def get_cache_key(self, request, view):
+        data = request.data
+        # a JSON list or scalar body has no email; the view rejects it, the IP throttle still applies
+        identity = str(data.get('email') or '').strip().lower() if isinstance(data, dict) else ''
+        if not identity:
+            return None
+        digest = hashlib.md5(identity.encode()).hexdigest()
+        return f'throttle:{self.scope}:identity:{digest}'
+
+
+def throttles_for(scope_name):
+    """The per-IP and per-identity throttle classes for one endpoint scope."""
+    return [
+        type(f'{kind.__name__}_{scope_name}', (kind,), {'scope': scope_name})
+        for kind in (IPTokenBucketThrottle, IdentityTokenBucketThrottle)
+    ]
+
+
+def acquire_admission_slot(name):
+    """Take one of the ``AUTH_CONCURRENCY_LIMIT`` shared hashing slots or raise ``Throttled``."""
+    cache = get_throttle_cache()
+    timeout = settings.AUTH_CONCURRENCY_TIMEOUT
+    cache.add(INFLIGHT_KEY, 0, timeout=timeout)
+    try:
+        in_flight = cache.incr(INFLIGHT_KEY)
+    except ValueError:
+        cache.set(INFLIGHT_KEY, 1, timeout=timeout)
+        in_flight = 1
+    else:
+        # sliding expiry: the counter only lapses after ``timeout`` without admissions, so it is
+        # never reset under requests still in flight, yet slots leaked by a dead worker go eventually
+        cache.touch(INFLIGHT_KEY, timeout)
+    if in_flight > settings.AUTH_CONCURRENCY_LIMIT:
+        release_admission_slot()
+        count_rejection('concurrency')
+        logger.warning('Shed %s: %s hashing requests already in flight', name, in_flight - 1)
+        raise Throttled(wait=settings.AUTH_CONCURRENCY_RETRY_AFTER, detail='Server is busy, please retry shortly.')
+
+
+def release_admission_slot():
+    cache = get_throttle_cache()
+    try:
+        remaining = cache.decr(INFLIGHT_KEY)
+    except ValueError:
+        return
+    if remaining < 0:
+        # the counter lapsed and restarted while this request held a slot; don't let it go negative
+        try:
+            cache.incr(INFLIGHT_KEY, -remaining)
+        except ValueError:
+            pass
+
+
+class AdmissionControlMixin:
+    """Caps how many requests to password-hashing views run at once across all workers.
+
+    Extra requests are shed with 429 and ``Retry-After`` before any hashing starts, instead of
+    queueing up and starving every worker's CPU. A caller that already took the slot for this
+    request (the async token view, before queueing for its thread pool) sets ``admitted`` on the
+    Django request, and the view then leaves the slot to it.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if getattr(request._request, 'admitted', False):
+            return
+        acquire_admission_slot(type(self).__name__)
+        request._holds_admission_slot = True
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if getattr(request, '_holds_admission_slot', False):
+            request._holds_admission_slot = False
+            release_admission_slot()
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,126 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+EPOCH_KEY = 'jwt:blacklist:epoch'
+JTI_KEY = 'jwt:blacklisted:{}'
+
+
+def get_blacklist_cache():
+    return caches[getattr(settings, 'AUTH_CACHE_ALIAS', 'default')]
+
+
+class BlacklistIndex:
+    """Answers "is this refresh token blacklisted?" without querying BlacklistedToken.
+
+    Each process keeps the unexpired blacklisted JTIs in a dict (jti -> exp) loaded from the
+    database. Tokens blacklisted later by any process are also written to the shared cache under
+    their own key until they expire. If the shared cache loses its state, the epoch key disappears.
+    Every process then reloads from the database, so a flushed cache never un-blacklists a token.
+    Without a shared cache (``AUTH_CACHE_SHARED``) every check queries ``BlacklistedToken`` instead.
+    """
+
+    def __init__(self):
+        self.jtis = {}
+        self.epoch = None
+        self.lock = threading.Lock()
+
+    def _sync(self, epoch):
+        cache = get_blacklist_cache()
+        if epoch is None:
+            cache.add(EPOCH_KEY, uuid.uuid4().hex, timeout=None)
+            epoch = cache.get(EPOCH_KEY)
+        if epoch == self.epoch:
+            return
+        with self.lock:
+            if epoch == self.epoch:
+                return
+            rows = BlacklistedToken.objects.filter(token__expires_at__gt=aware_utcnow()).values_list(
+                'token__jti', 'token__expires_at',
+            )
+            self.jtis = {jti: expires_at.timestamp() for jti, expires_at in rows.iterator()}
+            self.epoch = epoch
+
+    def contains(self, jti):
+        if not getattr(settings, 'AUTH_CACHE_SHARED', False):
+            # a per-process cache never hears about tokens other workers blacklisted, so ask the table
+            return BlacklistedToken.objects.filter(token__jti=jti).exists()
+        cache = get_blacklist_cache()
+        key = JTI_KEY.format(jti)
+        found = cache.get_many([EPOCH_KEY, key])
+        self._sync(found.get(EPOCH_KEY))
+        return jti in self.jtis or key in found
+
+    def add(self, jti, exp):
+        ttl = int(exp - time.time()) + 1
+        if ttl <= 0:
+            return
+        get_blacklist_cache().set(JTI_KEY.format(jti), 1, timeout=ttl)
+        with self.lock:
+            self.jtis[jti] = exp
+            if len(self.jtis) % 1000 == 0:
+                current = time.time()
+                self.jtis = {key: value for key, value in self.jtis.items() if value > current}
+
+    def reset(self):
+        with self.lock:
+            self.jtis = {}
+            self.epoch = None
+
+
+blacklist_index = BlacklistIndex()
+
+
+class CachedBlacklistRefreshToken(RefreshToken):
+    """RefreshToken whose blacklist check is answered by ``blacklist_index`` instead of a query."""
+
+    def check_blacklist(self):
+        if blacklist_index.contains(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklist_index.add(self.payload[api_settings.JTI_CLAIM], self.payload['exp'])
+        return result
+
+
+def prune_expired_tokens(batch_size=5000, pause=0.0, dry_run=False):
+    """Delete expired outstanding tokens (and their blacklist rows) in small id-ordered batches.
+
+    simplejwt doesn't index ``expires_at``, so this walks the primary key instead. Tokens are
+    issued with a fixed lifetime, so ids expire in roughly ascending order. The walk stops at the
+    first batch that holds nothing expired. Each batch is its own short transaction, so locks are
+    never held for long. Returns the number of outstanding tokens deleted (or found, with ``dry_run``).
+    """
+    deleted = 0
+    last_id = 0
+    while True:
+        cutoff = aware_utcnow()
+        batch = list(
+            OutstandingToken.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'expires_at')[:batch_size]
+        )
+        if not batch:
+            break
+        last_id = batch[-1][0]
+        expired = [token_id for token_id, expires_at in batch if expires_at <= cutoff]
+        if not expired:
+            break
+        if not dry_run:
+            with transaction.atomic():
+                BlacklistedToken.objects.filter(token_id__in=expired).delete()
+                OutstandingToken.objects.filter(id__in=expired).delete()
+        deleted += len(expired)
+        if pause:
+            time.sleep(pause)
+    return deleted
@@ -1,19 +1,22 @@
+from django.conf import settings
 from django.urls import path
 from rest_framework.routers import DefaultRouter
 from users.views import CustomTokenObtainPairView, StudentOnlyView, InstructorOnlyView, LogoutView
-from .views import  AdminDashboardView, UserAdminViewSet, CustomTokenObtainPairView, RegisterView, UserProfileView, UserProfileUpdateView, ChangePasswordView, PasswordResetRequestView, PasswordResetConfirmView
+from .views import  AdminDashboardView, UserAdminViewSet, CustomTokenObtainPairView, RegisterView, UserProfileView, UserProfileUpdateView, ChangePasswordView, PasswordResetRequestView, PasswordResetConfirmView, ThrottleStatsView
 from rest_framework_simplejwt.views import TokenRefreshView
+from . import async_views
 
 
 urlpatterns = [
     path('api/admin/dashboard/', AdminDashboardView.as_view(), name='admin_dashboard'),
+    path('api/admin/throttle-stats/', ThrottleStatsView.as_view(), name='throttle_stats'),
     path('api/register/', RegisterView.as_view(), name='register'),
     path('api/logout/', LogoutView.as_view(), name='logout'),
-    path('api/token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/token/', async_views.token_obtain_pair if settings.ASYNC_API_VIEWS else CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('student-only/', StudentOnlyView.as_view(), name='student_only'),
     path('instructor-only/', InstructorOnlyView.as_view(), name='instructor_only'),
-    path('api/profile/', UserProfileView.as_view(), name='user_profile'),
+    path('api/profile/', async_views.user_profile if settings.ASYNC_API_VIEWS else UserProfileView.as_view(), name='user_profile'),
     path('api/profile/update/', UserProfileUpdateView.as_view(), name='profile_update'),
     path('api/change-password/', ChangePasswordView.as_view(), name='change_password'),
     path('api/reset-password/', PasswordResetRequestView.as_view(), name='password_reset_request'),
@@ -7,21 +7,27 @@ from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from .models import User
 from .serializers import UserSerializer , UserUpdateSerializer , ChangePasswordSerializer
 from .permissions import IsStudent, IsInstructor, IsAdmin
-from rest_framework_simplejwt.tokens import RefreshToken
+from users.tokens import CachedBlacklistRefreshToken
 from rest_framework.generics import CreateAPIView
-from django.core.mail import send_mail
+from jobs.tasks import enqueue_email
 from django.shortcuts import reverse
 from users.utils import generate_password_reset_token, verify_password_reset_token
-from courses.models import Course, Enrollment, Payment, Student, Instructor
-class RegisterView(CreateAPIView):
+from users.dashboard import get_dashboard_snapshot
+from users.authentication import user_claims
+from users.throttling import AdmissionControlMixin, throttles_for, throttle_stats
+class RegisterView(AdmissionControlMixin, CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    throttle_classes = throttles_for('register')
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = CachedBlacklistRefreshToken
+
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
-        token['is_student'] = user.is_student
-        token['is_instructor'] = user.is_instructor
+        # everything ClaimsJWTAuthentication needs to skip the user query on later requests
+        for claim, value in user_claims(user).items():
+            token[claim] = value
         return token
     def validate(self, attrs):
         data = super().validate(attrs)
@@ -33,31 +39,19 @@ class AdminDashboardView(APIView):
     permission_classes = [IsAuthenticated, IsAdmin]
 
     def get(self, request):
-        total_users = User.objects.count()
-        total_students = User.objects.filter(is_student=True).count()
-        total_instructors = User.objects.filter(is_instructor=True).count()
-        total_courses = Course.objects.count()
-        total_enrollments = Enrollment.objects.count()
-        total_payments = Payment.objects.count()
-        
-        recent_users = User.objects.order_by('-date_joined')[:5].values('email', 'first_name', 'last_name')
-        recent_courses = Course.objects.order_by('-created_at')[:5].values('title', 'instructor__email')
-
-        return Response({
-            "stats": {
-                "total_users": total_users,
-                "total_students": total_students,
-                "total_instructors": total_instructors,
-                "total_courses": total_courses,
-                "total_enrollments": total_enrollments,
-                "total_payments": total_payments,
-            },
-            "recent_users": list(recent_users),
-            "recent_courses": list(recent_courses),
-        })
+        fresh = request.query_params.get('fresh') in ('1', 'true')
+        snapshot = get_dashboard_snapshot(fresh=fresh)
+        return Response({**snapshot.data, "generated_at": snapshot.generated_at})
 
-class CustomTokenObtainPairView(TokenObtainPairView):
+class CustomTokenObtainPairView(AdmissionControlMixin, TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = throttles_for('login')
+
+class ThrottleStatsView(APIView):
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        return Response(throttle_stats())
 
 class StudentOnlyView(APIView):
     permission_classes = [IsAuthenticated, IsStudent]
@@ -74,7 +68,7 @@ class LogoutView(APIView):
     def post(self, request):
         try:
             refresh_token = request.data["refresh"]
-            token = RefreshToken(refresh_token)
+            token = CachedBlacklistRefreshToken(refresh_token)
             token.blacklist()
             return Response({"message": "Successfully logged out"}, status=200)
         except Exception as e:
@@ -95,22 +89,23 @@ class UserProfileUpdateView(APIView):
             return Response({'message': 'Profile updated successfully.', 'data': serializer.data}, status=200)
         return Response(serializer.errors, status=400)
 class PasswordResetRequestView(APIView):
+    throttle_classes = throttles_for('password_reset')
+
     def post(self, request):
         email = request.data.get('email')
         try:
             user = User.objects.get(email=email)
             uid, token = generate_password_reset_token(user)
             reset_link = request.build_absolute_uri(reverse('password_reset_confirm') + f'?uid={uid}&token={token}')
-            send_mail(
+            enqueue_email(
                 subject='Password Reset Request',
                 message=f'Click the link to reset your password: {reset_link}',
-                from_email=None,
                 recipient_list=[email],
             )
             return Response({'message': 'A reset link has been sent to your email.'}, status=200)
         except User.DoesNotExist:
             return Response({'error': 'There is no user with this email.'}, status=404)
-class PasswordResetConfirmView(APIView):
+class PasswordResetConfirmView(AdmissionControlMixin, APIView):
     def post(self, request):
         uid = request.query_params.get('uid')
         token = request.query_params.get('token')
@@ -124,7 +119,7 @@ class PasswordResetConfirmView(APIView):
         user.set_password(new_password)
         user.save()
         return Response({'message': 'Your password has been changed successfully.'})
-class ChangePasswordView(APIView):
+class ChangePasswordView(AdmissionControlMixin, APIView):
     permission_classes = [IsAuthenticated]
     def put(self, request):
         serializer = ChangePasswordSerializer(data=request.data, context={'request': request})